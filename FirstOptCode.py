@@ -1,9 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from pulp import (
-    LpProblem, LpMinimize, LpVariable, LpContinuous, LpInteger,
-    lpSum, LpStatus, value, COIN_CMD
-)
+from profiling import NULL_TIMER
 
 #   {"nombre": "CL", "duracion": (180, 270),  "prioridad": 2},   # Colecistectomía laparoscópica (TRIPLE DURACIÓN)
 #   {"nombre": "AC", "duracion": (180, 360),  "prioridad": 1},   # Apendicectomía clásica (TRIPLE DURACIÓN)
@@ -307,118 +304,336 @@ def generate_instance_data(instance_type):
     return n, m, p, w, d, procedure_names, init, H
 
 
+def time_windows(n, m, p, init, H, room_ready=None, horizon=None):
+    """
+    Ventanas de tiempo [inicio más temprano, fin más tardío] de cada cirugía.
+
+    Con horizon="hard" el fin más tardío es el fin de jornada (init + H).
+    Sin horizonte duro se usa que el objetivo nunca mejora dejando tiempos
+    muertos, así que alguna solución óptima termina todo antes de
+    (quirófano que más tarde se libera) + sum(p).
+
+    Retorna (es, lc, capacity) con capacity[o] = minutos disponibles en el
+    quirófano o dentro de la jornada (None si no hay horizonte duro).
+    Lanza ValueError si alguna cirugía no cabe en la jornada.
+    """
+    ready = [max(init, room_ready[o]) if room_ready is not None else init
+             for o in range(m)]
+    es = [min(ready)] * n
+    if horizon == "hard":
+        end = init + H
+        capacity = [max(0, end - ready[o]) for o in range(m)]
+        lc = [end] * n
+        for i in range(n):
+            if es[i] + p[i] > end:
+                raise ValueError(f"La cirugía {i} (p={p[i]}) no cabe en la jornada.")
+    else:
+        capacity = None
+        lc = [max(ready) + sum(p)] * n
+    return es, lc, capacity
+
+
 def build_model(n, m, p, w, d, procedure_names, init, H,
                 alpha=0.5, beta=1.0, gamma=0.5,
-                bigM=10000):
-
+                bigM=10000, timer=None, room_ready=None,
+                horizon=None, overtime_cost=1.0, preprocess=False, verbose=True,
+                windows=True):
+    """
+    horizon: None (solo ociosidad, como el modelo original), "hard" (nada
+    termina después de init + H) u "overtime" (variables de sobretiempo
+    por quirófano con costo overtime_cost por minuto).
+    En todos los casos los inicios se acotan con time_windows y cada Big-M
+    de no solapamiento se ajusta a su par (i, j) (nunca mayor que bigM).
+    preprocess: si es True, las z que descarta preprocess.py (dominancia y
+    ventanas) no se crean; z[i] solo tiene las j que pueden ir después de i.
+    verbose: imprimir el tamaño del modelo (False en los sub-MIP de LNS).
+    windows: si es False no se usan ventanas (cotas y Big-M quedan en
+    init + bigM y bigM), así el modelo sigue siendo válido si después se
+    cambian las duraciones (mutable_model.py).
+    """
     from pulp import LpProblem, LpMinimize, LpVariable, LpContinuous, LpInteger, lpSum
 
+    # timer: profiling.PhaseTimer opcional para medir cada fase
+    if timer is None:
+        timer = NULL_TIMER
+
     prob = LpProblem("Programacion_Cirugias_Lineal", LpMinimize)
 
     S = range(n)
     O = range(m)
 
-    x = LpVariable.dicts("x", (S, O), 0, 1, cat=LpInteger)
-    z = LpVariable.dicts("z", (S, S, O), 0, 1, cat=LpInteger)
-    S_i = LpVariable.dicts("Start", S, 0, None, LpContinuous)
-    C_i = LpVariable.dicts("Completion", S, 0, None, LpContinuous)
-    u   = LpVariable.dicts("Delay", S, 0, None, LpContinuous)
-
-    w_oo = LpVariable.dicts("Work_O", O, 0, None, LpContinuous)
-    O_total = LpVariable("OciosidadTotal", 0)
+    pre = None
+    if preprocess:
+        from preprocess import preprocess_instance, allowed_order
+        with timer.span("preprocesamiento"):
+            pre = preprocess_instance(n, m, p, w, d, init, H, room_ready, horizon)
+            es, lc, capacity = pre["es"], pre["lc"], pre["capacity"]
+    elif windows:
+        with timer.span("ventanas de tiempo"):
+            es, lc, capacity = time_windows(n, m, p, init, H, room_ready, horizon)
+    else:
+        if horizon is not None:
+            raise ValueError("windows=False solo se admite sin horizonte")
+        es, lc, capacity = [init] * n, [init + bigM] * n, None
+
+    with timer.span("variables"):
+        x = LpVariable.dicts("x", (S, O), 0, 1, cat=LpInteger)
+        if pre is None:
+            z = LpVariable.dicts("z", (S, S, O), 0, 1, cat=LpInteger)
+        else:
+            z = {i: {j: {o: LpVariable(f"z_{i}_{j}_{o}", 0, 1, LpInteger) for o in O}
+                     for j in S if j != i and allowed_order(pre, i, j)}
+                 for i in S}
+        S_i = LpVariable.dicts("Start", S, 0, None, LpContinuous)
+        C_i = LpVariable.dicts("Completion", S, 0, None, LpContinuous)
+        u   = LpVariable.dicts("Delay", S, 0, None, LpContinuous)
+
+        w_oo = LpVariable.dicts("Work_O", O, 0, None, LpContinuous)
+        O_total = LpVariable("OciosidadTotal", 0)
+        if horizon == "overtime":
+            ot = LpVariable.dicts("Overtime", O, 0, None, LpContinuous)
+
+        # Cotas propagadas desde las ventanas de tiempo
+        for i in S:
+            S_i[i].lowBound = es[i]
+            S_i[i].upBound = lc[i] - p[i]
+            C_i[i].lowBound = es[i] + p[i]
+            C_i[i].upBound = lc[i]
+            u[i].upBound = max(0, lc[i] - d[i])
 
     # -------------------------------------------------------------------------
     # Función objetivo
     # -------------------------------------------------------------------------
-    prob += (
-        alpha * lpSum(w[i] * C_i[i] for i in S) + 
-        beta  * O_total +
-        gamma * lpSum(u[i] for i in S)
-    ), "Obj"
+    with timer.span("objetivo"):
+        prob += (
+            alpha * lpSum(w[i] * C_i[i] for i in S) + 
+            beta  * O_total +
+            gamma * lpSum(u[i] for i in S) +
+            (overtime_cost * lpSum(ot[o] for o in O) if horizon == "overtime" else 0)
+        ), "Obj"
 
     # -------------------------------------------------------------------------
     # Restricciones
     # -------------------------------------------------------------------------
 
     # (1) Cada cirugía a un quirófano
-    for i in S:
-        prob += lpSum(x[i][o] for o in O) == 1
+    with timer.span("restricciones (1) asignacion"):
+        for i in S:
+            prob += lpSum(x[i][o] for o in O) == 1, f"AsigUnica_{i}"
 
     # (2) C_i = S_i + p_i
-    for i in S:
-        prob += C_i[i] == S_i[i] + p[i]
-
-    # (3) Secuenciación disyuntiva
-    for i in S:
-        for j in S:
-            if i < j:
-                for o in O:
-                    prob += z[i][j][o] + z[j][i][o] <= 1
-                    prob += z[i][j][o] <= x[i][o]
-                    prob += z[i][j][o] <= x[j][o]
-                    prob += z[j][i][o] <= x[i][o]
-                    prob += z[j][i][o] <= x[j][o]
-                    prob += z[i][j][o] + z[j][i][o] >= x[i][o] + x[j][o] - 1
+    with timer.span("restricciones (2) fin"):
+        for i in S:
+            prob += C_i[i] == S_i[i] + p[i], f"TiempoFin_{i}"
+
+    # (3) Secuenciación disyuntiva (las z eliminadas valen 0; si faltan
+    # ambas, i y j no comparten quirófano)
+    with timer.span("restricciones (3) disyuntiva"):
+        for i in S:
+            for j in S:
+                if i < j:
+                    for o in O:
+                        zz = [z[a][b][o] for a, b in ((i, j), (j, i)) if b in z[a]]
+                        if len(zz) == 2:
+                            prob += zz[0] + zz[1] <= 1
+                        for var in zz:
+                            prob += var <= x[i][o]
+                            prob += var <= x[j][o]
+                        prob += lpSum(zz) >= x[i][o] + x[j][o] - 1
 
     # (4) No solapamiento
-    for i in S:
-        for j in S:
-            if i != j:
-                for o in O:
-                    prob += S_i[j] >= C_i[i] - bigM * (1 - z[i][j][o])
+    with timer.span("restricciones (4) no solapamiento"):
+        for i in S:
+            for j in S:
+                if i != j and j in z[i]:
+                    # C_i - S_j nunca supera lc_i - es_j
+                    M = min(bigM, lc[i] - es[j])
+                    for o in O:
+                        prob += S_i[j] >= C_i[i] - M * (1 - z[i][j][o])
 
     # (5) Retraso
-    for i in S:
-        prob += u[i] >= C_i[i] - d[i]
-        prob += u[i] >= 0
+    with timer.span("restricciones (5) retraso"):
+        for i in S:
+            prob += u[i] >= C_i[i] - d[i], f"RetrasoPos_{i}"
+            prob += u[i] >= 0
 
     # (6) Trabajo en quirófano o
-    for o in O:
-        prob += w_oo[o] == lpSum(x[i][o]*p[i] for i in S)
+    with timer.span("restricciones (6) trabajo"):
+        for o in O:
+            prob += w_oo[o] == lpSum(x[i][o]*p[i] for i in S), f"TrabajoQ_{o}"
 
     # (7) Ociosidad total
-    prob += O_total == lpSum(H - w_oo[o] for o in O)
+    with timer.span("restricciones (7) ociosidad"):
+        prob += O_total == lpSum(H - w_oo[o] for o in O), "Ociosidad"
 
     # (8) No iniciar antes de init
-    for i in S:
-        prob += S_i[i] >= init
-
-    bin_vars = [v for v in prob.variables() if v.cat in ("Integer", "Binary")]
-    print(f"Número de variables binarias/enteras: {len(bin_vars)}")
+    with timer.span("restricciones (8) inicio"):
+        for i in S:
+            prob += S_i[i] >= init
+
+    # (9) Disponibilidad de cada quirófano (opcional, p.ej. al reprogramar
+    # con cirugías ya en curso): si i va al quirófano o, S_i >= room_ready[o]
+    if room_ready is not None:
+        with timer.span("restricciones (9) disponibilidad"):
+            for i in S:
+                for o in O:
+                    if room_ready[o] > es[i]:
+                        M = min(bigM, room_ready[o] - es[i])
+                        prob += S_i[i] >= room_ready[o] - M * (1 - x[i][o])
+
+    # (10) Jornada de cada quirófano
+    if horizon == "hard":
+        with timer.span("restricciones (10) jornada"):
+            for o in O:
+                prob += w_oo[o] <= capacity[o]
+    elif horizon == "overtime":
+        with timer.span("restricciones (10) sobretiempo"):
+            for o in O:
+                prob += w_oo[o] <= H + ot[o]
+                for i in S:
+                    M = min(bigM, max(0, lc[i] - (init + H)))
+                    prob += ot[o] >= C_i[i] - (init + H) - M * (1 - x[i][o])
+
+    if verbose:
+        bin_vars = [v for v in prob.variables() if v.cat in ("Integer", "Binary")]
+        print(f"Número de variables binarias/enteras: {len(bin_vars)}")
+    if verbose and pre is not None:
+        st = pre["stats"]
+        print(f"Variables z eliminadas por preprocesamiento: "
+              f"{st['z_eliminadas']} de {st['z_total']}")
 
     return prob, x, z, S_i, C_i, u, O_total
 
 
-def solve_instance(instance_type, solver_path=None):
+def set_initial_solution(x, z, S_i, C_i, u, schedule, p, d):
     """
-    Construye y resuelve la instancia (1..10).
-    Retorna la info necesaria: status, valor objetivo, soluciones, etc.
+    Carga un schedule (schedule.py: room/start por cirugía) como valores
+    iniciales de las variables, para usarlo con warmStart=True.
+    Las z que no existen (preprocesamiento) se omiten.
     """
-    from pulp import LpStatus, value
-
-    n, m, p, w, d, procedure_names, init, H = generate_instance_data(instance_type)
-    prob, x, z, S_i, C_i, u, O_total = build_model(
-        n, m, p, w, d, procedure_names, init, H,
-        alpha=0.5, beta=1.0, gamma=0.5, bigM=10000
-    )
+    room, start = schedule["room"], schedule["start"]
+    n = len(p)
+    for a in range(n):
+        for o in x[a]:
+            x[a][o].setInitialValue(1 if room[a] == o else 0)
+        S_i[a].setInitialValue(start[a])
+        C_i[a].setInitialValue(start[a] + p[a])
+        u[a].setInitialValue(max(0, start[a] + p[a] - d[a]))
+    for a in range(n):
+        for b in z[a]:
+            if a == b:
+                continue
+            for o in z[a][b]:
+                before = room[a] == o == room[b] and start[a] < start[b]
+                z[a][b][o].setInitialValue(1 if before else 0)
+
+
+def get_solver(solver_path=None, timeLimit=120, msg=True, **options):
+    """
+    Configura CBC (COIN_CMD). Las opciones extra (logPath, threads, ...)
+    se pasan tal cual a COIN_CMD.
+    """
+    from pulp import COIN_CMD
 
     if solver_path:
-        solver = COIN_CMD(path=solver_path, msg=True, timeLimit=120)
-    else:
-        solver = COIN_CMD(msg=True, timeLimit=120)
-    prob.solve(solver)
+        return COIN_CMD(path=solver_path, msg=msg, timeLimit=timeLimit, **options)
+    return COIN_CMD(msg=msg, timeLimit=timeLimit, **options)
 
-    status = LpStatus[prob.status]
-    obj_value = value(prob.objective)
 
-    x_sol = {(i,o): value(x[i][o]) for i in range(n) for o in range(m)}
-    S_sol = {i: value(S_i[i]) for i in range(n)}
-    C_sol = {i: value(C_i[i]) for i in range(n)}
-    u_sol = {i: value(u[i]) for i in range(n)}
-    O_total_sol = value(O_total)
+def solve_instance(instance_type, solver_path=None, timeLimit=120, timer=None,
+                   progress=None, return_progress=False, horizon=None,
+                   preprocess=False, portfolio=None, cache=False):
+    """
+    Construye y resuelve la instancia (1..10).
+    Retorna la info necesaria: status, valor objetivo, soluciones, etc.
 
-    return (status, obj_value, x_sol, S_sol, C_sol, u_sol,
-            O_total_sol, n, m, p, w, d, procedure_names, init, H)
+    timer: profiling.PhaseTimer opcional; registra generación, construcción,
+    escritura del modelo, CBC y extracción de la solución.
+    progress: callback opcional que recibe cada punto del log de CBC
+    (time, incumbent, bound, gap, nodes) mientras resuelve.
+    return_progress: si es True se agrega la serie completa al final de la tupla.
+    horizon: modelado del fin de jornada (ver build_model).
+    preprocess: eliminar z por dominancia y ventanas (ver preprocess.py).
+    portfolio: True o lista de configuraciones (ver portfolio.py) para
+    correr varias en paralelo; se agrega al final de la tupla el registro
+    con la configuración ganadora y el resultado de cada una. Cada
+    configuración define su propio modelo, así que no se combina con
+    horizon, preprocess, cache, timer, progress ni return_progress
+    (ValueError).
+    cache: reutilizar el MPS ya escrito de la misma instancia y opciones
+    (ver model_cache.py); en un acierto no se construye el modelo.
+    """
+    from pulp import LpStatus, value
+    from cbc_log import solve_with_log
+
+    if portfolio:
+        given = [name for name, val in (("horizon", horizon), ("preprocess", preprocess),
+                                        ("cache", cache), ("timer", timer),
+                                        ("progress", progress),
+                                        ("return_progress", return_progress)) if val]
+        if given:
+            raise ValueError(f"portfolio no admite {', '.join(given)}: cada "
+                             "configuración del portafolio define su propio modelo")
+        return _solve_portfolio(instance_type, solver_path, timeLimit, portfolio)
+
+    if timer is None:
+        timer = NULL_TIMER
+
+    if cache:
+        from model_cache import solve_cached
+        return solve_cached(instance_type, solver_path, timeLimit, timer=timer,
+                            progress=progress, return_progress=return_progress,
+                            horizon=horizon, preprocess=preprocess)
+
+    with timer.span("generacion instancia"):
+        n, m, p, w, d, procedure_names, init, H = generate_instance_data(instance_type)
+    with timer.span("build_model"):
+        prob, x, z, S_i, C_i, u, O_total = build_model(
+            n, m, p, w, d, procedure_names, init, H,
+            alpha=0.5, beta=1.0, gamma=0.5, bigM=10000, timer=timer,
+            horizon=horizon, preprocess=preprocess
+        )
+
+    solver = get_solver(solver_path, timeLimit=timeLimit)
+    # CBC escribe el MPS dentro de prob.solve; se envuelve para separar ese tiempo
+    prob.writeMPS = timer.wrap(prob.writeMPS, "escritura modelo")
+    with timer.span("solver"):
+        log = solve_with_log(prob, solver, progress=progress)
+
+    with timer.span("extraccion solucion"):
+        status = LpStatus[prob.status]
+        obj_value = value(prob.objective)
+
+        x_sol = {(i,o): value(x[i][o]) for i in range(n) for o in range(m)}
+        S_sol = {i: value(S_i[i]) for i in range(n)}
+        C_sol = {i: value(C_i[i]) for i in range(n)}
+        u_sol = {i: value(u[i]) for i in range(n)}
+        O_total_sol = value(O_total)
+
+    result = (status, obj_value, x_sol, S_sol, C_sol, u_sol,
+              O_total_sol, n, m, p, w, d, procedure_names, init, H)
+    if return_progress:
+        return result + (log.series,)
+    return result
+
+
+def _solve_portfolio(instance_type, solver_path, timeLimit, portfolio):
+    """solve_instance en modo portafolio (misma tupla + registro)."""
+    import instances
+    from portfolio import solve_portfolio
+
+    inst = instances.first_instance(instance_type)
+    configs = None if portfolio is True else portfolio
+    record = solve_portfolio(inst, configs, time_limit=timeLimit, solver_path=solver_path)
+    n, m = inst["n"], inst["m"]
+    sol = record["solution"] or {
+        "x_sol": {(i, o): None for i in range(n) for o in range(m)},
+        "S_sol": {i: None for i in range(n)}, "C_sol": {i: None for i in range(n)},
+        "u_sol": {i: None for i in range(n)}, "O_total": None,
+    }
+    return (record["status"], record["objective"], sol["x_sol"], sol["S_sol"],
+            sol["C_sol"], sol["u_sol"], sol["O_total"], n, m, inst["p"], inst["w"],
+            inst["d"], inst["procedure_names"], inst["init"], inst["H"], record)
 
 
 def main():
@@ -426,9 +641,12 @@ def main():
     Resuelve todas las instancias (1..10) en serie e imprime resultados.
     Ajustamos H para que la ociosidad sea más baja (en torno a <1000).
     """
+    from validation import check_result, format_report
+
     for inst_type in range(1, 11):
+        result = solve_instance(inst_type)
         (status, obj, x_sol, S_sol, C_sol, u_sol,
-         O_total, n, m, p, w, d, procedure_names, init, H) = solve_instance(inst_type)
+         O_total, n, m, p, w, d, procedure_names, init, H) = result
 
         print(f"\n=== Resultados - Instancia {inst_type} ===")
         print(f"Status: {status}")
@@ -452,6 +670,7 @@ def main():
             print(f"    Inicio={ini_h}, Fin={fin_h}, Deadline={dd_h}, Retraso={ret:.2f}")
 
         print(f"\nOciosidad Total: {O_total:.2f}")
+        print(format_report(check_result(result)))
         print("====================================")
 
 
@@ -5,16 +5,10 @@ Código completo que usa SOLO las 10 instancias del informe
 en Hospitales Públicos de Chile'.
 
 Requisitos:
-    pip install pulp pandas
+    pip install pulp
 Recomendado usar Python >= 3.10 con PuLP para el manejo correcto de variables enteras.
 """
 
-from pulp import (
-    LpProblem, LpMinimize, LpVariable, LpContinuous, LpInteger,
-    lpSum, LpStatus, value, COIN_CMD
-)
-import pandas as pd
-
 def get_hospital_instances_from_report():
     """
     Devuelve una lista de diccionarios, cada uno representando un hospital
@@ -215,6 +209,8 @@ def build_model_lineal(n, m, p, w, d,
 
     bigM ~ 1080 asumiendo ventana 06:00-24:00.
     """
+    from pulp import LpProblem, LpMinimize, LpVariable, LpContinuous, LpInteger, lpSum
+
     prob = LpProblem("Prog_Cirugias_Lineal", LpMinimize)
 
     START_DAY = 360   # 06:00
@@ -301,6 +297,8 @@ def solve_instance(n, m, p, w, d,
     Construye el modelo con disyuntiva lineal y lo resuelve.
     Retorna un dict con los resultados (Status, Obj, Asignaciones, etc.)
     """
+    from pulp import LpStatus, value, COIN_CMD
+
     prob, x, z, S_i, C_i, u, O_total = build_model_lineal(
         n, m, p, w, d,
         alpha=alpha, beta=beta, gamma=gamma, bigM=bigM
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de construcción y resolución de los modelos.
+
+Para cada instancia (FirstOptCode 1..10, hospitales de prueba2 1..10 y
+generadas de n creciente) y cada formulación registra:
+    - número de variables (y enteras) y de restricciones
+    - tiempo de construcción del modelo (build_model)
+    - memoria máxima (RSS) del proceso Python y de CBC
+    - tiempo de CBC, valor objetivo final y gap
+    - validez de la solución y KPIs (validation.py)
+y guarda todo en un JSON para poder comparar corridas (regresiones).
+
+Uso:
+    python benchmark.py --out bench.json --time-limit 60
+    python benchmark.py --compare base.json bench.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import instances
+
+
+# Formulaciones disponibles: nombre -> (módulo, función que construye el
+# modelo a partir de build_model y una instancia). Se importa el módulo antes
+# de medir para no contar el tiempo de import como construcción.
+def _build_first(build_model, inst, bigM=10000):
+    return build_model(*instances.instance_args(inst), bigM=bigM)
+
+
+def _build_first_hard(build_model, inst, bigM=10000):
+    return build_model(*instances.instance_args(inst), bigM=bigM, horizon="hard")
+
+
+def _build_first_overtime(build_model, inst, bigM=10000):
+    return build_model(*instances.instance_args(inst), bigM=bigM, horizon="overtime")
+
+
+def _build_first_pre(build_model, inst, bigM=10000):
+    return build_model(*instances.instance_args(inst), bigM=bigM, preprocess=True)
+
+
+def _build_prueba2(build_model, inst, bigM=10000):
+    return build_model(inst["n"], inst["m"], inst["p"], inst["w"], inst["d"],
+                       bigM=bigM)
+
+
+FORMULATIONS = {
+    "first": ("FirstOptCode", _build_first),
+    "first-hard": ("FirstOptCode", _build_first_hard),
+    "first-overtime": ("FirstOptCode", _build_first_overtime),
+    "first-pre": ("FirstOptCode", _build_first_pre),
+    "prueba2": ("prueba2", _build_prueba2),
+}
+
+
+def collect_cases(sets=("first", "hosp", "gen"), sizes=(10, 20, 30, 40), seed=0):
+    """
+    Arma la lista de instancias a medir.
+    """
+    cases = []
+    if "first" in sets:
+        cases += instances.first_instances()
+    if "hosp" in sets:
+        cases += instances.hospital_instances(seed=seed)
+    if "gen" in sets:
+        cases += instances.generated_instances(sizes=sizes, seed=seed)
+    return cases
+
+
+def _peak_rss_kb(who):
+    """
+    Memoria máxima (KB) del proceso actual o de sus hijos (CBC).
+    None si no está disponible (Windows).
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(who)
+    # En macOS ru_maxrss viene en bytes; en Linux en KB.
+    if sys.platform == "darwin":
+        return usage.ru_maxrss // 1024
+    return usage.ru_maxrss
+
+
+def run_case(inst, formulation="first", time_limit=60, solver_path=None, bigM=10000):
+    """
+    Construye y resuelve una instancia con la formulación indicada y
+    retorna un diccionario con las métricas.
+    """
+    import importlib
+    from pulp import LpStatus, value
+    from FirstOptCode import get_solver
+    from cbc_log import solve_with_log
+
+    module_name, builder = FORMULATIONS[formulation]
+    build_model = importlib.import_module(module_name).build_model
+
+    t0 = time.perf_counter()
+    prob, x, z, S_i, C_i, u, O_total = builder(build_model, inst, bigM=bigM)
+    build_s = time.perf_counter() - t0
+
+    variables = prob.variables()
+    n_int = sum(1 for v in variables if v.cat in ("Integer", "Binary"))
+
+    solver = get_solver(solver_path, timeLimit=time_limit, msg=False)
+    t0 = time.perf_counter()
+    log = solve_with_log(prob, solver)
+    solve_s = time.perf_counter() - t0
+    summary = log.summary()
+
+    # sin solución entera pulp deja cargada la relajación: no es un objetivo
+    objective = value(prob.objective) if summary["objective"] is not None else None
+    report = None
+    if objective is not None:
+        from validation import check, model_arrays
+        report = check(model_arrays(x, S_i, C_i, u, inst["n"], inst["m"], inst["p"],
+                                    inst["w"], inst["d"], inst["init"], inst["H"]))
+
+    return {
+        "case": inst["name"],
+        "formulation": formulation,
+        "n": inst["n"],
+        "m": inst["m"],
+        "n_variables": len(variables),
+        "n_integer": n_int,
+        "n_constraints": len(prob.constraints),
+        "build_s": round(build_s, 4),
+        "solve_s": round(solve_s, 4),
+        "cbc_wall_s": summary["cbc_wall_s"],
+        "status": LpStatus[prob.status],
+        "cbc_result": summary["result"],
+        "objective": objective,
+        "bound": summary["bound"],
+        "gap": summary["gap"],
+        "peak_rss_kb": _peak_rss_kb(resource.RUSAGE_SELF) if resource else None,
+        "cbc_peak_rss_kb": _peak_rss_kb(resource.RUSAGE_CHILDREN) if resource else None,
+        "valid": report["ok"] if report else None,
+        "violations": {k: len(v) for k, v in report["violations"].items()} if report else None,
+        "kpi": report["kpi"] if report else None,
+        "progress": log.series,
+    }
+
+
+def run_benchmark(cases, formulations=("first",), time_limit=60,
+                  solver_path=None, isolate=True, out_path=None):
+    """
+    Ejecuta todas las combinaciones (instancia, formulación).
+
+    Con isolate=True cada caso corre en un proceso nuevo, de modo que la
+    memoria máxima medida corresponde solo a ese caso.
+    Si out_path no es None, guarda el JSON (se reescribe tras cada caso
+    para no perder lo medido si se interrumpe la corrida).
+    """
+    import pulp
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pulp": getattr(pulp, "__version__", None),
+            "time_limit": time_limit,
+            "formulations": list(formulations),
+        },
+        "results": [],
+    }
+
+    pool = None
+    if isolate:
+        import multiprocessing
+        pool = multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1)
+
+    try:
+        for inst in cases:
+            for form in formulations:
+                print(f"--- {inst['name']} [{form}] (n={inst['n']}, m={inst['m']}) ---")
+                args = (inst, form, time_limit, solver_path)
+                row = pool.apply(run_case, args) if pool else run_case(*args)
+                report["results"].append(row)
+                print(f"    build={row['build_s']:.2f}s solve={row['solve_s']:.2f}s "
+                      f"obj={row['objective']} gap={row['gap']}")
+                if out_path:
+                    save_report(report, out_path)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    return report
+
+
+def save_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_reports(base, new, rel_tol=0.10):
+    """
+    Compara dos corridas caso a caso. Retorna una lista de diferencias
+    (caso, formulación, métrica, antes, después) para los tiempos que
+    empeoran más de rel_tol y para cualquier cambio de objetivo o tamaño.
+    """
+    base_rows = {(r["case"], r["formulation"]): r for r in base["results"]}
+    diffs = []
+    for r in new["results"]:
+        key = (r["case"], r["formulation"])
+        old = base_rows.get(key)
+        if old is None:
+            continue
+        for metric in ("n_variables", "n_constraints"):
+            if old[metric] != r[metric]:
+                diffs.append((*key, metric, old[metric], r[metric]))
+        for metric in ("build_s", "solve_s"):
+            if old[metric] and r[metric] > old[metric] * (1 + rel_tol):
+                diffs.append((*key, metric, old[metric], r[metric]))
+        if old["objective"] is not None and r["objective"] is not None:
+            if abs(old["objective"] - r["objective"]) > 1e-6:
+                diffs.append((*key, "objective", old["objective"], r["objective"]))
+    return diffs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de los modelos de cirugías")
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--time-limit", type=int, default=60)
+    parser.add_argument("--solver-path", default=None)
+    parser.add_argument("--sets", nargs="+", default=["first", "hosp", "gen"],
+                        choices=["first", "hosp", "gen"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 20, 30, 40])
+    parser.add_argument("--formulations", nargs="+", default=["first"],
+                        choices=sorted(FORMULATIONS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="no usar un proceso por caso (RSS acumulado)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"),
+                        help="comparar dos JSON en vez de correr")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        diffs = compare_reports(load_report(args.compare[0]), load_report(args.compare[1]))
+        for case, form, metric, old, new in diffs:
+            print(f"{case} [{form}] {metric}: {old} -> {new}")
+        print(f"{len(diffs)} diferencias")
+        return
+
+    cases = collect_cases(args.sets, sizes=args.sizes, seed=args.seed)
+    run_benchmark(cases, formulations=args.formulations, time_limit=args.time_limit,
+                  solver_path=args.solver_path, isolate=not args.no_isolate,
+                  out_path=args.out)
+    print(f"Resultados guardados en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
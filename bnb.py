@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+Branch-and-bound propio para el problema de FirstOptCode (quirófanos
+idénticos, todos libres desde init, costo alpha*w*C + gamma*retraso; la
+ociosidad es constante).
+
+Representación: las cirugías idénticas (mismo p, w, d; los "CL", "AC"
+repetidos) forman un tipo y un quirófano se describe por cuántas de cada
+tipo hace (vector de cantidades). La tabla exacta de lagrangian.py da
+f(S) = mejor costo de secuenciar el multiconjunto S, así que la posición
+de cada cirugía dentro del quirófano ya viene resuelta por la DP.
+
+Ramificación: se llenan los quirófanos uno a uno; el quirófano k recibe
+un sub-multiconjunto de lo que falta que contiene al primer tipo
+pendiente. Esto rompe la simetría entre quirófanos vacíos idénticos y la
+dominancia entre cirugías idénticas sale gratis (nunca se distingue un
+"CL" de otro).
+
+Cota de un nodo (lo que falta R, r quirófanos libres): relajación
+lagrangiana de la asignación con multiplicadores por tipo lam,
+calculados una vez en la raíz por subgradiente:
+
+    costo(R, r) >= lam·R + r * min_{S <= R} (f(S) - lam·S)
+
+Los hijos se ordenan y se podan con la misma cota en forma barata (sin
+recalcular el mínimo).
+
+Dominancia entre nodos: si un pendiente (R, r) ya se alcanzó con un costo
+no mayor, el nodo se descarta (llenar {A, B} y luego {A, C} deja lo mismo
+que al revés).
+
+Paralelismo: los nodos de los primeros niveles (sin repetir) se reparten
+en un pool de procesos; el incumbente es un valor compartido, así que una
+poda encontrada por un proceso sirve a todos.
+
+Uso:
+    python bnb.py 4 --workers 4
+    python bnb.py --compare --time-limit 120     # contra CBC en las 10 instancias
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+# Estado de cada proceso (ver _init_worker)
+_W = {}
+# Tamaño máximo de la tabla de nodos vistos (por proceso)
+MAX_SEEN = 2000000
+# Fracción de time_limit para el subgradiente de la raíz
+ROOT_FRACTION = 0.25
+
+
+def _box(R, radix):
+    """Índices de todos los sub-multiconjuntos S <= R."""
+    idx = np.zeros(1, dtype=np.int64)
+    for a in range(len(R)):
+        if R[a]:
+            idx = (idx[:, None] + radix[a] * np.arange(R[a] + 1)[None, :]).ravel()
+    return idx
+
+
+def root_multipliers(f, state, counts, m, ub, iters=300, deadline=None):
+    """
+    Multiplicadores por tipo que maximizan la cota de la raíz
+    (subgradiente con paso de Polyak). Cada iteración recorre toda la
+    tabla; con deadline (perf_counter) se corta ahí con la mejor cota
+    hasta el momento. Retorna (lam, cota).
+    """
+    counts = np.asarray(counts, dtype=float)
+    st = state.astype(float)
+    # costo de una cirugía sola de cada tipo: índice del vector unitario
+    k = len(counts)
+    radix = np.cumprod([1] + [int(c) + 1 for c in counts[:-1]])
+    lam = np.array([f[radix[a]] for a in range(k)])
+    best, best_lam, theta, stall = -np.inf, lam.copy(), 2.0, 0
+    for _ in range(iters):
+        vals = f - lam @ st
+        s = int(np.argmin(vals))
+        L = lam @ counts + m * min(0.0, vals[s])
+        if L > best + 1e-9:
+            best, best_lam, stall = L, lam.copy(), 0
+        else:
+            stall += 1
+            if stall >= 10:
+                theta, stall = theta / 2, 0
+        g = counts - (m * st[:, s] if vals[s] < 0 else 0)
+        norm = float(g @ g)
+        if norm == 0 or theta < 1e-5 or ub - L <= 1e-9:
+            break
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        lam = lam + theta * (ub - L) / norm * g
+    return best_lam, best
+
+
+def _grid(inst, alpha, gamma):
+    """
+    Con datos enteros todo costo es múltiplo de 1/mcm(denominadores de alpha
+    y gamma): un nodo solo sirve si puede mejorar al incumbente en ese paso.
+    Retorna el paso (0 si no aplica).
+    """
+    from fractions import Fraction
+    from math import lcm
+
+    data = list(inst["p"]) + list(inst["w"]) + list(inst["d"]) + [inst["init"]]
+    if any(float(v) != int(v) for v in data):
+        return 0.0
+    fa = Fraction(alpha).limit_denominator(10 ** 6)
+    fg = Fraction(gamma).limit_denominator(10 ** 6)
+    if abs(fa - alpha) > 1e-12 or abs(fg - gamma) > 1e-12:
+        return 0.0
+    return 1.0 / lcm(fa.denominator, fg.denominator)
+
+
+def _init_worker(f, state, radix, lam, incumbent, deadline, grid=0.0):
+    _W.update(f=f, state=state, radix=radix, lam=lam, incumbent=incumbent,
+              deadline=deadline, red=f - lam @ state.astype(float),
+              step=grid - 1e-6 if grid else 1e-6, seen={})
+
+
+def _dfs(R, r, so_far, rooms, best, stats):
+    """
+    Búsqueda en profundidad desde el nodo (R pendiente, r quirófanos
+    libres, costo so_far de los quirófanos llenos). best: [costo, quirófanos]
+    del proceso. Retorna False si se agotó el tiempo.
+    """
+    f, state, radix, red, lam = _W["f"], _W["state"], _W["radix"], _W["red"], _W["lam"]
+    inc = _W["incumbent"]
+    step = _W["step"]
+    stats["nodes"] += 1
+    if stats["nodes"] % 256 == 0 and time.perf_counter() > _W["deadline"]:
+        return False
+
+    if not R.any():
+        if so_far < inc.value - 1e-6:
+            with inc.get_lock():
+                if so_far < inc.value - 1e-6:
+                    inc.value = so_far
+            best[:] = [so_far, list(rooms)]
+        return True
+    if r == 1:
+        idx = int(R @ radix)
+        cost = so_far + f[idx]
+        if cost < inc.value - 1e-6:
+            with inc.get_lock():
+                if cost < inc.value - 1e-6:
+                    inc.value = cost
+            best[:] = [cost, rooms + [idx]]
+        return True
+
+    # mismo pendiente (R, r) ya alcanzado con un costo no mayor: dominado
+    key = (int(R @ radix), r)
+    seen = _W["seen"]
+    if seen.get(key, np.inf) <= so_far + 1e-9:
+        stats["pruned"] += 1
+        return True
+    if len(seen) < MAX_SEEN:
+        seen[key] = so_far
+
+    box = _box(R, radix)
+    v = min(0.0, float(red[box].min()))
+    lam_R = float(lam @ R)
+    # poda: la cota no deja mejorar al incumbente en al menos un paso
+    if so_far + lam_R + r * v > inc.value - step:
+        stats["pruned"] += 1
+        return True
+
+    first = int(np.nonzero(R)[0][0])
+    children = box[state[first, box] > 0]
+    clb = so_far + lam_R + red[children] + (r - 1) * v
+    keep = clb <= inc.value - step
+    children, clb = children[keep], clb[keep]
+    for pos in np.argsort(clb, kind="stable"):
+        if clb[pos] > inc.value - step:
+            break
+        c = int(children[pos])
+        if not _dfs(R - state[:, c], r - 1, so_far + f[c], rooms + [c], best, stats):
+            return False
+    return True
+
+
+def _expand(nodes):
+    """
+    Hijos de una lista de nodos (R, r, so_far, quirófanos) que pasan la
+    cota, sin repetir (R, r) (se queda el de menor costo), en orden de cota.
+    """
+    f, state, radix, red, lam = _W["f"], _W["state"], _W["radix"], _W["red"], _W["lam"]
+    thr = _W["incumbent"].value - _W["step"]
+    out = {}
+    for R, r, so_far, rooms in nodes:
+        if r == 1 or not R.any():
+            out[(int(R @ radix), r)] = ((R, r, so_far, rooms), -np.inf)
+            continue
+        box = _box(R, radix)
+        v = min(0.0, float(red[box].min()))
+        first = int(np.nonzero(R)[0][0])
+        children = box[state[first, box] > 0]
+        clb = so_far + float(lam @ R) + red[children] + (r - 1) * v
+        for c, lb in zip(children.tolist(), clb.tolist()):
+            if lb > thr:
+                continue
+            R2 = R - state[:, c]
+            key = (int(R2 @ radix), r - 1)
+            if key not in out or out[key][0][2] > so_far + f[c]:
+                out[key] = ((R2, r - 1, so_far + float(f[c]), rooms + [c]), lb)
+    return [node for node, _ in sorted(out.values(), key=lambda t: t[1])]
+
+
+def _run_subtree(R, r, so_far, rooms):
+    """Tarea del pool: un hijo de la raíz."""
+    best = [None, None]
+    stats = {"nodes": 0, "pruned": 0}
+    done = _dfs(np.asarray(R), r, so_far, rooms, best, stats)
+    return best, stats, done
+
+
+def _room_order(idx, f, state, radix, types, init, alpha, gamma):
+    """Orden de tipos de un quirófano reconstruido desde la tabla."""
+    order = []
+    s = state[:, idx].astype(np.int64)
+    while s.any():
+        t = init + sum(types[a][0] * s[a] for a in range(len(types)))
+        cur = int(s @ radix)
+        for a in range(len(types)):
+            if s[a] == 0:
+                continue
+            p_a, w_a, d_a = types[a]
+            prev = cur - radix[a]
+            if abs(f[prev] + alpha * w_a * t + gamma * max(0.0, t - d_a) - f[cur]) <= 1e-6:
+                order.append(a)
+                s[a] -= 1
+                break
+    order.reverse()
+    return order
+
+
+def solve_bnb(inst, time_limit=600, workers=1, alpha=0.5, beta=1.0, gamma=0.5,
+              verbose=False):
+    """
+    Branch-and-bound sobre inst (dict de instances.py).
+
+    Retorna dict con objective (objetivo del modelo), bound, proven,
+    schedule, nodes, elapsed y root_bound.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from heuristics import heuristic_schedule, total_cost
+    from lagrangian import MAX_STATES, _exact_table, _types, n_states
+    from schedule import room_sequences, schedule_from_sequences
+
+    t0 = time.perf_counter()
+    n, m, p, w, d = inst["n"], inst["m"], inst["p"], inst["w"], inst["d"]
+    init, H = inst["init"], inst["H"]
+    idle = beta * (m * H - sum(p))
+
+    types, groups = _types(n, p, w, d)
+    if n_states(groups) > MAX_STATES:
+        raise ValueError(f"{inst['name']}: demasiados estados para la tabla exacta "
+                         f"({n_states(groups)} > {MAX_STATES})")
+    counts = np.array([len(g) for g in groups], dtype=np.int64)
+    f, state = _exact_table(types, list(counts), init, alpha, gamma)
+    radix = np.cumprod([1] + [int(c) + 1 for c in counts[:-1]]).astype(np.int64)
+
+    seqs = room_sequences(heuristic_schedule(n, m, p, w, d, init, alpha, gamma), m)
+    ub = total_cost(seqs, [init] * m, p, w, d, alpha, gamma)
+    deadline = t0 + time_limit
+    lam, root_bound = root_multipliers(f, state, counts, m, ub,
+                                       deadline=t0 + ROOT_FRACTION * time_limit)
+    if verbose:
+        print(f"[{time.perf_counter() - t0:6.1f}s] tipos={len(types)} estados={len(f)} "
+              f"incumbente={ub + idle:.2f} cota raíz={root_bound + idle:.2f}")
+
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    incumbent = ctx.Value("d", ub)
+    grid = _grid(inst, alpha, gamma)
+    _init_worker(f, state, radix, lam, incumbent, deadline, grid)
+
+    # en paralelo se reparten los nodos de los primeros niveles, sin repetir
+    # (R, r): así las tareas no exploran dos veces el mismo pendiente
+    tasks = [(counts, m, 0.0, [])]
+    if workers > 1:
+        for _ in range(3):
+            if len(tasks) >= 4 * workers:
+                break
+            tasks = _expand(tasks)
+
+    best_cost, best_rooms = None, None
+    nodes, proven = 1, True
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_worker,
+                                 initargs=(f, state, radix, lam, incumbent, deadline,
+                                           grid)) as pool:
+            futures = [pool.submit(_run_subtree, *t) for t in tasks]
+            for fut in as_completed(futures):
+                best, stats, done = fut.result()
+                nodes += stats["nodes"]
+                proven = proven and done
+                if best[0] is not None and (best_cost is None or best[0] < best_cost):
+                    best_cost, best_rooms = best
+                    if verbose:
+                        print(f"[{time.perf_counter() - t0:6.1f}s] incumbente {best_cost + idle:.2f}")
+    else:
+        for t in tasks:
+            best, stats, done = _run_subtree(*t)
+            nodes += stats["nodes"]
+            proven = proven and done
+            if best[0] is not None and (best_cost is None or best[0] < best_cost):
+                best_cost, best_rooms = best
+                if verbose:
+                    print(f"[{time.perf_counter() - t0:6.1f}s] incumbente {best_cost + idle:.2f}")
+            if not done:
+                break
+
+    if best_cost is not None:
+        # secuencias reales: cirugías de cada tipo en el orden de la DP
+        used = [0] * len(types)
+        seqs = []
+        for idx in best_rooms:
+            seq = []
+            for a in _room_order(idx, f, state, radix, types, init, alpha, gamma):
+                seq.append(groups[a][used[a]])
+                used[a] += 1
+            seqs.append(seq)
+        seqs += [[] for _ in range(m - len(seqs))]
+    cost = total_cost(seqs, [init] * m, p, w, d, alpha, gamma)
+
+    return {"objective": cost + idle, "bound": (cost if proven else root_bound) + idle,
+            "proven": proven, "root_bound": root_bound + idle,
+            "schedule": schedule_from_sequences(seqs, [init] * m, n, p),
+            "nodes": nodes, "elapsed": time.perf_counter() - t0}
+
+
+def compare(instance_types=range(1, 11), time_limit=120, workers=1, solver_path=None):
+    """
+    Tiempo para probar optimalidad: este B&B contra CBC (build_model) con el
+    mismo límite, en las instancias de FirstOptCode.
+    """
+    import instances
+    from benchmark import run_case
+
+    print(f"{'Instancia':<10} {'B&B obj':>10} {'probado':>8} {'t(s)':>8} {'nodos':>9} "
+          f"{'CBC obj':>10} {'CBC estado':<24} {'t(s)':>8}")
+    rows = []
+    for k in instance_types:
+        inst = instances.first_instance(k)
+        res = solve_bnb(inst, time_limit, workers)
+        cbc = run_case(inst, "first", time_limit=time_limit, solver_path=solver_path)
+        cbc_obj = cbc["objective"]
+        rows.append({"case": inst["name"], "bnb": res, "cbc": cbc})
+        print(f"{inst['name']:<10} {res['objective']:>10.2f} {str(res['proven']):>8} "
+              f"{res['elapsed']:>8.2f} {res['nodes']:>9} "
+              f"{(f'{cbc_obj:.2f}' if cbc_obj is not None else '-'):>10} "
+              f"{(cbc['cbc_result'] or '-')[:24]:<24} {cbc['solve_s']:>8.2f}", flush=True)
+    return rows
+
+
+def main(argv=None):
+    import instances
+
+    parser = argparse.ArgumentParser(description="Branch-and-bound por quirófanos")
+    parser.add_argument("instance", type=int, nargs="?", default=1)
+    parser.add_argument("--time-limit", type=float, default=600)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--compare", action="store_true",
+                        help="las 10 instancias de FirstOptCode contra CBC")
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(time_limit=args.time_limit, workers=args.workers,
+                solver_path=args.solver_path)
+        return
+    inst = instances.first_instance(args.instance)
+    res = solve_bnb(inst, args.time_limit, args.workers, verbose=True)
+    print(f"{inst['name']}: objetivo {res['objective']:.2f}  cota {res['bound']:.2f}  "
+          f"{'óptimo probado' if res['proven'] else 'sin probar'}  nodos={res['nodes']}  "
+          f"en {res['elapsed']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
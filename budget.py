@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Modo presupuesto: resolver un lote de instancias con un tiempo total de
+reloj y un número de núcleos, en vez de un timeLimit fijo por instancia.
+
+CBC no se puede pausar, así que el tiempo se reparte en tramos:
+    - siempre hay hasta `cores` CBC corriendo (uno por proceso, threads=1);
+    - cada tramo recibe la parte justa del tiempo restante
+      (tiempo_restante * cores / instancias_activas), de modo que el tiempo
+      que liberan las instancias que terminan antes pasa a las demás; el
+      primer tramo de cada instancia es solo una fracción (first_fraction)
+      para que quede tiempo que repartir según el gap;
+    - la siguiente instancia a lanzar es la de mayor gap (sin solución
+      primero), después de que todas hayan tenido su primer tramo;
+    - una instancia termina cuando CBC prueba optimalidad o su gap queda
+      bajo gap_tol; si no, vuelve a la cola y el siguiente tramo parte
+      desde su mejor solución (warmStart).
+
+Uso:
+    python budget.py --budget 600 --cores 4 --sets first --gap 0.01
+"""
+
+import argparse
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import instances
+
+
+def _solve_slice(inst, time_limit, gap_tol, start_values=None, solver_path=None):
+    """
+    Un tramo de CBC para una instancia. Se ejecuta en un proceso aparte.
+    Retorna objetivo, cota, valores de las variables (para el siguiente
+    warm start) y la solución en el formato de solve_instance. elapsed
+    incluye la construcción del modelo. optimal solo es True si CBC probó
+    optimalidad sin tolerancia de gap.
+    """
+    from pulp import LpStatus, value
+    from FirstOptCode import build_model, get_solver
+    from cbc_log import solve_with_log
+
+    t0 = time.perf_counter()
+    n, m = inst["n"], inst["m"]
+    prob, x, z, S_i, C_i, u, O_total = build_model(*instances.instance_args(inst),
+                                                   verbose=False)
+
+    warm = False
+    if start_values:
+        for v in prob.variables():
+            if v.name in start_values:
+                v.setInitialValue(start_values[v.name])
+        warm = True
+
+    solver = get_solver(solver_path, timeLimit=max(1, int(time_limit)), msg=False,
+                        gapRel=gap_tol, threads=1, warmStart=warm)
+    log = solve_with_log(prob, solver)
+    elapsed = time.perf_counter() - t0
+    summary = log.summary()
+
+    obj = value(prob.objective) if summary["objective"] is not None else None
+    result = {
+        "elapsed": elapsed,
+        "cbc_result": summary["result"],
+        "status": LpStatus[prob.status],
+        "objective": obj,
+        "bound": summary["bound"],
+        "optimal": summary["result"] == "Optimal solution found",
+        "values": None,
+        "solution": None,
+        "validation": None,
+    }
+    if obj is not None:
+        from validation import check, model_arrays
+        result["validation"] = check(model_arrays(
+            x, S_i, C_i, u, n, m, inst["p"], inst["w"], inst["d"], inst["init"], inst["H"]))
+        result["values"] = {v.name: v.varValue for v in prob.variables()}
+        result["solution"] = {
+            "x_sol": {(i, o): value(x[i][o]) for i in range(n) for o in range(m)},
+            "S_sol": {i: value(S_i[i]) for i in range(n)},
+            "C_sol": {i: value(C_i[i]) for i in range(n)},
+            "u_sol": {i: value(u[i]) for i in range(n)},
+            "O_total": value(O_total),
+        }
+    return result
+
+
+def _gap(state):
+    from cbc_log import compute_gap
+    return compute_gap(state["objective"], state["bound"])
+
+
+def _priority(state):
+    """
+    Primero las instancias que aún no corren; luego mayor gap (sin solución
+    antes que todas) y, a igual gap, la que ha recibido menos tramos.
+    """
+    gap = _gap(state)
+    gap = float("inf") if gap is None else gap
+    return (state["slices"] == 0, gap, -state["slices"])
+
+
+def run_budget(cases, budget_s, cores=1, gap_tol=0.01, min_slice=5,
+               first_fraction=0.5, solver_path=None, verbose=True):
+    """
+    Resuelve las instancias (dicts de instances.py) dentro de budget_s
+    segundos de reloj usando `cores` procesos.
+
+    Retorna un dict nombre -> estado con objective, bound, gap, done,
+    time_used, slices, la mejor solución encontrada y su validación.
+    """
+    t_start = time.perf_counter()
+    deadline = t_start + budget_s
+
+    states = {
+        inst["name"]: {
+            "inst": inst, "objective": None, "bound": None, "done": False,
+            "time_used": 0.0, "slices": 0, "values": None, "solution": None,
+            "validation": None,
+        }
+        for inst in cases
+    }
+    running = {}
+
+    def next_case():
+        waiting = [s for s in states.values()
+                   if not s["done"] and s["inst"]["name"] not in running.values()]
+        if not waiting:
+            return None
+        return max(waiting, key=_priority)
+
+    def fair_slice(state):
+        remaining = deadline - time.perf_counter()
+        active = sum(1 for s in states.values() if not s["done"])
+        share = remaining * cores / max(1, active)
+        if state["slices"] == 0:
+            share *= first_fraction
+        # nunca menos que min_slice (si queda tiempo), nunca más que lo que queda
+        return min(remaining, max(share, min_slice))
+
+    with ProcessPoolExecutor(max_workers=cores) as pool:
+        while True:
+            # Lanzar tramos mientras haya núcleos libres y tiempo
+            while len(running) < cores:
+                state = next_case()
+                if state is None:
+                    break
+                slice_s = fair_slice(state)
+                if slice_s < min_slice:
+                    break
+                name = state["inst"]["name"]
+                fut = pool.submit(_solve_slice, state["inst"], slice_s, gap_tol,
+                                  state["values"], solver_path)
+                running[fut] = name
+                state["slices"] += 1
+                if verbose:
+                    print(f"[{time.perf_counter() - t_start:7.1f}s] {name}: tramo de "
+                          f"{slice_s:.0f}s (gap={_gap(state)})")
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                state = states[name]
+                res = fut.result()
+                state["time_used"] += res["elapsed"]
+
+                if res["objective"] is not None and (
+                        state["objective"] is None or res["objective"] < state["objective"]):
+                    state["objective"] = res["objective"]
+                    state["values"] = res["values"]
+                    state["solution"] = res["solution"]
+                    state["validation"] = res["validation"]
+                if res["bound"] is not None:
+                    # la cota de cualquier tramo es válida: se guarda la mejor
+                    state["bound"] = max(state["bound"] or res["bound"], res["bound"])
+                if res["optimal"]:
+                    state["bound"] = state["objective"]
+
+                gap = _gap(state)
+                state["done"] = res["optimal"] or (gap is not None and gap <= gap_tol)
+                if verbose:
+                    print(f"[{time.perf_counter() - t_start:7.1f}s] {name}: "
+                          f"obj={state['objective']} gap={gap} "
+                          f"{'terminada' if state['done'] else 'en cola'}")
+
+    for state in states.values():
+        state["gap"] = _gap(state)
+        state.pop("values")
+    return states
+
+
+def print_summary(states):
+    print(f"\n{'Instancia':<16} {'Objetivo':>12} {'Cota':>12} {'Gap':>8} "
+          f"{'Tramos':>7} {'Tiempo(s)':>10} {'Válida':>7} Estado")
+    for name, s in states.items():
+        obj = f"{s['objective']:.1f}" if s["objective"] is not None else "-"
+        bound = f"{s['bound']:.1f}" if s["bound"] is not None else "-"
+        gap = f"{100 * s['gap']:.2f}%" if s["gap"] is not None else "-"
+        valid = "-" if s["validation"] is None else ("sí" if s["validation"]["ok"] else "NO")
+        print(f"{name:<16} {obj:>12} {bound:>12} {gap:>8} {s['slices']:>7} "
+              f"{s['time_used']:>10.1f} {valid:>7} "
+              f"{'terminada' if s['done'] else 'sin cerrar'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolver un lote con presupuesto de tiempo global")
+    parser.add_argument("--budget", type=float, required=True, help="segundos de reloj en total")
+    parser.add_argument("--cores", type=int, default=1)
+    parser.add_argument("--gap", type=float, default=0.01, help="gap relativo para dar por cerrada una instancia")
+    parser.add_argument("--min-slice", type=float, default=5)
+    parser.add_argument("--sets", nargs="+", default=["first"], choices=["first", "hosp"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+
+    cases = []
+    if "first" in args.sets:
+        cases += instances.first_instances()
+    if "hosp" in args.sets:
+        cases += instances.hospital_instances(seed=args.seed)
+
+    states = run_budget(cases, args.budget, cores=args.cores, gap_tol=args.gap,
+                        min_slice=args.min_slice, solver_path=args.solver_path)
+    print_summary(states)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura del log de CBC mientras resuelve.
+
+COIN_CMD escribe el log en un archivo (logPath); un hilo lo va leyendo línea
+a línea y el parser arma una serie de tiempo con la mejor solución entera
+(incumbente), la mejor cota, el gap y los nodos explorados. Cada punto nuevo
+se entrega a un callback, o se consume como iterador con ProgressStream.
+
+Redirigido a un archivo, CBC escribe el log en bloques de ~4 KB, así que
+los puntos llegarían en ráfagas (o recién al terminar). Para que lleguen al
+momento se ejecuta CBC con la salida por líneas, como `stdbuf -oL`: PuLP
+lanza el binario directamente, así que se usa el mismo mecanismo de stdbuf
+(LD_PRELOAD=libstdbuf.so, _STDBUF_O=L en el entorno que hereda CBC). Si
+libstdbuf no está (Windows, macOS sin coreutils) el log se lee igual, pero
+en ráfagas.
+
+Ejemplo:
+    stream = ProgressStream(solve_instance, 1, timeLimit=60)
+    for ev in stream:
+        print(ev["time"], ev["incumbent"], ev["bound"], ev["gap"])
+    status, obj, *resto = stream.result
+"""
+
+import os
+import queue
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+# CBC usa 1e+50 como "sin solución"
+_NO_SOLUTION = 1e49
+
+_NUM = r"([-+]?\d[\d.eE+-]*)"
+
+_PATTERNS = [
+    # Cbc0010I After 1000 nodes, 85 on tree, 5395 best solution, best possible 5147.5 (3.1 seconds)
+    ("nodes", re.compile(
+        rf"Cbc0010I After (\d+) nodes, \d+ on tree, {_NUM} best solution, "
+        rf"best possible {_NUM} \({_NUM} seconds\)")),
+    # Cbc0012I Integer solution of 5395 found by DiveCoefficient after 120 iterations and 0 nodes (0.5 seconds)
+    # Cbc0004I Integer solution of 5395 found after 600 iterations and 12 nodes (0.9 seconds)
+    ("solution", re.compile(
+        rf"Cbc00(?:12|04)I Integer solution of {_NUM} found .*?after \d+ iterations "
+        rf"and (\d+) nodes \({_NUM} seconds\)")),
+    # Cbc0001I Search completed - best objective 5395, took 596738 iterations and 68542 nodes (83.22 seconds)
+    ("completed", re.compile(
+        rf"Cbc0001I Search completed - best objective {_NUM}, took \d+ iterations "
+        rf"and (\d+) nodes \({_NUM} seconds\)")),
+    # Cbc0005I Partial search - best objective 1e+50 (best possible 14077.5), took 37 iterations and 0 nodes (4.85 seconds)
+    ("partial", re.compile(
+        rf"Cbc0005I Partial search - best objective {_NUM} \(best possible {_NUM}\), "
+        rf"took \d+ iterations and (\d+) nodes \({_NUM} seconds\)")),
+    # Continuous objective value is 14077.5 - 0.04 seconds
+    ("root", re.compile(rf"Continuous objective value is {_NUM} - {_NUM} seconds")),
+]
+
+_SUMMARY_PATTERNS = {
+    "result": re.compile(r"^Result - (.+)$", re.MULTILINE),
+    "objective": re.compile(r"^Objective value:\s+(\S+)", re.MULTILINE),
+    "bound": re.compile(r"^Lower bound:\s+(\S+)", re.MULTILINE),
+    "gap": re.compile(r"^Gap:\s+(\S+)", re.MULTILINE),
+    "cbc_wall_s": re.compile(r"^Time \(Wallclock seconds\):\s+(\S+)", re.MULTILINE),
+}
+
+
+def _incumbent(val):
+    val = float(val)
+    return None if val >= _NO_SOLUTION else val
+
+
+def compute_gap(incumbent, bound):
+    """Gap relativo (incumbente - cota) / |incumbente|, o None."""
+    if incumbent is None or bound is None:
+        return None
+    return max(0.0, incumbent - bound) / max(abs(incumbent), 1e-9)
+
+
+def parse_line(line):
+    """
+    Interpreta una línea del log. Retorna un dict parcial con las claves
+    encontradas (time, incumbent, bound, nodes) o None si la línea no aporta.
+    """
+    for kind, pat in _PATTERNS:
+        found = pat.search(line)
+        if not found:
+            continue
+        g = found.groups()
+        if kind == "nodes":
+            return {"kind": kind, "nodes": int(g[0]), "incumbent": _incumbent(g[1]),
+                    "bound": float(g[2]), "time": float(g[3])}
+        if kind == "solution":
+            return {"kind": kind, "incumbent": float(g[0]), "nodes": int(g[1]),
+                    "time": float(g[2])}
+        if kind == "completed":
+            inc = _incumbent(g[0])
+            # búsqueda completa: la cota es el propio óptimo
+            return {"kind": kind, "incumbent": inc, "bound": inc,
+                    "nodes": int(g[1]), "time": float(g[2])}
+        if kind == "partial":
+            return {"kind": kind, "incumbent": _incumbent(g[0]), "bound": float(g[1]),
+                    "nodes": int(g[2]), "time": float(g[3])}
+        if kind == "root":
+            return {"kind": kind, "bound": float(g[0]), "time": float(g[1])}
+    return None
+
+
+def parse_summary(text):
+    """
+    Extrae el resumen final del log de CBC: resultado, objetivo, cota,
+    gap y tiempo de reloj. Los campos ausentes quedan en None. Solo un
+    "Optimal" sin tolerancia de gap fija la cota en el objetivo; si CBC
+    paró por gapRel/gapAbs se conserva la cota que informa.
+
+    El gap se calcula con compute_gap, igual que en la serie en vivo; el
+    "Gap:" que imprime CBC (relativo a la cota y con dos decimales) queda
+    en cbc_gap.
+    """
+    summary = {key: None for key in _SUMMARY_PATTERNS}
+    for key, pat in _SUMMARY_PATTERNS.items():
+        found = pat.search(text)
+        if found:
+            val = found.group(1).strip()
+            summary[key] = val if key == "result" else float(val)
+
+    summary["cbc_gap"] = summary["gap"]
+    if summary["result"] == "Optimal solution found":
+        summary["bound"] = summary["objective"]
+    summary["gap"] = compute_gap(summary["objective"], summary["bound"])
+    return summary
+
+
+class CbcLogParser:
+    """
+    Acumula el estado (incumbente, cota, nodos) y la serie de tiempo.
+    Solo agrega un punto cuando cambia el incumbente, la cota o los nodos.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.lines = []
+        self.series = []
+        self.incumbent = None
+        self.bound = None
+        self.nodes = 0
+        self.time = 0.0
+
+    def feed(self, line):
+        self.lines.append(line)
+        info = parse_line(line)
+        if info is None:
+            return None
+
+        self.time = info.get("time", self.time)
+        self.nodes = info.get("nodes", self.nodes)
+        if info.get("incumbent") is not None:
+            if self.incumbent is None or info["incumbent"] < self.incumbent:
+                self.incumbent = info["incumbent"]
+        if info.get("bound") is not None:
+            # la cota de CBC no empeora; se ignoran oscilaciones del log
+            if self.bound is None or info["bound"] > self.bound:
+                self.bound = info["bound"]
+        if self.incumbent is not None and self.bound is not None:
+            self.bound = min(self.bound, self.incumbent)
+
+        event = {
+            "time": self.time,
+            "incumbent": self.incumbent,
+            "bound": self.bound,
+            "gap": compute_gap(self.incumbent, self.bound),
+            "nodes": self.nodes,
+        }
+        last = self.series[-1] if self.series else None
+        if last and all(last[k] == event[k] for k in ("incumbent", "bound", "nodes")):
+            return None
+        self.series.append(event)
+        if self.callback:
+            self.callback(event)
+        return event
+
+    def summary(self):
+        return parse_summary("".join(self.lines))
+
+
+def _follow(path, parser, stop, echo):
+    """
+    Lee el archivo de log a medida que CBC lo escribe, hasta que se pide
+    parar y no quedan líneas nuevas.
+    """
+    pending = ""
+    f = None
+    try:
+        while f is None:
+            try:
+                f = open(path, encoding="utf-8", errors="replace")
+            except FileNotFoundError:
+                if stop.is_set():
+                    return
+                time.sleep(0.05)
+        while True:
+            chunk = f.readline()
+            if chunk:
+                pending += chunk
+                if pending.endswith("\n"):
+                    if echo:
+                        sys.stdout.write(pending)
+                    parser.feed(pending)
+                    pending = ""
+                continue
+            if stop.is_set():
+                if pending:
+                    parser.feed(pending)
+                return
+            time.sleep(0.05)
+    finally:
+        if f is not None:
+            f.close()
+
+
+_STDBUF_DIRS = ("/usr/libexec/coreutils", "/usr/lib/coreutils",
+                "/usr/lib/x86_64-linux-gnu/coreutils", "/usr/local/libexec/coreutils")
+_env_lock = threading.Lock()
+_env_users = 0
+_env_saved = None
+
+
+def _libstdbuf():
+    """Ruta de libstdbuf.so (la de coreutils que usa stdbuf), o None."""
+    dirs = list(_STDBUF_DIRS)
+    stdbuf = shutil.which("stdbuf")
+    if stdbuf:
+        prefix = os.path.dirname(os.path.dirname(os.path.realpath(stdbuf)))
+        dirs[:0] = [os.path.join(prefix, "libexec", "coreutils"),
+                    os.path.join(prefix, "lib", "coreutils")]
+    for d in dirs:
+        path = os.path.join(d, "libstdbuf.so")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+@contextmanager
+def line_buffered():
+    """
+    Mientras dura, los procesos lanzados (CBC) escriben su salida por líneas.
+    Varias resoluciones en hilos comparten el cambio del entorno; se
+    restaura cuando termina la última.
+    """
+    global _env_users, _env_saved
+    lib = _libstdbuf()
+    if lib is None:
+        yield
+        return
+    with _env_lock:
+        if _env_users == 0:
+            _env_saved = {k: os.environ.get(k) for k in ("LD_PRELOAD", "_STDBUF_O")}
+            preload = _env_saved["LD_PRELOAD"]
+            os.environ["LD_PRELOAD"] = f"{lib} {preload}" if preload else lib
+            os.environ["_STDBUF_O"] = "L"
+        _env_users += 1
+    try:
+        yield
+    finally:
+        with _env_lock:
+            _env_users -= 1
+            if _env_users == 0:
+                for k, v in _env_saved.items():
+                    if v is None:
+                        os.environ.pop(k, None)
+                    else:
+                        os.environ[k] = v
+
+
+def solve_with_log(prob, solver, progress=None):
+    """
+    Resuelve prob con el COIN_CMD dado capturando el log en vivo.
+
+    Si el solver tiene msg=True el log se sigue mostrando por consola.
+    progress: callback opcional que recibe cada punto de la serie.
+    Retorna el CbcLogParser (serie en .series, resumen en .summary()).
+    """
+    parser = CbcLogParser(callback=progress)
+    fd, log_path = tempfile.mkstemp(suffix=".log", prefix="cbc_")
+    os.close(fd)
+    # pulp reemplaza msg por logPath; el eco a consola lo hace el hilo lector
+    echo = solver.msg
+    old_msg, old_log = solver.msg, solver.optionsDict.get("logPath")
+    solver.msg = False
+    solver.optionsDict["logPath"] = log_path
+
+    stop = threading.Event()
+    reader = threading.Thread(target=_follow, args=(log_path, parser, stop, echo),
+                              daemon=True)
+    reader.start()
+    try:
+        with line_buffered():
+            prob.solve(solver)
+    finally:
+        stop.set()
+        reader.join()
+        solver.msg = old_msg
+        solver.optionsDict["logPath"] = old_log
+        os.remove(log_path)
+    return parser
+
+
+def time_to_target(series, target, rel_gap=None):
+    """
+    Primer instante en que el incumbente alcanza target (<= target), o en que
+    el gap cae bajo rel_gap si se indica. None si nunca ocurre.
+    """
+    for ev in series:
+        if rel_gap is not None:
+            if ev["gap"] is not None and ev["gap"] <= rel_gap:
+                return ev["time"]
+        elif ev["incumbent"] is not None and ev["incumbent"] <= target:
+            return ev["time"]
+    return None
+
+
+class ProgressStream:
+    """
+    Iterador sobre el progreso de una función de resolución que acepta
+    progress=callback (p.ej. FirstOptCode.solve_instance). La función corre
+    en un hilo; al terminar la iteración, .result tiene su valor de retorno.
+    """
+
+    _DONE = object()
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.error = None
+
+    def __iter__(self):
+        events = queue.Queue()
+
+        def run():
+            try:
+                self.result = self.func(*self.args, progress=events.put, **self.kwargs)
+            except BaseException as exc:
+                self.error = exc
+            finally:
+                events.put(self._DONE)
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        while True:
+            ev = events.get()
+            if ev is self._DONE:
+                break
+            yield ev
+        worker.join()
+        if self.error is not None:
+            raise self.error
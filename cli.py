@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Punto de entrada único por línea de comandos.
+
+Subcomandos:
+    solve     resuelve una instancia y muestra la programación
+    batch     resuelve un conjunto de instancias (en paralelo con --jobs)
+    bench     benchmark de construcción/resolución (benchmark.py)
+    generate  genera instancias y las guarda como JSON
+
+PuLP, numpy y el resto de los módulos pesados se importan solo dentro del
+subcomando que los necesita, así que --help y las corridas heurísticas
+parten de inmediato. La ruta de CBC se puede dar con --solver-path o con
+la variable de entorno CBC_PATH.
+
+Ejemplos:
+    python cli.py solve 4 --time-limit 60
+    python cli.py solve --set hosp 3 --formulation heuristic
+    python cli.py batch --set first --jobs 4 --formulation first-pre --out res.json
+    python cli.py generate --set gen --sizes 20 40 --out-dir instancias
+    python cli.py solve --file instancias/gen-n20-m10-s0.json
+    python cli.py bench --sets first --time-limit 30
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Además de las formulaciones de benchmark.FORMULATIONS
+EXTRA_FORMULATIONS = ("heuristic", "portfolio")
+MIP_FORMULATIONS = ("first", "first-hard", "first-overtime", "first-pre", "prueba2")
+
+
+def _select(args):
+    """Instancias según --file / --set / números / --sizes."""
+    import instances
+
+    if getattr(args, "file", None):
+        return [instances.load_instance(path) for path in args.file]
+    if args.set == "first":
+        ks = args.instances or range(1, 11)
+        return [instances.first_instance(k) for k in ks]
+    if args.set == "hosp":
+        ks = args.instances or range(1, 11)
+        return [instances.hospital_instance(k, seed=args.seed) for k in ks]
+    sizes = args.instances or args.sizes
+    return [instances.generate_instance(n, seed=args.seed) for n in sizes]
+
+
+def solve_one(inst, formulation="first", time_limit=120, solver_path=None):
+    """
+    Resuelve una instancia (dict de instances.py) con la formulación dada.
+    Retorna dict con name, formulation, status, objective, bound, elapsed y
+    schedule (room/start, ver schedule.py) o None si no hay solución.
+    """
+    n, m = inst["n"], inst["m"]
+    t0 = time.perf_counter()
+    bound = None
+
+    if formulation == "heuristic":
+        from heuristics import heuristic_schedule
+        from schedule import evaluate
+
+        sched = heuristic_schedule(n, m, inst["p"], inst["w"], inst["d"], inst["init"])
+        status = "Heuristic"
+        objective = evaluate(sched, inst["p"], inst["w"], inst["d"], inst["H"], m)["objective"]
+    elif formulation == "portfolio":
+        from portfolio import solve_portfolio
+        from schedule import schedule_from_solution
+
+        rec = solve_portfolio(inst, time_limit=time_limit, solver_path=solver_path)
+        status, objective, bound = rec["status"], rec["objective"], rec["bound"]
+        sched = None
+        if rec["solution"] is not None:
+            sched = schedule_from_solution(rec["solution"]["x_sol"],
+                                           rec["solution"]["S_sol"], n, m)
+        status = f"{status} ({rec['winner']})"
+    else:
+        import importlib
+        from pulp import LpStatus, value
+        from benchmark import FORMULATIONS
+        from cbc_log import solve_with_log
+        from FirstOptCode import get_solver
+        from schedule import schedule_from_solution
+
+        module_name, builder = FORMULATIONS[formulation]
+        build_model = importlib.import_module(module_name).build_model
+        prob, x, z, S_i, C_i, u, O_total = builder(build_model, inst)
+        log = solve_with_log(prob, get_solver(solver_path, timeLimit=time_limit, msg=False))
+        summary = log.summary()
+        # pulp informa Optimal aunque CBC se haya detenido por tiempo
+        status = summary["result"] or LpStatus[prob.status]
+        bound = summary["bound"]
+        objective = value(prob.objective) if summary["objective"] is not None else None
+        sched = None
+        if objective is not None:
+            sched = schedule_from_solution(
+                {(i, o): value(x[i][o]) for i in range(n) for o in range(m)},
+                {i: value(S_i[i]) for i in range(n)}, n, m)
+
+    return {"name": inst["name"], "formulation": formulation, "n": n, "m": m,
+            "status": status, "objective": objective, "bound": bound,
+            "elapsed": time.perf_counter() - t0, "schedule": sched}
+
+
+def _fmt_time(t):
+    return f"{int(t // 60):02d}:{int(t % 60):02d}"
+
+
+def print_schedule(inst, res):
+    """Programación por quirófano de un resultado de solve_one."""
+    print(f"=== {res['name']} ({res['formulation']}) ===")
+    print(f"Estado: {res['status']}  Objetivo: {res['objective']}  "
+          f"Cota: {res['bound']}  Tiempo: {res['elapsed']:.2f}s")
+    sched = res["schedule"]
+    if sched is None:
+        return
+    names = inst["procedure_names"]
+    for o in range(inst["m"]):
+        seq = sorted((sched["start"][i], i) for i in range(inst["n"]) if sched["room"][i] == o)
+        parts = [f"{names[i]}[{_fmt_time(s)}-{_fmt_time(s + inst['p'][i])}]" for s, i in seq]
+        print(f"  Quirófano {o}: " + (" ".join(parts) if parts else "-"))
+
+
+def _summary_row(res):
+    obj = f"{res['objective']:.2f}" if res["objective"] is not None else "-"
+    return (f"{res['name']:<16} {res['formulation']:<15} {res['status'][:28]:<28} "
+            f"{obj:>12} {res['elapsed']:>9.2f}")
+
+
+def cmd_solve(args):
+    for inst in _select(args):
+        res = solve_one(inst, args.formulation, args.time_limit, args.solver_path)
+        print_schedule(inst, res)
+        if args.validate and res["schedule"] is not None:
+            from validation import check, format_report, schedule_arrays
+            print(format_report(check(schedule_arrays(
+                res["schedule"], inst["p"], inst["w"], inst["d"], inst["m"],
+                inst["init"], inst["H"]))))
+
+
+def cmd_batch(args):
+    cases = _select(args)
+    tasks = [(inst, args.formulation, args.time_limit, args.solver_path) for inst in cases]
+    print(f"{'Instancia':<16} {'Formulación':<15} {'Estado':<28} {'Objetivo':>12} {'Tiempo(s)':>9}")
+    results = []
+    if args.jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            for res in pool.map(solve_one, *zip(*tasks)):
+                print(_summary_row(res), flush=True)
+                results.append(res)
+    else:
+        for task in tasks:
+            res = solve_one(*task)
+            print(_summary_row(res), flush=True)
+            results.append(res)
+
+    if args.out:
+        import json
+
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"Resultados guardados en {args.out}")
+
+
+def cmd_bench(args):
+    import benchmark
+
+    benchmark.main(args.extra)
+
+
+def cmd_generate(args):
+    import instances
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for inst in _select(args):
+        path = os.path.join(args.out_dir, f"{inst['name']}.json")
+        instances.save_instance(inst, path)
+        print(f"{path}: n={inst['n']}, m={inst['m']}")
+
+
+def _add_selection(p):
+    p.add_argument("instances", nargs="*", type=int,
+                   help="números de instancia (first/hosp) o tamaños n (gen)")
+    p.add_argument("--set", choices=["first", "hosp", "gen"], default="first")
+    p.add_argument("--sizes", nargs="+", type=int, default=[10, 20, 30, 40],
+                   help="tamaños para --set gen")
+    p.add_argument("--seed", type=int, default=0)
+
+
+def _add_solving(p):
+    p.add_argument("--file", nargs="+", default=None, help="instancias en JSON (generate)")
+    p.add_argument("--formulation", default="first",
+                   choices=MIP_FORMULATIONS + EXTRA_FORMULATIONS)
+    p.add_argument("--time-limit", type=int, default=120)
+    p.add_argument("--solver-path", default=os.environ.get("CBC_PATH"))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py",
+                                     description="Programación de cirugías electivas")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("solve", help="resolver una o más instancias y mostrar la programación")
+    _add_selection(p)
+    _add_solving(p)
+    p.add_argument("--validate", action="store_true", help="validar la solución")
+    p.set_defaults(func=cmd_solve)
+
+    p = sub.add_parser("batch", help="resolver un conjunto de instancias")
+    _add_selection(p)
+    _add_solving(p)
+    p.add_argument("--jobs", type=int, default=1)
+    p.add_argument("--out", default=None, help="JSON con los resultados")
+    p.set_defaults(func=cmd_batch)
+
+    # los argumentos que siguen se pasan tal cual a benchmark.py
+    p = sub.add_parser("bench", help="benchmark (argumentos de benchmark.py)",
+                       add_help=False)
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("generate", help="guardar instancias como JSON")
+    _add_selection(p)
+    p.add_argument("--out-dir", default="instancias")
+    p.set_defaults(func=cmd_generate)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "bench":
+        parser.error(f"argumentos no reconocidos: {' '.join(extra)}")
+    args.extra = extra
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Secuenciador exacto para un quirófano con la asignación ya fija.
+
+Minimiza sum(alpha*w_i*C_i + gamma*max(0, C_i - d_i)) partiendo en `ready`
+(init o la hora en que el quirófano queda libre). Como el objetivo no
+mejora dejando tiempos muertos, la cirugía que termina última en un
+subconjunto S termina en ready + p(S), y la programación dinámica es:
+
+    f(S) = min_{j en S} f(S - {j}) + costo_j(ready + p(S))
+
+Las cirugías idénticas (mismo p, w, d; p.ej. los "CL" o "AC" repetidos)
+se agrupan, así que el estado es un vector de cantidades por tipo y no un
+subconjunto. Los resultados se memorizan con la clave
+(multiconjunto de (p, w, d - ready), alpha, gamma): el orden óptimo no
+depende de ready cuando los deadlines se miden relativos a él, y el costo
+solo se traslada en alpha*ready*sum(w).
+"""
+
+import argparse
+from functools import lru_cache
+from itertools import product
+
+# Sobre este número de cirugías en un quirófano se usa la búsqueda local
+MAX_EXACT = 12
+
+
+@lru_cache(maxsize=100000)
+def _solve_types(types, counts, alpha, gamma):
+    """
+    DP sobre vectores de cantidades. types: tupla de (p, w, d_rel) distintos;
+    counts: cuántas cirugías de cada tipo. Retorna (costo, orden de tipos)
+    con ready = 0.
+    """
+    k = len(types)
+    # f[state] = (costo, tipo de la última, estado previo)
+    f = {tuple([0] * k): (0.0, None, None)}
+    states = sorted(product(*(range(c + 1) for c in counts)), key=sum)
+    for state in states[1:]:
+        t_end = sum(types[a][0] * state[a] for a in range(k))
+        best = None
+        for a in range(k):
+            if state[a] == 0:
+                continue
+            prev = state[:a] + (state[a] - 1,) + state[a + 1:]
+            p_a, w_a, d_a = types[a]
+            cost = f[prev][0] + alpha * w_a * t_end + gamma * max(0.0, t_end - d_a)
+            if best is None or cost < best[0] - 1e-9:
+                best = (cost, a, prev)
+        f[state] = best
+
+    order = []
+    state = tuple(counts)
+    while f[state][1] is not None:
+        order.append(f[state][1])
+        state = f[state][2]
+    order.reverse()
+    return f[tuple(counts)][0], tuple(order)
+
+
+def sequence_room(jobs, ready, p, w, d, alpha=0.5, gamma=0.5):
+    """
+    Orden óptimo de las cirugías `jobs` en un quirófano libre desde ready.
+    Retorna (costo, lista ordenada de cirugías).
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return 0.0, []
+    if len(jobs) > MAX_EXACT:
+        from heuristics import improve_sequences
+        from schedule import sequence_cost
+        seq = sorted(jobs, key=lambda j: -w[j] / p[j])
+        seq = improve_sequences([seq], [ready], p, w, d, alpha, gamma)[0]
+        return sequence_cost(seq, ready, p, w, d, alpha, gamma), seq
+
+    by_type = {}
+    for j in jobs:
+        by_type.setdefault((p[j], w[j], d[j] - ready), []).append(j)
+    types = tuple(sorted(by_type))
+    counts = tuple(len(by_type[t]) for t in types)
+
+    cost0, type_order = _solve_types(types, counts, float(alpha), float(gamma))
+    cost = cost0 + alpha * ready * sum(w[j] for j in jobs)
+
+    used = {t: 0 for t in types}
+    order = []
+    for a in type_order:
+        t = types[a]
+        order.append(by_type[t][used[t]])
+        used[t] += 1
+    return cost, order
+
+
+def sequence_rooms(seqs, ready, p, w, d, alpha=0.5, gamma=0.5):
+    """
+    Aplica sequence_room a cada quirófano. Retorna las nuevas secuencias.
+    """
+    return [sequence_room(seq, ready[o], p, w, d, alpha, gamma)[1]
+            for o, seq in enumerate(seqs)]
+
+
+def cache_info():
+    """Estadísticas de la memoria de resultados (hits, misses, tamaño)."""
+    return _solve_types.cache_info()
+
+
+def check_against_mip(instance_types=range(1, 11), solver_path=None, timeLimit=120,
+                      alpha=0.5, gamma=0.5):
+    """
+    Compara, en las instancias de FirstOptCode, el costo de secuenciación de
+    cada quirófano en la solución de CBC con el del DP para la misma
+    asignación. El DP nunca debe ser peor; si CBC probó optimalidad deben
+    coincidir (solve_instance usa los pesos por defecto de build_model, así
+    que con otros alpha/gamma solo vale lo primero).
+    """
+    from FirstOptCode import solve_instance
+    from schedule import room_sequences, schedule_from_result
+
+    rows = []
+    for k in instance_types:
+        result = solve_instance(k, solver_path=solver_path, timeLimit=timeLimit)
+        status, m = result[0], result[8]
+        p, w, d, init = result[9], result[10], result[11], result[13]
+        sched = schedule_from_result(result)
+
+        mip_cost = 0.0
+        dp_cost = 0.0
+        for seq in room_sequences(sched, m):
+            # costo real de la solución de CBC (con sus posibles tiempos muertos)
+            mip_cost += sum(alpha * w[j] * (sched["start"][j] + p[j])
+                            + gamma * max(0.0, sched["start"][j] + p[j] - d[j])
+                            for j in seq)
+            dp_cost += sequence_room(seq, init, p, w, d, alpha, gamma)[0]
+        rows.append((k, status, mip_cost, dp_cost))
+        print(f"Instancia {k}: {status}  MIP={mip_cost:.2f}  DP={dp_cost:.2f}  "
+              f"{'OK' if dp_cost <= mip_cost + 1e-6 else 'DP PEOR'}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validar el secuenciador DP contra CBC")
+    parser.add_argument("instances", nargs="*", type=int, default=list(range(1, 11)))
+    parser.add_argument("--time-limit", type=int, default=120)
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+    check_against_mip(args.instances, solver_path=args.solver_path, timeLimit=args.time_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+Algoritmo genético con modelo de islas para asignar y secuenciar cirugías.
+
+Codificación (arreglos numpy, un individuo por fila):
+    - rooms[k, i]: quirófano de la cirugía i;
+    - keys[k, i]: llave aleatoria en [0, 1); dentro de cada quirófano las
+      cirugías se ejecutan por llave creciente, sin tiempos muertos.
+Así cualquier individuo es factible y el fitness de toda la población se
+calcula de una vez (ordenar por quirófano + llave, suma acumulada de p por
+tramo de quirófano): alpha*w*C + gamma*retraso, más la ociosidad
+beta*(m*H - sum p), que es constante.
+
+Cada isla evoluciona su población en un proceso aparte (torneo, cruce
+uniforme, mutación de quirófano y de llaves, elitismo). Cada
+`migrate_every` generaciones las islas se sincronizan: los mejores de cada
+una reemplazan a los peores de la siguiente (anillo). El generador de cada
+isla viaja con su población, así que con la misma semilla y el mismo
+número de épocas el resultado es idéntico; el presupuesto de reloj solo se
+revisa entre épocas (max_epochs fija la cantidad).
+
+Uso:
+    python ga.py --set hosp 3 --budget 30 --islands 4
+    python ga.py --benchmark --budget 30     # 10 hospitales contra CBC
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+
+def _arrays(inst):
+    return (np.asarray(inst["p"], dtype=float), np.asarray(inst["w"], dtype=float),
+            np.asarray(inst["d"], dtype=float))
+
+
+def fitness(rooms, keys, p, w, d, init, alpha=0.5, gamma=0.5):
+    """
+    Costo alpha*w*C + gamma*retraso de cada individuo (sin la ociosidad).
+    rooms, keys: arreglos (población, n). Retorna arreglo (población,).
+    """
+    P, n = rooms.shape
+    order = np.argsort(rooms + keys, axis=1, kind="stable")
+    rows = np.arange(P)[:, None]
+    r_sorted = rooms[rows, order]
+    p_sorted = p[order]
+    cums = np.cumsum(p_sorted, axis=1)
+    # inicio de cada tramo (mismo quirófano) y lo acumulado antes de él
+    new_room = np.ones((P, n), dtype=bool)
+    new_room[:, 1:] = r_sorted[:, 1:] != r_sorted[:, :-1]
+    seg_start = np.maximum.accumulate(np.where(new_room, np.arange(n), 0), axis=1)
+    before = np.take_along_axis(cums - p_sorted, seg_start, axis=1)
+    C = init + cums - before
+    cost = alpha * w[order] * C + gamma * np.maximum(0.0, C - d[order])
+    return cost.sum(axis=1)
+
+
+def decode(rooms, keys, n, p, init, m):
+    """Schedule (room/start, ver schedule.py) de un individuo."""
+    from schedule import schedule_from_sequences
+
+    seqs = [[] for _ in range(m)]
+    for i in sorted(range(n), key=lambda i: (rooms[i], keys[i])):
+        seqs[int(rooms[i])].append(i)
+    return schedule_from_sequences(seqs, [init] * m, n, p)
+
+
+def encode(schedule, n, m):
+    """(rooms, keys) de un schedule: llaves según la hora de inicio."""
+    rooms = np.array([o if o is not None else 0 for o in schedule["room"]], dtype=np.int64)
+    starts = np.array([s if s is not None else 0.0 for s in schedule["start"]], dtype=float)
+    rank = np.argsort(np.argsort(starts, kind="stable"), kind="stable")
+    return rooms, (rank + 0.5) / n
+
+
+def _evolve(state, generations, inst, params):
+    """
+    Avanza una isla `generations` generaciones (se ejecuta en un proceso
+    aparte). state: (rooms, keys, estado del generador). Retorna el nuevo
+    state y el mejor costo.
+    """
+    rooms, keys, rng_state = state
+    rng = np.random.default_rng()
+    rng.bit_generator.state = rng_state
+    p, w, d = _arrays(inst)
+    init, m = inst["init"], inst["m"]
+    alpha, gamma = params["alpha"], params["gamma"]
+    P, n = rooms.shape
+    n_elite = max(1, int(params["elite"] * P))
+
+    cost = fitness(rooms, keys, p, w, d, init, alpha, gamma)
+    for _ in range(generations):
+        # torneo binario (vectorizado) para ambos padres
+        a, b = rng.integers(0, P, (2, P))
+        pa = np.where(cost[a] <= cost[b], a, b)
+        a, b = rng.integers(0, P, (2, P))
+        pb = np.where(cost[a] <= cost[b], a, b)
+
+        # cruce uniforme: el mismo gen toma quirófano y llave del mismo padre
+        mask = rng.random((P, n)) < 0.5
+        child_r = np.where(mask, rooms[pa], rooms[pb])
+        child_k = np.where(mask, keys[pa], keys[pb])
+
+        # mutación: cambiar de quirófano y perturbar llaves
+        mut = rng.random((P, n)) < params["room_rate"]
+        child_r = np.where(mut, rng.integers(0, m, (P, n)), child_r)
+        mut = rng.random((P, n)) < params["key_rate"]
+        child_k = np.where(mut, (child_k + rng.normal(0.0, 0.1, (P, n))) % 1.0, child_k)
+
+        child_cost = fitness(child_r, child_k, p, w, d, init, alpha, gamma)
+        # elitismo: los mejores de la generación anterior reemplazan a los peores hijos
+        elite = np.argsort(cost, kind="stable")[:n_elite]
+        worst = np.argsort(child_cost, kind="stable")[-n_elite:]
+        child_r[worst], child_k[worst] = rooms[elite], keys[elite]
+        child_cost[worst] = cost[elite]
+        rooms, keys, cost = child_r, child_k, child_cost
+
+    return (rooms, keys, rng.bit_generator.state), float(cost.min())
+
+
+def _migrate(states, inst, params):
+    """Anillo: los mejores de la isla k reemplazan a los peores de la k+1."""
+    p, w, d = _arrays(inst)
+    costs = [fitness(r, k, p, w, d, inst["init"], params["alpha"], params["gamma"])
+             for r, k, _ in states]
+    migrants = []
+    for (r, k, _), c in zip(states, costs):
+        best = np.argsort(c, kind="stable")[:params["migrants"]]
+        migrants.append((r[best].copy(), k[best].copy()))
+    for isl, ((r, k, _), c) in enumerate(zip(states, costs)):
+        mr, mk = migrants[isl - 1]
+        worst = np.argsort(c, kind="stable")[-len(mr):]
+        r[worst], k[worst] = mr, mk
+
+
+def run_ga(inst, time_budget=30, islands=4, pop_size=200, migrate_every=25,
+           migrants=4, elite=0.02, room_rate=None, key_rate=None, max_epochs=None,
+           alpha=0.5, beta=1.0, gamma=0.5, seed=0, seed_heuristic=True,
+           workers=None, verbose=False):
+    """
+    GA de islas sobre inst (dict de instances.py) con presupuesto de reloj.
+
+    Retorna dict con schedule, objective (objetivo del modelo, con la
+    ociosidad), cost (sin ella), epochs, generations, trajectory
+    (segundos, objetivo) y elapsed.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    t0 = time.perf_counter()
+    n, m, H, init = inst["n"], inst["m"], inst["H"], inst["init"]
+    p, w, d = _arrays(inst)
+    idle = beta * (m * H - p.sum())
+    params = {"alpha": alpha, "gamma": gamma, "elite": elite, "migrants": migrants,
+              "room_rate": room_rate if room_rate is not None else 1.0 / n,
+              "key_rate": key_rate if key_rate is not None else 2.0 / n}
+
+    # poblaciones iniciales: una semilla distinta por isla
+    seeds = np.random.SeedSequence(seed).spawn(islands)
+    states = []
+    for isl in range(islands):
+        rng = np.random.default_rng(seeds[isl])
+        rooms = rng.integers(0, m, (pop_size, n))
+        keys = rng.random((pop_size, n))
+        states.append((rooms, keys, rng.bit_generator.state))
+    if seed_heuristic:
+        from heuristics import heuristic_schedule
+
+        # sin búsqueda local (depende del reloj): greedy + DP es determinista
+        sched = heuristic_schedule(n, m, inst["p"], inst["w"], inst["d"], init,
+                                   alpha, gamma, time_budget=0)
+        for rooms, keys, _ in states:
+            rooms[0], keys[0] = encode(sched, n, m)
+
+    trajectory = []
+    epochs = 0
+    pool = ProcessPoolExecutor(max_workers=workers or islands) if islands > 1 else None
+    try:
+        while True:
+            if pool:
+                out = list(pool.map(_evolve, states, [migrate_every] * islands,
+                                    [inst] * islands, [params] * islands))
+            else:
+                out = [_evolve(s, migrate_every, inst, params) for s in states]
+            states = [s for s, _ in out]
+            epochs += 1
+            best = min(c for _, c in out) + idle
+            if not trajectory or best < trajectory[-1][1] - 1e-9:
+                trajectory.append((time.perf_counter() - t0, best))
+                if verbose:
+                    print(f"[{time.perf_counter() - t0:7.1f}s] época {epochs}: {best:.2f}")
+            if max_epochs is not None and epochs >= max_epochs:
+                break
+            # la próxima época debe caber en el presupuesto
+            per_epoch = (time.perf_counter() - t0) / epochs
+            if max_epochs is None and time.perf_counter() - t0 + per_epoch > time_budget:
+                break
+            if islands > 1:
+                _migrate(states, inst, params)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    best_cost, best_ind = None, None
+    for rooms, keys, _ in states:
+        costs = fitness(rooms, keys, p, w, d, init, alpha, gamma)
+        k = int(np.argmin(costs))
+        if best_cost is None or costs[k] < best_cost:
+            best_cost, best_ind = float(costs[k]), (rooms[k], keys[k])
+    return {"schedule": decode(*best_ind, n, inst["p"], init, m),
+            "objective": best_cost + idle, "cost": best_cost, "epochs": epochs,
+            "generations": epochs * migrate_every, "trajectory": trajectory,
+            "elapsed": time.perf_counter() - t0}
+
+
+def benchmark_hospitals(time_budget=30, islands=4, seed=0, solver_path=None):
+    """
+    GA contra CBC (build_model de FirstOptCode) con el mismo tiempo en los
+    10 hospitales de prueba2. Retorna la lista de filas.
+    """
+    import instances
+    from benchmark import run_case
+    from schedule import evaluate
+
+    rows = []
+    print(f"{'Instancia':<10} {'n':>3} {'m':>3} {'GA':>12} {'CBC':>12} "
+          f"{'Cota':>12} {'Estado CBC':<28}")
+    for inst in instances.hospital_instances(seed=seed):
+        ga = run_ga(inst, time_budget, islands=islands, seed=seed)
+        # el objetivo del schedule decodificado debe coincidir con el fitness
+        obj = evaluate(ga["schedule"], inst["p"], inst["w"], inst["d"], inst["H"],
+                       inst["m"])["objective"]
+        cbc = run_case(inst, "first", time_limit=time_budget, solver_path=solver_path)
+        row = {"case": inst["name"], "n": inst["n"], "m": inst["m"], "ga": obj,
+               "ga_s": ga["elapsed"], "cbc": cbc["objective"], "bound": cbc["bound"],
+               "cbc_result": cbc["cbc_result"], "cbc_s": cbc["solve_s"]}
+        rows.append(row)
+
+        def fmt(v):
+            return f"{v:.2f}" if v is not None else "-"
+        print(f"{row['case']:<10} {row['n']:>3} {row['m']:>3} {fmt(row['ga']):>12} "
+              f"{fmt(row['cbc']):>12} {fmt(row['bound']):>12} "
+              f"{(row['cbc_result'] or '-')[:28]:<28}", flush=True)
+    wins = sum(1 for r in rows if r["cbc"] is None or r["ga"] < r["cbc"] - 1e-6)
+    ties = sum(1 for r in rows if r["cbc"] is not None and abs(r["ga"] - r["cbc"]) <= 1e-6)
+    print(f"GA mejor en {wins}, empate en {ties}, de {len(rows)} instancias")
+    return rows
+
+
+def main(argv=None):
+    import instances
+
+    parser = argparse.ArgumentParser(description="Algoritmo genético con islas")
+    parser.add_argument("instance", type=int, nargs="?", default=1)
+    parser.add_argument("--set", choices=["first", "hosp", "gen"], default="hosp")
+    parser.add_argument("--n", type=int, default=100, help="tamaño para --set gen")
+    parser.add_argument("--budget", type=float, default=30)
+    parser.add_argument("--islands", type=int, default=4)
+    parser.add_argument("--pop-size", type=int, default=200)
+    parser.add_argument("--migrate-every", type=int, default=25)
+    parser.add_argument("--epochs", type=int, default=None,
+                        help="número fijo de épocas (ignora --budget)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--benchmark", action="store_true",
+                        help="los 10 hospitales contra CBC con el mismo tiempo")
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark_hospitals(args.budget, args.islands, args.seed, args.solver_path)
+        return
+    if args.set == "first":
+        inst = instances.first_instance(args.instance)
+    elif args.set == "hosp":
+        inst = instances.hospital_instance(args.instance)
+    else:
+        inst = instances.generate_instance(args.n, seed=args.seed)
+    res = run_ga(inst, args.budget, islands=args.islands, pop_size=args.pop_size,
+                 migrate_every=args.migrate_every, max_epochs=args.epochs,
+                 seed=args.seed, verbose=True)
+    print(f"{inst['name']}: objetivo {res['objective']:.2f} en {res['elapsed']:.1f}s "
+          f"({res['epochs']} épocas, {res['generations']} generaciones por isla)")
+
+
+if __name__ == "__main__":
+    main()
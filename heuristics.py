@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Heurísticas rápidas (sin MIP) para el problema de FirstOptCode:
+asignación y secuenciación de cirugías en quirófanos minimizando
+alpha*w*C + gamma*retraso (la ociosidad no depende de la programación
+mientras todas las cirugías queden asignadas).
+
+    - greedy_sequences: lista ordenada por WSPT (w/p) y cada cirugía al
+      quirófano donde agrega menos costo.
+    - improve_sequences: búsqueda local (mover y cambiar cirugías) con
+      presupuesto de tiempo.
+    - heuristic_schedule: ambas y al final el orden exacto de cada
+      quirófano con dp_sequencer.
+"""
+
+import time
+
+from schedule import schedule_from_sequences, sequence_cost
+
+
+def greedy_sequences(jobs, ready, p, w, d, alpha=0.5, gamma=0.5):
+    """
+    Asigna las cirugías `jobs` a los quirófanos disponibles desde ready[o].
+    Orden WSPT (mayor w/p primero, desempate por deadline) y cada una al
+    final del quirófano con menor costo marginal.
+    """
+    m = len(ready)
+    seqs = [[] for _ in range(m)]
+    t = list(ready)
+    for j in sorted(jobs, key=lambda j: (-w[j] / p[j], d[j])):
+        def marginal(o):
+            C = t[o] + p[j]
+            return alpha * w[j] * C + gamma * max(0.0, C - d[j])
+        o = min(range(m), key=marginal)
+        seqs[o].append(j)
+        t[o] += p[j]
+    return seqs
+
+
+def total_cost(seqs, ready, p, w, d, alpha=0.5, gamma=0.5):
+    return sum(sequence_cost(seq, ready[o], p, w, d, alpha, gamma)
+               for o, seq in enumerate(seqs))
+
+
+def improve_sequences(seqs, ready, p, w, d, alpha=0.5, gamma=0.5,
+                      time_budget=0.5, max_len=None):
+    """
+    Búsqueda local de primera mejora sobre las secuencias (se modifican en
+    sitio y se retornan). Movimientos:
+        - mover una cirugía a otra posición (mismo u otro quirófano)
+        - intercambiar dos cirugías de quirófanos distintos
+    max_len limita la cantidad de cirugías por quirófano (None = sin límite).
+    Se detiene al no encontrar mejoras o al agotar time_budget segundos.
+    """
+    t_end = time.perf_counter() + time_budget
+    m = len(seqs)
+    costs = [sequence_cost(seq, ready[o], p, w, d, alpha, gamma)
+             for o, seq in enumerate(seqs)]
+
+    def cost(o, seq):
+        return sequence_cost(seq, ready[o], p, w, d, alpha, gamma)
+
+    improved = True
+    while improved and time.perf_counter() < t_end:
+        improved = False
+        # Mover
+        for a in range(m):
+            for pos_a in range(len(seqs[a])):
+                j = seqs[a][pos_a]
+                rest_a = seqs[a][:pos_a] + seqs[a][pos_a + 1:]
+                cost_rest_a = cost(a, rest_a)
+                for b in range(m):
+                    base = seqs[b] if b != a else rest_a
+                    if b != a and max_len is not None and len(base) >= max_len:
+                        continue
+                    for pos_b in range(len(base) + 1):
+                        if b == a and pos_b == pos_a:
+                            continue
+                        new_b = base[:pos_b] + [j] + base[pos_b:]
+                        if b == a:
+                            delta = cost(a, new_b) - costs[a]
+                        else:
+                            delta = cost_rest_a + cost(b, new_b) - costs[a] - costs[b]
+                        if delta < -1e-9:
+                            if b == a:
+                                seqs[a] = new_b
+                                costs[a] = cost(a, new_b)
+                            else:
+                                seqs[a] = rest_a
+                                seqs[b] = new_b
+                                costs[a] = cost_rest_a
+                                costs[b] = cost(b, new_b)
+                            improved = True
+                            break
+                    if improved:
+                        break
+                if improved or time.perf_counter() > t_end:
+                    break
+            if improved or time.perf_counter() > t_end:
+                break
+        if improved:
+            continue
+        # Intercambiar entre quirófanos
+        for a in range(m):
+            for b in range(a + 1, m):
+                for pa in range(len(seqs[a])):
+                    for pb in range(len(seqs[b])):
+                        new_a = list(seqs[a])
+                        new_b = list(seqs[b])
+                        new_a[pa], new_b[pb] = seqs[b][pb], seqs[a][pa]
+                        ca, cb = cost(a, new_a), cost(b, new_b)
+                        if ca + cb < costs[a] + costs[b] - 1e-9:
+                            seqs[a], seqs[b] = new_a, new_b
+                            costs[a], costs[b] = ca, cb
+                            improved = True
+                            break
+                    if improved:
+                        break
+                if improved or time.perf_counter() > t_end:
+                    break
+            if improved or time.perf_counter() > t_end:
+                break
+    return seqs
+
+
+def heuristic_schedule(n, m, p, w, d, init, alpha=0.5, gamma=0.5, time_budget=0.5):
+    """
+    Schedule completo de una instancia (todos los quirófanos desde init)
+    con greedy + búsqueda local.
+    """
+    from dp_sequencer import sequence_rooms
+
+    ready = [init] * m
+    seqs = greedy_sequences(range(n), ready, p, w, d, alpha, gamma)
+    seqs = improve_sequences(seqs, ready, p, w, d, alpha, gamma, time_budget)
+    # orden exacto dentro de cada quirófano
+    seqs = sequence_rooms(seqs, ready, p, w, d, alpha, gamma)
+    return schedule_from_sequences(seqs, ready, n, p)
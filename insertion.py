@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Inserción de cirugías no electivas (urgencias) en la programación vigente.
+
+Para una cirugía nueva se evalúan todos los huecos (quirófano, posición)
+posteriores a lo que ya comenzó. Insertar en una posición empuja a las
+cirugías siguientes solo lo necesario (los tiempos muertos absorben parte
+del corrimiento), y el costo se calcula de forma incremental: costo propio
+de la urgencia + aumento de alpha*w*C + gamma*retraso de las cirugías
+corridas. Se elige la inserción más barata que respete el límite de
+horario (si se indica).
+
+Una urgencia es un dict: {"p": duración, "w": prioridad, "d": deadline,
+"name": nombre (opcional)}.
+"""
+
+from schedule import room_sequences
+
+
+def _room_insertions(seq, start, p, w, d, case, now, alpha, gamma, end_limit):
+    """
+    Evalúa todas las posiciones de un quirófano. Genera tuplas
+    (delta, posición, inicio_urgencia, corrimientos) factibles.
+    """
+    # primera posición permitida: después de lo que ya comenzó
+    first = 0
+    prev_end = now
+    while first < len(seq) and start[seq[first]] < now:
+        prev_end = max(prev_end, start[seq[first]] + p[seq[first]])
+        first += 1
+
+    for pos in range(first, len(seq) + 1):
+        if pos > first:
+            j = seq[pos - 1]
+            prev_end = max(now, start[j] + p[j])
+        s_new = prev_end
+        C_new = s_new + case["p"]
+        delta = alpha * case["w"] * C_new + gamma * max(0.0, C_new - case["d"])
+
+        shifts = {}
+        t = C_new
+        last_end = C_new
+        for j in seq[pos:]:
+            shift = max(0.0, t - start[j])
+            if shift <= 0:
+                # el hueco absorbe el corrimiento: el resto no cambia
+                last_end = None
+                break
+            C_old = start[j] + p[j]
+            C = C_old + shift
+            delta += alpha * w[j] * shift
+            delta += gamma * (max(0.0, C - d[j]) - max(0.0, C_old - d[j]))
+            shifts[j] = shift
+            t = C
+            last_end = C
+        if end_limit is not None:
+            room_end = last_end if last_end is not None else (
+                max(start[j] + p[j] for j in seq) if seq else C_new)
+            if max(room_end, C_new) > end_limit:
+                continue
+        yield delta, pos, s_new, shifts
+
+
+def best_insertions(schedule, p, w, d, m, case, now, end_limit=None,
+                    alpha=0.5, gamma=0.5, k=2):
+    """
+    Las k inserciones más baratas de la urgencia, ordenadas por costo.
+    Cada una es un dict con room, position, start, delta y shifts
+    (cirugía -> minutos que se atrasa).
+    """
+    seqs = room_sequences(schedule, m)
+    start = schedule["start"]
+    found = []
+    for o in range(m):
+        for delta, pos, s_new, shifts in _room_insertions(
+                seqs[o], start, p, w, d, case, now, alpha, gamma, end_limit):
+            found.append({"room": o, "position": pos, "start": s_new,
+                          "delta": delta, "shifts": shifts})
+    found.sort(key=lambda ins: ins["delta"])
+    return found[:k]
+
+
+def apply_insertion(schedule, p, w, d, case, ins):
+    """
+    Retorna (schedule, p, w, d) nuevos con la urgencia agregada al final
+    (índice n) y las cirugías corridas según ins["shifts"].
+    """
+    room = list(schedule["room"]) + [ins["room"]]
+    start = list(schedule["start"]) + [ins["start"]]
+    for j, shift in ins["shifts"].items():
+        start[j] += shift
+    return ({"room": room, "start": start},
+            list(p) + [case["p"]], list(w) + [case["w"]], list(d) + [case["d"]])
+
+
+def insert_case(schedule, p, w, d, m, case, now, end_limit=None,
+                alpha=0.5, gamma=0.5):
+    """
+    Inserta una urgencia en el hueco más barato.
+    Retorna (inserción, schedule, p, w, d) o None si no hay hueco factible.
+    """
+    best = best_insertions(schedule, p, w, d, m, case, now, end_limit,
+                           alpha, gamma, k=1)
+    if not best:
+        return None
+    return (best[0],) + apply_insertion(schedule, p, w, d, case, best[0])
+
+
+def insert_cases(schedule, p, w, d, m, cases, now, end_limit=None,
+                 alpha=0.5, gamma=0.5):
+    """
+    Inserta varias urgencias. En cada paso se inserta la de mayor
+    arrepentimiento (diferencia entre su segunda y su primera mejor
+    inserción): la que más perdería si se le quitara su mejor hueco.
+
+    Retorna (inserciones, schedule, p, w, d, no_insertadas). Cada inserción
+    trae además "case" (posición en la lista de entrada) e "index" (índice
+    de la cirugía en el schedule resultante).
+    """
+    pending = list(range(len(cases)))
+    done = []
+    rejected = []
+    while pending:
+        choice = None
+        for c in pending:
+            opts = best_insertions(schedule, p, w, d, m, cases[c], now,
+                                   end_limit, alpha, gamma, k=2)
+            if not opts:
+                continue
+            regret = (opts[1]["delta"] - opts[0]["delta"]) if len(opts) > 1 else float("inf")
+            if choice is None or regret > choice[0]:
+                choice = (regret, c, opts[0])
+        if choice is None:
+            rejected.extend(pending)
+            break
+        _, c, ins = choice
+        schedule, p, w, d = apply_insertion(schedule, p, w, d, cases[c], ins)
+        ins = dict(ins, case=c, index=len(p) - 1)
+        done.append(ins)
+        pending.remove(c)
+    return done, schedule, p, w, d, rejected
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Carga de instancias en un formato común (diccionario) para que el benchmark
+y el resto de herramientas puedan tratar igual las 10 instancias de
+FirstOptCode, los 10 hospitales de prueba2 y las instancias generadas.
+
+Cada instancia es un dict con las claves:
+    name, n, m, p, w, d, procedure_names, init, H
+"""
+
+import random
+
+
+def make_instance(name, n, m, p, w, d, procedure_names, init, H):
+    """
+    Arma el diccionario de una instancia.
+    """
+    return {
+        "name": name,
+        "n": n,
+        "m": m,
+        "p": list(p),
+        "w": list(w),
+        "d": list(d),
+        "procedure_names": list(procedure_names),
+        "init": init,
+        "H": H,
+    }
+
+
+def instance_args(inst):
+    """
+    Devuelve la tupla (n, m, p, w, d, procedure_names, init, H) lista para
+    pasarla a FirstOptCode.build_model(*instance_args(inst)).
+    """
+    return (inst["n"], inst["m"], inst["p"], inst["w"], inst["d"],
+            inst["procedure_names"], inst["init"], inst["H"])
+
+
+def first_instance(instance_type):
+    """
+    Instancia fija de FirstOptCode (1..10).
+    """
+    from FirstOptCode import generate_instance_data
+
+    data = generate_instance_data(instance_type)
+    return make_instance(f"first-{instance_type}", *data)
+
+
+def hospital_instance(instance_type, seed=0):
+    """
+    Instancia de hospital de prueba2 (1..10). Como prueba2 sortea los
+    procedimientos con el módulo random, se fija la semilla para que la
+    instancia sea reproducible (sin alterar el estado global de random).
+
+    En prueba2 el deadline está en minutos desde el inicio de la jornada,
+    por lo que se usa init=0 y H=deadline del hospital.
+    """
+    import prueba2
+
+    hospital_data = prueba2.get_hospital_instances_from_report()
+    procedures = prueba2.generate_procedure_selection()
+    percentages = prueba2.get_procedure_percentages()
+
+    state = random.getstate()
+    try:
+        random.seed(seed * 1000 + instance_type)
+        n, m, p, w, d, procedure_names = prueba2.generate_instance_data(
+            instance_type, hospital_data, procedures, percentages
+        )
+    finally:
+        random.setstate(state)
+
+    H = hospital_data[instance_type - 1]["deadline"]
+    return make_instance(f"hosp-{instance_type}", n, m, p, w, d,
+                         procedure_names, 0, H)
+
+
+def generate_instance(n, m=None, seed=0, init=8*60, H=600):
+    """
+    Genera una instancia aleatoria de tamaño n (y m quirófanos) con la mezcla
+    de procedimientos de prueba2 y deadlines escalonados como en FirstOptCode
+    (init + 6h, 9h, 12h o 15h).
+    """
+    import prueba2
+
+    if m is None:
+        m = max(2, n // 2)
+    rng = random.Random(seed)
+    procedures = prueba2.generate_procedure_selection()
+    percentages = prueba2.get_procedure_percentages()
+    weights = [percentages[proc["nombre"]] for proc in procedures]
+
+    selected = rng.choices(procedures, weights=weights, k=n)
+    p = [rng.randint(*proc["duracion"]) for proc in selected]
+    w = [proc["prioridad"] for proc in selected]
+    d = [init + rng.choice((6, 9, 12, 15)) * 60 for _ in selected]
+    procedure_names = [proc["nombre"] for proc in selected]
+
+    return make_instance(f"gen-n{n}-m{m}-s{seed}", n, m, p, w, d,
+                         procedure_names, init, H)
+
+
+def first_instances():
+    """Las 10 instancias de FirstOptCode."""
+    return [first_instance(k) for k in range(1, 11)]
+
+
+def hospital_instances(seed=0):
+    """Las 10 instancias de hospitales de prueba2."""
+    return [hospital_instance(k, seed=seed) for k in range(1, 11)]
+
+
+def generated_instances(sizes=(10, 20, 30, 40), seed=0):
+    """Instancias generadas de n creciente."""
+    return [generate_instance(n, seed=seed) for n in sizes]
+
+
+def save_instance(inst, path):
+    """Guarda la instancia como JSON."""
+    import json
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(inst, f, ensure_ascii=False, indent=1)
+
+
+def load_instance(path):
+    """Lee una instancia guardada con save_instance."""
+    import json
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return make_instance(data["name"], data["n"], data["m"], data["p"], data["w"],
+                         data["d"], data["procedure_names"], data["init"], data["H"])
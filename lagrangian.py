@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Relajación lagrangiana de la restricción (1) de build_model (cada cirugía
+a un quirófano) con multiplicadores lam[i].
+
+Sin (1) el modelo se separa en un problema por quirófano: elegir qué
+cirugías hace y en qué orden, pagando alpha*w*C + gamma*retraso y
+cobrando lam[i] + beta*p[i] por cada cirugía que toma (la ociosidad
+H - trabajo pasa a ser lineal en x). Con v_o el óptimo del quirófano o,
+
+    L(lam) = beta*m*H + sum(lam) + sum_o v_o
+
+es una cota inferior del objetivo de build_model para cualquier lam.
+
+Subproblema de cada quirófano (libre desde ready[o]):
+    - "exact": programación dinámica sobre vectores de cantidades por tipo
+      de cirugía (como dp_sequencer; los "CL", "AC" repetidos son un solo
+      tipo). La tabla f(estado) = mejor costo de secuenciar ese
+      multiconjunto no depende de lam, así que se calcula una sola vez (en
+      paralelo, una por quirófano distinto) y en cada iteración basta
+      restar los cobros: de cada tipo se toman las cirugías de mayor lam.
+    - "wspt": si hay demasiados estados, una cota del subproblema: el costo
+      alpha*w*C se minimiza en orden WSPT para cualquier subconjunto y el
+      retraso se acota por max(0, ready + p - d); la selección es una DP
+      sobre el tiempo acumulado. Sigue siendo una cota válida, más débil.
+
+Los multiplicadores se actualizan por subgradiente (paso de Polyak,
+g_i = 1 - sum_o x_io) y cada pocas iteraciones la heurística lagrangiana
+repara la solución dual: las cirugías elegidas se reparten sin repetir,
+las que faltan se insertan por lam decreciente donde cuestan menos y se
+termina con búsqueda local y el DP por quirófano.
+
+Uso:
+    python lagrangian.py 4 --budget 30
+    python lagrangian.py --set hosp 3 --workers 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+# Sobre este número de estados se usa la cota "wspt"
+MAX_STATES = 2000000
+
+
+def _types(n, p, w, d):
+    """Tipos de cirugía (p, w, d) distintos y las cirugías de cada uno."""
+    by_type = {}
+    for j in range(n):
+        by_type.setdefault((p[j], w[j], d[j]), []).append(j)
+    types = sorted(by_type)
+    return types, [by_type[t] for t in types]
+
+
+def n_states(groups):
+    out = 1
+    for jobs in groups:
+        out *= len(jobs) + 1
+    return out
+
+
+def _exact_table(types, counts, ready, alpha, gamma):
+    """
+    f[idx]: mejor costo de secuenciar (sin tiempos muertos, desde ready) el
+    multiconjunto con índice idx (base mixta, counts[a] + 1 por tipo).
+    Se calcula por capas de cantidad total. Retorna (f, cantidades (k, S)).
+    Se ejecuta en un proceso aparte.
+    """
+    k = len(types)
+    radix = np.ones(k, dtype=np.int64)
+    for a in range(1, k):
+        radix[a] = radix[a - 1] * (counts[a - 1] + 1)
+    size = int(radix[-1] * (counts[-1] + 1))
+    idx = np.arange(size, dtype=np.int64)
+    state = np.stack([(idx // radix[a]) % (counts[a] + 1) for a in range(k)]).astype(np.int8)
+    tp = ready + sum(types[a][0] * state[a].astype(np.int64) for a in range(k))
+    layer = state.sum(axis=0, dtype=np.int64)
+
+    f = np.full(size, np.inf)
+    f[0] = 0.0
+    for L in range(1, int(layer.max()) + 1):
+        sel = np.nonzero(layer == L)[0]
+        t = tp[sel]
+        best = np.full(len(sel), np.inf)
+        for a in range(k):
+            p_a, w_a, d_a = types[a]
+            ok = state[a, sel] > 0
+            cand = f[sel[ok] - radix[a]] + alpha * w_a * t[ok] + gamma * np.maximum(0.0, t[ok] - d_a)
+            best[ok] = np.minimum(best[ok], cand)
+        f[sel] = best
+    return f, state
+
+
+def _exact_value(table, groups, profit):
+    """Óptimo del subproblema con la tabla exacta: (valor, cirugías elegidas)."""
+    f, state = table
+    vals = f.copy()
+    ranked = []
+    for a, jobs in enumerate(groups):
+        jobs = sorted(jobs, key=lambda j: -profit[j])
+        prefix = np.concatenate(([0.0], np.cumsum([profit[j] for j in jobs])))
+        vals -= prefix[state[a]]
+        ranked.append(jobs)
+    best = int(np.argmin(vals))
+    chosen = [j for a, jobs in enumerate(ranked) for j in jobs[:int(state[a, best])]]
+    return float(vals[best]), chosen
+
+
+def _wspt_value(ready, n, p, w, d, profit, alpha, gamma):
+    """
+    Cota del subproblema: DP sobre el tiempo acumulado con las cirugías en
+    orden WSPT. Retorna (valor, cirugías elegidas).
+    """
+    order = sorted(range(n), key=lambda j: (-w[j] / p[j], d[j]))
+    T = int(round(sum(p)))
+    g = np.full(T + 1, np.inf)
+    g[0] = 0.0
+    taken = np.zeros((n, T + 1), dtype=bool)
+    tau = np.arange(T + 1)
+    for pos, j in enumerate(order):
+        pj = int(round(p[j]))
+        late = gamma * max(0.0, ready + p[j] - d[j])
+        cand = g[:T + 1 - pj] + alpha * w[j] * (ready + tau[pj:]) + late - profit[j]
+        better = cand < g[pj:] - 1e-12
+        g[pj:] = np.where(better, cand, g[pj:])
+        taken[pos, pj:] = better
+    # reconstruir hacia atrás
+    t = int(np.argmin(g))
+    value = float(g[t])
+    chosen = []
+    for pos in range(n - 1, -1, -1):
+        if taken[pos, t]:
+            j = order[pos]
+            chosen.append(j)
+            t -= int(round(p[j]))
+    return value, chosen
+
+
+def _repair(chosen, lam, ready, n, p, w, d, alpha, gamma, ls_budget):
+    """Heurística lagrangiana: schedule factible (secuencias) desde la solución dual."""
+    from dp_sequencer import sequence_rooms
+    from heuristics import improve_sequences
+
+    m = len(ready)
+    seqs = [[] for _ in range(m)]
+    assigned = set()
+    for o in sorted(range(m), key=lambda o: ready[o]):
+        for j in chosen[o]:
+            if j not in assigned:
+                seqs[o].append(j)
+                assigned.add(j)
+    seqs = sequence_rooms(seqs, ready, p, w, d, alpha, gamma)
+    t = [ready[o] + sum(p[j] for j in seqs[o]) for o in range(m)]
+    # las que faltan: primero las que más "cuesta" dejar fuera
+    for j in sorted((j for j in range(n) if j not in assigned), key=lambda j: -lam[j]):
+        def marginal(o):
+            C = t[o] + p[j]
+            return alpha * w[j] * C + gamma * max(0.0, C - d[j])
+        o = min(range(m), key=marginal)
+        seqs[o].append(j)
+        t[o] += p[j]
+    seqs = improve_sequences(seqs, ready, p, w, d, alpha, gamma, ls_budget)
+    return sequence_rooms(seqs, ready, p, w, d, alpha, gamma)
+
+
+def solve_lagrangian(inst, time_budget=60, max_iter=500, room_ready=None,
+                     alpha=0.5, beta=1.0, gamma=0.5, theta=2.0, patience=10,
+                     heur_every=5, ls_budget=0.05, rel_gap=1e-6, mode=None,
+                     workers=1, verbose=False):
+    """
+    Subgradiente sobre inst (dict de instances.py).
+
+    mode: "exact", "wspt" o None (exact si caben MAX_STATES estados).
+    Retorna dict con bound, objective (incumbente, objetivo del modelo),
+    gap, schedule, lam, mode, history (lista de dicts iter, time, L,
+    bound, objective, gap por iteración) y elapsed.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from cbc_log import compute_gap
+    from heuristics import heuristic_schedule, total_cost
+    from schedule import room_sequences, schedule_from_sequences
+
+    t0 = time.perf_counter()
+    n, m, p, w, d = inst["n"], inst["m"], inst["p"], inst["w"], inst["d"]
+    init, H = inst["init"], inst["H"]
+    ready = list(room_ready) if room_ready is not None else [init] * m
+    const = beta * m * H
+
+    types, groups = _types(n, p, w, d)
+    if mode is None:
+        mode = "exact" if n_states(groups) <= MAX_STATES else "wspt"
+    # quirófanos con la misma hora de inicio tienen el mismo subproblema
+    distinct = sorted(set(ready))
+
+    tables = {}
+    if mode == "exact":
+        counts = [len(jobs) for jobs in groups]
+        args = [(types, counts, r, alpha, gamma) for r in distinct]
+        if workers > 1 and len(distinct) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                out = list(pool.map(_exact_table, *zip(*args)))
+        else:
+            out = [_exact_table(*a) for a in args]
+        tables = dict(zip(distinct, out))
+
+    # incumbente inicial y multiplicadores: costo de cada cirugía sola
+    seqs = room_sequences(heuristic_schedule(n, m, p, w, d, init, alpha, gamma), m)
+    if room_ready is not None:
+        seqs = _repair([[] for _ in range(m)], [0.0] * n, ready, n, p, w, d,
+                       alpha, gamma, ls_budget)
+    idle = const - beta * sum(p)
+    best_obj = total_cost(seqs, ready, p, w, d, alpha, gamma) + idle
+    best_seqs = seqs
+    lam = np.array([alpha * w[j] * (init + p[j]) + gamma * max(0.0, init + p[j] - d[j])
+                    - beta * p[j] for j in range(n)])
+
+    best_bound = -np.inf
+    best_lam = lam.copy()
+    history = []
+    stall = 0
+    pool = ProcessPoolExecutor(max_workers=workers) if (
+        workers > 1 and mode == "wspt" and len(distinct) > 1) else None
+    try:
+        for it in range(1, max_iter + 1):
+            profit = lam + beta * np.asarray(p, dtype=float)
+            if mode == "exact":
+                sub = {r: _exact_value(tables[r], groups, profit) for r in distinct}
+            elif pool:
+                out = pool.map(_wspt_value, distinct, *zip(*[(n, p, w, d, profit, alpha, gamma)]
+                                                             * len(distinct)))
+                sub = dict(zip(distinct, out))
+            else:
+                sub = {r: _wspt_value(r, n, p, w, d, profit, alpha, gamma) for r in distinct}
+
+            L = const + lam.sum() + sum(sub[r][0] for r in ready)
+            chosen = [sub[r][1] for r in ready]
+            count = np.zeros(n)
+            for jobs in chosen:
+                count[jobs] += 1
+            g = 1.0 - count
+
+            if L > best_bound + 1e-9:
+                best_bound, best_lam, stall = L, lam.copy(), 0
+            else:
+                stall += 1
+                if stall >= patience:
+                    theta, stall = theta / 2, 0
+
+            if it % heur_every == 1 or not g.any():
+                cand = _repair(chosen, lam, ready, n, p, w, d, alpha, gamma, ls_budget)
+                obj = total_cost(cand, ready, p, w, d, alpha, gamma) + idle
+                if obj < best_obj - 1e-9:
+                    best_obj, best_seqs = obj, cand
+
+            gap = compute_gap(best_obj, best_bound)
+            history.append({"iter": it, "time": time.perf_counter() - t0, "L": L,
+                            "bound": best_bound, "objective": best_obj, "gap": gap})
+            if verbose:
+                print(f"{it:>4} {time.perf_counter() - t0:7.1f}s  L={L:12.2f}  "
+                      f"cota={best_bound:12.2f}  incumbente={best_obj:12.2f}  "
+                      f"gap={100 * gap:6.2f}%")
+
+            norm = float(g @ g)
+            if (norm == 0 or gap <= rel_gap or theta < 1e-4
+                    or time.perf_counter() - t0 > time_budget):
+                break
+            lam = lam + theta * (best_obj - L) / norm * g
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return {"bound": best_bound, "objective": best_obj,
+            "gap": compute_gap(best_obj, best_bound),
+            "schedule": schedule_from_sequences(best_seqs, ready, n, p),
+            "lam": best_lam.tolist(), "mode": mode, "history": history,
+            "elapsed": time.perf_counter() - t0}
+
+
+def main(argv=None):
+    import instances
+
+    parser = argparse.ArgumentParser(description="Relajación lagrangiana por quirófano")
+    parser.add_argument("instance", type=int, nargs="?", default=1)
+    parser.add_argument("--set", choices=["first", "hosp", "gen"], default="first")
+    parser.add_argument("--n", type=int, default=40, help="tamaño para --set gen")
+    parser.add_argument("--budget", type=float, default=60)
+    parser.add_argument("--max-iter", type=int, default=500)
+    parser.add_argument("--mode", choices=["exact", "wspt"], default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.set == "first":
+        inst = instances.first_instance(args.instance)
+    elif args.set == "hosp":
+        inst = instances.hospital_instance(args.instance)
+    else:
+        inst = instances.generate_instance(args.n, seed=args.seed)
+    res = solve_lagrangian(inst, args.budget, args.max_iter, mode=args.mode,
+                           workers=args.workers, verbose=True)
+    print(f"{inst['name']} ({res['mode']}): cota {res['bound']:.2f}  incumbente "
+          f"{res['objective']:.2f}  gap {100 * res['gap']:.2f}%  en {res['elapsed']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
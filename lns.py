@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Large Neighborhood Search con sub-MIPs pequeños de build_model.
+
+Se parte de un schedule factible (por defecto heuristics.heuristic_schedule)
+y en cada iteración se destruye una parte y se reoptimiza solo esa parte
+con build_model, donde n y m son las cirugías y quirófanos destruidos:
+    - "rooms2" / "rooms3": todas las cirugías de 2 o 3 quirófanos (uno
+      de ellos puede estar vacío, para pasarle trabajo);
+    - "tails": la cola (desde un instante t) de 3 o 4 quirófanos; lo
+      anterior queda fijo y los quirófanos se liberan al terminar lo fijo
+      (room_ready).
+El sub-MIP parte desde la solución actual (warmStart), así que no empeora;
+después se compactan los tiempos y se reordena cada quirófano con el DP.
+
+Varias reparaciones corren en paralelo (procesos), siempre sobre
+quirófanos distintos, así que sus resultados no chocan. La elección del
+vecindario es adaptativa (ALNS): cada uno tiene un peso que sube si sus
+reparaciones mejoran por segundo de cómputo.
+
+Como el objetivo es separable por quirófano (la ociosidad es constante),
+se puede mejorar schedules de cientos de cirugías que el modelo completo
+ni siquiera alcanza a construir.
+
+Uso:
+    python lns.py --set gen --n 300 --budget 120 --workers 4
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from heuristics import total_cost
+from schedule import room_sequences, schedule_from_sequences
+
+NEIGHBORHOODS = ("rooms2", "rooms3", "tails")
+
+
+def _repair(jobs, rooms, ready, seqs, p, w, d, init, H, alpha, beta, gamma,
+            time_limit, solver_path):
+    """
+    Sub-MIP sobre las cirugías `jobs` en los quirófanos `rooms` (libres
+    desde ready[k]). seqs: secuencias actuales (índices globales) por
+    quirófano destruido, usadas como warm start. Retorna las nuevas
+    secuencias (índices globales) o None. Se ejecuta en un proceso aparte.
+    """
+    from pulp import value
+    from FirstOptCode import build_model, get_solver, set_initial_solution
+
+    k, r = len(jobs), len(rooms)
+    local = {j: a for a, j in enumerate(jobs)}
+    pp = [p[j] for j in jobs]
+    dd = [d[j] for j in jobs]
+    prob, x, z, S_i, C_i, u, O_total = build_model(
+        k, r, pp, [w[j] for j in jobs], dd, [str(j) for j in jobs], init, H,
+        alpha=alpha, beta=beta, gamma=gamma, room_ready=ready, verbose=False)
+    warm = schedule_from_sequences([[local[j] for j in seq] for seq in seqs], ready, k, pp)
+    set_initial_solution(x, z, S_i, C_i, u, warm, pp, dd)
+
+    prob.solve(get_solver(solver_path, timeLimit=max(1, int(time_limit)), msg=False,
+                          warmStart=True, threads=1))
+    if prob.sol_status not in (1, 2):
+        return None
+    new = [[] for _ in range(r)]
+    for a, j in enumerate(jobs):
+        o = max(range(r), key=lambda o: value(x[a][o]) or 0)
+        new[o].append((value(S_i[a]), j))
+    return [[j for _, j in sorted(seq)] for seq in new]
+
+
+def _destroy(kind, seqs, free_rooms, rng, p, init, max_jobs):
+    """
+    Elige la parte a destruir entre los quirófanos libres (sin reparación
+    en curso). Retorna (rooms, prefixes, tails, ready) o None.
+    prefixes[k]: lo que queda fijo; tails[k]: lo que se reoptimiza.
+    """
+    n_rooms = {"rooms2": 2, "rooms3": 3, "tails": rng.choice((3, 4))}[kind]
+    candidates = [o for o in free_rooms if seqs[o]]
+    # los quirófanos vacíos son equivalentes: uno de ellos puede entrar al
+    # sorteo, para que la reparación pueda pasarle trabajo
+    empty = [o for o in free_rooms if not seqs[o]]
+    if empty:
+        candidates.append(rng.choice(empty))
+    if len(candidates) < 2:
+        return None
+    # n_rooms quirófanos distintos al azar entre los libres con cirugías y
+    # a lo más uno vacío
+    rooms = rng.sample(candidates, min(n_rooms, len(candidates)))
+
+    if kind == "tails":
+        # cortar en un instante común: lo que empieza antes queda fijo
+        horizon = max(init + sum(p[j] for j in seqs[o]) for o in rooms)
+        cut = rng.uniform(init, horizon)
+        prefixes, tails, ready = [], [], []
+        for o in rooms:
+            t, pos = init, 0
+            while pos < len(seqs[o]) and t < cut:
+                t += p[seqs[o][pos]]
+                pos += 1
+            prefixes.append(seqs[o][:pos])
+            tails.append(seqs[o][pos:])
+            ready.append(t)
+    else:
+        prefixes = [[] for _ in rooms]
+        tails = [list(seqs[o]) for o in rooms]
+        ready = [init] * len(rooms)
+
+    # limitar el tamaño del sub-MIP recortando las colas por el principio
+    while sum(len(t) for t in tails) > max_jobs:
+        k = max(range(len(rooms)), key=lambda k: len(tails[k]))
+        j = tails[k].pop(0)
+        prefixes[k].append(j)
+        ready[k] += p[j]
+    if sum(len(t) for t in tails) < 2:
+        return None
+    return rooms, prefixes, tails, ready
+
+
+def run_lns(inst, schedule=None, time_budget=60, workers=1, sub_time_limit=5,
+            max_jobs=14, alpha=0.5, beta=1.0, gamma=0.5, reaction=0.3, seed=0,
+            solver_path=None, verbose=False):
+    """
+    LNS sobre inst (dict de instances.py) desde schedule (o la heurística).
+
+    Retorna dict con schedule, objective (costo alpha*wC + gamma*retraso,
+    sin la ociosidad constante), initial, trajectory (segundos, costo),
+    stats por vecindario (intentos, mejoras, peso) y elapsed.
+    """
+    from dp_sequencer import sequence_rooms
+    from heuristics import heuristic_schedule
+
+    t0 = time.perf_counter()
+    rng = random.Random(seed)
+    n, m, p, w, d = inst["n"], inst["m"], inst["p"], inst["w"], inst["d"]
+    init, H = inst["init"], inst["H"]
+    if schedule is None:
+        schedule = heuristic_schedule(n, m, p, w, d, init, alpha, gamma)
+    seqs = room_sequences(schedule, m)
+    ready0 = [init] * m
+    seqs = sequence_rooms(seqs, ready0, p, w, d, alpha, gamma)
+
+    cost = total_cost(seqs, ready0, p, w, d, alpha, gamma)
+    initial = cost
+    trajectory = [(time.perf_counter() - t0, cost)]
+    weights = {k: 1.0 for k in NEIGHBORHOODS}
+    stats = {k: {"tries": 0, "improved": 0} for k in NEIGHBORHOODS}
+    busy = set()
+    t_end = t0 + time_budget
+
+    def launch(pool, running):
+        # un vecindario puede no aplicar (p.ej. colas vacías): reintentar
+        free = [o for o in range(m) if o not in busy]
+        for _ in range(20):
+            kind = rng.choices(NEIGHBORHOODS, [weights[k] for k in NEIGHBORHOODS])[0]
+            part = _destroy(kind, seqs, free, rng, p, init, max_jobs)
+            if part is not None:
+                break
+        else:
+            return False
+        rooms, prefixes, tails, ready = part
+        jobs = [j for t in tails for j in t]
+        left = t_end - time.perf_counter()
+        args = (jobs, rooms, ready, tails, p, w, d, init, H, alpha, beta, gamma,
+                min(sub_time_limit, left), solver_path)
+        fut = pool.submit(_repair, *args) if pool else None
+        running[fut if pool else len(running)] = (kind, rooms, prefixes, ready,
+                                                  time.perf_counter(), args)
+        busy.update(rooms)
+        return True
+
+    def finish(key, result):
+        nonlocal seqs, cost
+        kind, rooms, prefixes, ready, started, _ = running.pop(key)
+        busy.difference_update(rooms)
+        stats[kind]["tries"] += 1
+        score = 0.0
+        if result is not None:
+            old = [seqs[o] for o in rooms]
+            cand = list(seqs)
+            for k, o in enumerate(rooms):
+                cand[o] = prefixes[k] + result[k]
+            # compactar y ordenar de forma exacta los quirófanos tocados
+            sub = sequence_rooms([cand[o] for o in rooms], [init] * len(rooms),
+                                 p, w, d, alpha, gamma)
+            for k, o in enumerate(rooms):
+                cand[o] = sub[k]
+            delta = (total_cost(sub, [init] * len(rooms), p, w, d, alpha, gamma)
+                     - total_cost(old, [init] * len(rooms), p, w, d, alpha, gamma))
+            if delta < -1e-6:
+                seqs, cost = cand, cost + delta
+                trajectory.append((time.perf_counter() - t0, cost))
+                stats[kind]["improved"] += 1
+                score = -delta / max(0.1, time.perf_counter() - started)
+                if verbose:
+                    print(f"[{time.perf_counter() - t0:7.1f}s] {kind}: {cost:.2f}")
+        weights[kind] = max(0.05, (1 - reaction) * weights[kind]
+                            + reaction * (1.0 + score))
+
+    running = {}
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while time.perf_counter() < t_end - 1 or running:
+                while (len(running) < workers and time.perf_counter() < t_end - 1
+                       and launch(pool, running)):
+                    pass
+                if not running:
+                    break
+                done, _ = wait(list(running), timeout=max(1, t_end - time.perf_counter() + 5),
+                               return_when=FIRST_COMPLETED)
+                for fut in done:
+                    finish(fut, fut.result())
+    else:
+        while time.perf_counter() < t_end - 1:
+            if not launch(None, running):
+                break
+            key = next(iter(running))
+            finish(key, _repair(*running[key][5]))
+
+    final = schedule_from_sequences(seqs, ready0, n, p)
+    for k in NEIGHBORHOODS:
+        stats[k]["weight"] = weights[k]
+    return {"schedule": final, "objective": cost, "initial": initial,
+            "trajectory": trajectory, "stats": stats,
+            "elapsed": time.perf_counter() - t0}
+
+
+def main(argv=None):
+    import instances
+    from schedule import evaluate
+
+    parser = argparse.ArgumentParser(description="LNS con sub-MIPs de build_model")
+    parser.add_argument("instance", type=int, nargs="?", default=1)
+    parser.add_argument("--set", choices=["first", "hosp", "gen"], default="first")
+    parser.add_argument("--n", type=int, default=300, help="tamaño para --set gen")
+    parser.add_argument("--budget", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sub-time-limit", type=int, default=5)
+    parser.add_argument("--max-jobs", type=int, default=14)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+
+    if args.set == "first":
+        inst = instances.first_instance(args.instance)
+    elif args.set == "hosp":
+        inst = instances.hospital_instance(args.instance)
+    else:
+        inst = instances.generate_instance(args.n, seed=args.seed)
+    res = run_lns(inst, time_budget=args.budget, workers=args.workers,
+                  sub_time_limit=args.sub_time_limit, max_jobs=args.max_jobs,
+                  seed=args.seed, solver_path=args.solver_path, verbose=True)
+    full = evaluate(res["schedule"], inst["p"], inst["w"], inst["d"], inst["H"], inst["m"])
+    print(f"{inst['name']}: costo inicial {res['initial']:.2f} -> {res['objective']:.2f} "
+          f"(objetivo del modelo {full['objective']:.2f}) en {res['elapsed']:.1f}s")
+    for k, st in res["stats"].items():
+        print(f"  {k:<8} intentos={st['tries']:>4} mejoras={st['improved']:>4} "
+              f"peso={st['weight']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
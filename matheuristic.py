@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+Matheurística sobre build_model para instancias donde el MIP completo no
+alcanza a cerrar: relax-and-fix seguido de fix-and-optimize.
+
+Relax-and-fix: las x se dividen en bloques (por deadline: grupos de
+cirugías ordenadas por d; o por quirófano: grupos de quirófanos). En el
+paso k las variables del bloque k son enteras, las de bloques anteriores
+quedan fijas en el valor encontrado y las de bloques posteriores se
+relajan (continuas). Una z[i][j][o] pertenece al último bloque de
+x[i][o] y x[j][o].
+
+Fix-and-optimize: partiendo de una solución entera se liberan ventanas
+pequeñas (las cirugías de dos quirófanos, o un grupo de cirugías de
+deadlines cercanos con todos sus quirófanos) y el resto de x/z queda fijo;
+cada sub-MIP parte desde el incumbente (warmStart), así que nunca empeora.
+
+Uso:
+    python matheuristic.py 4 --budget 120 --compare
+"""
+
+import argparse
+import random
+import time
+
+
+def _vars(x, z):
+    """Índices de las x y z existentes."""
+    xs = [(i, o) for i in x for o in x[i]]
+    zs = [(i, j, o) for i in z for j in z[i] if j != i for o in z[i][j]]
+    return xs, zs
+
+
+def _solve(prob, solver_path, time_limit, warm=False):
+    from FirstOptCode import get_solver
+
+    prob.solve(get_solver(solver_path, timeLimit=max(1, int(time_limit)), msg=False,
+                          warmStart=warm))
+    # 1 = óptimo, 2 = solución entera factible
+    return prob.sol_status in (1, 2)
+
+
+def _snapshot(prob):
+    return {v.name: v.varValue for v in prob.variables()}
+
+
+def _load(prob, values):
+    for v in prob.variables():
+        if values.get(v.name) is not None:
+            v.setInitialValue(values[v.name])
+
+
+def _set(var, cat, fixed=None):
+    from pulp import LpContinuous, LpInteger
+
+    var.cat = LpInteger if cat == "int" else LpContinuous
+    if fixed is None:
+        var.lowBound, var.upBound = 0, 1
+    else:
+        var.lowBound = var.upBound = fixed
+
+
+def _blocks(inst, block_by, block_size):
+    """Paso de relax-and-fix de cada x[i][o]."""
+    n, m, d, w = inst["n"], inst["m"], inst["d"], inst["w"]
+    step = {}
+    if block_by == "room":
+        for o in range(m):
+            for i in range(n):
+                step[(i, o)] = o // block_size
+    else:
+        order = sorted(range(n), key=lambda i: (d[i], -w[i]))
+        for pos, i in enumerate(order):
+            for o in range(m):
+                step[(i, o)] = pos // block_size
+    return step
+
+
+def relax_and_fix(prob, x, z, inst, block_by="deadline", block_size=4,
+                  sub_time_limit=20, solver_path=None, trajectory=None, t0=None,
+                  t_end=None):
+    """
+    Relax-and-fix sobre el modelo ya construido. Deja todas las x/z fijas
+    en la solución final y retorna (objetivo, valores) o (None, None) si
+    algún paso no encontró solución entera o se llegó a t_end (hora de
+    perf_counter) antes de terminar; en ese caso las x/z quedan libres y
+    enteras, como en el modelo original.
+    """
+    from pulp import value
+
+    t0 = time.perf_counter() if t0 is None else t0
+    xs, zs = _vars(x, z)
+    step_x = _blocks(inst, block_by, block_size)
+    step_z = {(i, j, o): max(step_x[(i, o)], step_x[(j, o)]) for (i, j, o) in zs}
+    n_steps = max(step_x.values()) + 1
+
+    def limit():
+        if t_end is None:
+            return sub_time_limit
+        return min(sub_time_limit, t_end - time.perf_counter())
+
+    def give_up():
+        for (i, o) in xs:
+            _set(x[i][o], "int")
+        for (i, j, o) in zs:
+            _set(z[i][j][o], "int")
+        return None, None
+
+    for k in range(n_steps):
+        if limit() < 1:
+            return give_up()
+        for key in xs:
+            if step_x[key] == k:
+                _set(x[key[0]][key[1]], "int")
+            elif step_x[key] > k:
+                _set(x[key[0]][key[1]], "lp")
+        for key in zs:
+            if step_z[key] == k:
+                _set(z[key[0]][key[1]][key[2]], "int")
+            elif step_z[key] > k:
+                _set(z[key[0]][key[1]][key[2]], "lp")
+
+        if not _solve(prob, solver_path, limit()):
+            return give_up()
+
+        for key in xs:
+            if step_x[key] == k:
+                var = x[key[0]][key[1]]
+                _set(var, "int", round(var.varValue or 0))
+        for key in zs:
+            if step_z[key] == k:
+                var = z[key[0]][key[1]][key[2]]
+                _set(var, "int", round(var.varValue or 0))
+
+    # con todo fijo, resolver una vez más para los tiempos exactos (es casi
+    # un LP: se hace aunque quede menos de un segundo)
+    if not _solve(prob, solver_path, limit()):
+        return give_up()
+    obj = value(prob.objective)
+    if trajectory is not None:
+        trajectory.append((time.perf_counter() - t0, obj, "relax-and-fix"))
+    return obj, _snapshot(prob)
+
+
+def _windows(inst, values, rng, window=6):
+    """
+    Ventanas de fix-and-optimize: pares de quirófanos (sus cirugías pueden
+    intercambiarse) y grupos de `window` cirugías de deadlines cercanos.
+    Cada ventana es el conjunto de (i, o) de x que se liberan.
+    """
+    n, m, d = inst["n"], inst["m"], inst["d"]
+    room = [max(range(m), key=lambda o: values.get(f"x_{i}_{o}") or 0) for i in range(n)]
+
+    pairs = [(a, b) for a in range(m) for b in range(a + 1, m)]
+    rng.shuffle(pairs)
+    by_rooms = []
+    for a, b in pairs:
+        jobs = [i for i in range(n) if room[i] in (a, b)]
+        if len(jobs) > 1:
+            by_rooms.append({(i, o) for i in jobs for o in (a, b)})
+
+    order = sorted(range(n), key=lambda i: d[i])
+    step = max(1, window // 2)
+    by_deadline = [{(i, o) for i in order[s:s + window] for o in range(m)}
+                   for s in range(0, max(1, n - window + 1), step)]
+
+    # alternar ambos tipos
+    out = []
+    for k in range(max(len(by_rooms), len(by_deadline))):
+        if k < len(by_rooms):
+            out.append(by_rooms[k])
+        if k < len(by_deadline):
+            out.append(by_deadline[k])
+    return out
+
+
+def fix_and_optimize(prob, x, z, inst, values, objective, time_budget=60,
+                     sub_time_limit=10, window=6, seed=0, solver_path=None,
+                     trajectory=None, t0=None):
+    """
+    Mejora la solución (values, objective) liberando ventanas de x/z hasta
+    agotar time_budget o completar una pasada sin mejora.
+    Retorna (objetivo, valores).
+    """
+    from pulp import value
+
+    t0 = time.perf_counter() if t0 is None else t0
+    t_end = time.perf_counter() + time_budget
+    rng = random.Random(seed)
+    xs, zs = _vars(x, z)
+
+    improved = True
+    while improved and time.perf_counter() < t_end:
+        improved = False
+        for free in _windows(inst, values, rng, window):
+            left = t_end - time.perf_counter()
+            if left < 1:
+                break
+            for (i, o) in xs:
+                var = x[i][o]
+                if (i, o) in free:
+                    _set(var, "int")
+                else:
+                    _set(var, "int", round(values[var.name] or 0))
+            for (i, j, o) in zs:
+                var = z[i][j][o]
+                if (i, o) in free or (j, o) in free:
+                    _set(var, "int")
+                else:
+                    _set(var, "int", round(values[var.name] or 0))
+            _load(prob, values)
+
+            if _solve(prob, solver_path, min(sub_time_limit, left), warm=True):
+                obj = value(prob.objective)
+                if obj < objective - 1e-6:
+                    objective, values = obj, _snapshot(prob)
+                    improved = True
+                    if trajectory is not None:
+                        trajectory.append((time.perf_counter() - t0, obj, "fix-and-optimize"))
+    return objective, values
+
+
+def solve_matheuristic(inst, time_budget=120, block_by="deadline", block_size=4,
+                       sub_time_limit=10, window=6, start="relax-and-fix",
+                       preprocess=False, seed=0, solver_path=None):
+    """
+    Relax-and-fix (o heurística, con start="heuristic") + fix-and-optimize
+    dentro de time_budget segundos de reloj.
+
+    Retorna dict con objective, schedule (room/start), trajectory (lista de
+    (segundos, objetivo, fase)) y elapsed.
+    """
+    import instances
+    from FirstOptCode import build_model, set_initial_solution
+    from schedule import evaluate, schedule_from_solution
+
+    t0 = time.perf_counter()
+    n, m = inst["n"], inst["m"]
+    trajectory = []
+    prob, x, z, S_i, C_i, u, O_total = build_model(*instances.instance_args(inst),
+                                                   preprocess=preprocess)
+
+    objective = values = None
+    if start == "relax-and-fix":
+        objective, values = relax_and_fix(prob, x, z, inst, block_by, block_size,
+                                          sub_time_limit, solver_path, trajectory, t0,
+                                          t_end=t0 + time_budget)
+    if values is None:
+        from heuristics import heuristic_schedule
+
+        sched = heuristic_schedule(n, m, inst["p"], inst["w"], inst["d"], inst["init"])
+        set_initial_solution(x, z, S_i, C_i, u, sched, inst["p"], inst["d"])
+        values = {v.name: v.varValue for v in prob.variables()}
+        objective = evaluate(sched, inst["p"], inst["w"], inst["d"], inst["H"], m)["objective"]
+        trajectory.append((time.perf_counter() - t0, objective, "heuristica"))
+
+    left = time_budget - (time.perf_counter() - t0)
+    if left > 1:
+        objective, values = fix_and_optimize(prob, x, z, inst, values, objective, left,
+                                             sub_time_limit, window, seed, solver_path,
+                                             trajectory, t0)
+
+    x_sol = {(i, o): values.get(f"x_{i}_{o}") for i in range(n) for o in range(m)}
+    S_sol = {i: values.get(f"Start_{i}") for i in range(n)}
+    return {"objective": objective, "schedule": schedule_from_solution(x_sol, S_sol, n, m),
+            "trajectory": trajectory, "elapsed": time.perf_counter() - t0}
+
+
+def compare(inst, time_budget=120, solver_path=None, **kwargs):
+    """
+    Trayectoria de la matheurística contra la del MIP completo
+    (build_model + CBC con el mismo tiempo). Imprime el mejor objetivo de
+    cada uno en varios instantes.
+    """
+    import instances
+    from FirstOptCode import build_model, get_solver
+    from cbc_log import solve_with_log
+
+    res = solve_matheuristic(inst, time_budget, solver_path=solver_path, **kwargs)
+
+    prob = build_model(*instances.instance_args(inst))[0]
+    t0 = time.perf_counter()
+    log = solve_with_log(prob, get_solver(solver_path, timeLimit=time_budget, msg=False))
+    plain = [(ev["time"], ev["incumbent"]) for ev in log.series if ev["incumbent"] is not None]
+
+    def best_at(series, t):
+        vals = [obj for (tt, obj, *_) in series if tt <= t and obj is not None]
+        return f"{min(vals):.2f}" if vals else "-"
+
+    print(f"{'t(s)':>7} {'Matheurística':>14} {'MIP completo':>14}")
+    for frac in (0.1, 0.25, 0.5, 0.75, 1.0):
+        t = frac * time_budget
+        print(f"{t:>7.1f} {best_at(res['trajectory'], t):>14} {best_at(plain, t):>14}")
+    print(f"Tiempo MIP completo: {time.perf_counter() - t0:.1f}s  "
+          f"Matheurística: {res['elapsed']:.1f}s")
+    return res, plain
+
+
+def main(argv=None):
+    import instances
+
+    parser = argparse.ArgumentParser(description="Relax-and-fix + fix-and-optimize")
+    parser.add_argument("instance", type=int)
+    parser.add_argument("--set", choices=["first", "hosp"], default="first")
+    parser.add_argument("--budget", type=int, default=120)
+    parser.add_argument("--block-by", choices=["deadline", "room"], default="deadline")
+    parser.add_argument("--block-size", type=int, default=4)
+    parser.add_argument("--sub-time-limit", type=int, default=10)
+    parser.add_argument("--window", type=int, default=6)
+    parser.add_argument("--start", choices=["relax-and-fix", "heuristic"],
+                        default="relax-and-fix")
+    parser.add_argument("--compare", action="store_true",
+                        help="comparar con el MIP completo con el mismo tiempo")
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+
+    if args.set == "first":
+        inst = instances.first_instance(args.instance)
+    else:
+        inst = instances.hospital_instance(args.instance)
+    kwargs = dict(block_by=args.block_by, block_size=args.block_size,
+                  sub_time_limit=args.sub_time_limit, window=args.window,
+                  start=args.start)
+    if args.compare:
+        compare(inst, args.budget, solver_path=args.solver_path, **kwargs)
+        return
+    res = solve_matheuristic(inst, args.budget, solver_path=args.solver_path, **kwargs)
+    for t, obj, phase in res["trajectory"]:
+        print(f"{t:>7.1f}s  {obj:>12.2f}  {phase}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Caché en disco de los modelos ya escritos (MPS comprimido con gzip).
+
+La clave es un hash del contenido: datos de la instancia, opciones de la
+formulación (alpha, beta, gamma, bigM, horizon, preprocess) y el código de
+los módulos que construyen el modelo, así que cambiar cualquiera de ellos
+genera otra entrada. Si la entrada existe no se construye nada en PuLP:
+el MPS se descomprime y se entrega directo a CBC, y la solución se lee del
+archivo de solución por nombre de variable.
+
+La caché se limita por tamaño total (max_bytes); al pasarse se borran las
+entradas usadas hace más tiempo (LRU por fecha de modificación, que se
+actualiza en cada uso).
+
+Uso:
+    solve_instance(4, cache=True)          # desde FirstOptCode
+    python model_cache.py --clear
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+CACHE_DIR = "cache_modelos"
+MAX_BYTES = 200 * 1024 * 1024
+
+# Módulos cuyo código define el modelo
+_MODEL_SOURCES = ("FirstOptCode.py", "preprocess.py")
+
+
+def _code_version():
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in _MODEL_SOURCES:
+        path = os.path.join(here, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def model_key(inst, **options):
+    """Hash del contenido de la instancia, las opciones y el código del modelo."""
+    data = {
+        "inst": {k: inst[k] for k in ("n", "m", "p", "w", "d", "init", "H")},
+        "options": options,
+        "code": _code_version(),
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def _entry(key, cache_dir):
+    return os.path.join(cache_dir, key + ".mps.gz")
+
+
+def _write_mps(prob):
+    """MPS temporal con los nombres originales de las variables."""
+    fd, tmp = tempfile.mkstemp(suffix=".mps")
+    os.close(fd)
+    prob.writeMPS(tmp, rename=0)
+    return tmp
+
+
+def store(key, mps_path, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+    """
+    Guarda comprimido en la caché el MPS ya escrito en mps_path. Cada
+    escritor usa su propio temporal, así que dos procesos que guardan la
+    misma clave a la vez no se pisan; gana el último os.replace.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+    try:
+        with os.fdopen(fd, "wb") as raw, open(mps_path, "rb") as src, \
+                gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, _entry(key, cache_dir))
+    except BaseException:
+        os.remove(tmp)
+        raise
+    evict(cache_dir, max_bytes)
+
+
+def load(key, cache_dir=CACHE_DIR):
+    """
+    Descomprime la entrada a un MPS temporal y retorna su ruta (None si no
+    está). Quien llama debe borrar el archivo.
+    """
+    path = _entry(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    os.utime(path)
+    fd, tmp = tempfile.mkstemp(suffix=".mps")
+    with os.fdopen(fd, "wb") as dst, gzip.open(path, "rb") as src:
+        shutil.copyfileobj(src, dst)
+    return tmp
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+    """Borra las entradas menos usadas hasta quedar bajo max_bytes."""
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".mps.gz"):
+            path = os.path.join(cache_dir, name)
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def _read_solution(path):
+    """
+    Archivo de solución de CBC: primera línea con el estado y el resto
+    "índice nombre valor costo_reducido" (con ** si viola una cota).
+    Retorna (estado, valores por nombre).
+    """
+    values = {}
+    with open(path) as f:
+        status = f.readline().strip()
+        for line in f:
+            parts = line.replace("**", "").split()
+            if len(parts) >= 3:
+                values[parts[1]] = float(parts[2])
+    return status, values
+
+
+def _cbc_path(solver_path):
+    if solver_path:
+        return solver_path
+    return shutil.which("cbc") or "cbc"
+
+
+def solve_mps(mps_path, solver_path=None, timeLimit=120, msg=True, progress=None):
+    """
+    Resuelve un MPS con CBC leyendo el log en vivo (cbc_log).
+    Retorna (estado de la solución, valores por nombre, parser del log).
+    """
+    from cbc_log import CbcLogParser, line_buffered
+
+    parser = CbcLogParser(callback=progress)
+    fd, sol_path = tempfile.mkstemp(suffix=".sol")
+    os.close(fd)
+    cmd = [_cbc_path(solver_path), mps_path, "-sec", str(timeLimit),
+           "-solve", "-printingOptions", "all", "-solu", sol_path]
+    try:
+        # por una tubería CBC escribe en bloques: igual que en solve_with_log
+        # se lanza con la salida por líneas para que el progreso llegue al momento
+        with line_buffered(), subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) as proc:
+            for line in proc.stdout:
+                if msg:
+                    print(line, end="")
+                parser.feed(line)
+        status, values = _read_solution(sol_path)
+    finally:
+        os.remove(sol_path)
+    return status, values, parser
+
+
+def solve_cached(instance_type, solver_path=None, timeLimit=120, timer=None,
+                 progress=None, return_progress=False, cache_dir=CACHE_DIR,
+                 max_bytes=MAX_BYTES, **options):
+    """
+    solve_instance con caché del modelo: misma tupla de retorno.
+    options: opciones de build_model (horizon, preprocess, ...).
+    """
+    import instances
+    from FirstOptCode import build_model
+    from profiling import NULL_TIMER
+
+    if timer is None:
+        timer = NULL_TIMER
+    options = dict({"alpha": 0.5, "beta": 1.0, "gamma": 0.5, "bigM": 10000}, **options)
+
+    with timer.span("generacion instancia"):
+        inst = instances.first_instance(instance_type)
+    n, m = inst["n"], inst["m"]
+    key = model_key(inst, **options)
+
+    with timer.span("cache"):
+        mps = load(key, cache_dir)
+    if mps is None:
+        with timer.span("build_model"):
+            prob = build_model(*instances.instance_args(inst), timer=timer, **options)[0]
+        with timer.span("escritura modelo"):
+            mps = _write_mps(prob)
+            store(key, mps, cache_dir, max_bytes)
+
+    try:
+        with timer.span("solver"):
+            cbc_status, values, log = solve_mps(mps, solver_path, timeLimit,
+                                                progress=progress)
+    finally:
+        os.remove(mps)
+
+    with timer.span("extraccion solucion"):
+        # mismo criterio que pulp: con solución entera se informa Optimal
+        # (aunque CBC se haya detenido por tiempo); sin ella, Not Solved con
+        # los valores de la relajación
+        obj_value = None
+        if "objective value" in cbc_status:
+            obj_value = float(cbc_status.rsplit("objective value", 1)[1])
+        if cbc_status.startswith("Infeasible") or cbc_status.startswith("Integer infeasible"):
+            status, obj_value = "Infeasible", None
+        elif obj_value is not None and "no integer solution" not in cbc_status:
+            status = "Optimal"
+        else:
+            status = "Not Solved"
+        get = values.get
+        x_sol = {(i, o): get(f"x_{i}_{o}") for i in range(n) for o in range(m)}
+        S_sol = {i: get(f"Start_{i}") for i in range(n)}
+        C_sol = {i: get(f"Completion_{i}") for i in range(n)}
+        u_sol = {i: get(f"Delay_{i}") for i in range(n)}
+        O_total_sol = get("OciosidadTotal")
+
+    result = (status, obj_value, x_sol, S_sol, C_sol, u_sol, O_total_sol,
+              n, m, inst["p"], inst["w"], inst["d"], inst["procedure_names"],
+              inst["init"], inst["H"])
+    if return_progress:
+        return result + (log.series,)
+    return result
+
+
+def cache_size(cache_dir=CACHE_DIR):
+    """(número de entradas, bytes totales)."""
+    if not os.path.isdir(cache_dir):
+        return 0, 0
+    sizes = [os.path.getsize(os.path.join(cache_dir, f))
+             for f in os.listdir(cache_dir) if f.endswith(".mps.gz")]
+    return len(sizes), sum(sizes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Caché de modelos MPS")
+    parser.add_argument("--dir", default=CACHE_DIR)
+    parser.add_argument("--clear", action="store_true", help="borrar la caché")
+    parser.add_argument("--max-mb", type=float, default=None,
+                        help="recortar la caché a este tamaño (LRU)")
+    args = parser.parse_args(argv)
+
+    if args.clear and os.path.isdir(args.dir):
+        shutil.rmtree(args.dir)
+    if args.max_mb is not None:
+        evict(args.dir, int(args.max_mb * 1024 * 1024))
+    count, size = cache_size(args.dir)
+    print(f"{args.dir}: {count} modelos, {size / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
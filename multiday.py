@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Planificación de varios días (semanas / mes) en dos etapas:
+
+1) Asignación de cada cirugía a un bloque (día, quirófano) respetando la
+   capacidad H del día en cada quirófano. Se puede hacer con un greedy
+   (por día comprometido y prioridad) o con un MIP a nivel de día
+   (capacidad agregada m*H) seguido de un reparto first-fit-decreasing en
+   quirófanos. Lo que no cabe en el horizonte queda en la lista de espera
+   para el período siguiente (carry-over).
+
+2) Secuenciación de cada día por separado (y en paralelo): con la
+   asignación a quirófanos fija, cada día se ordena con el secuenciador
+   exacto por quirófano (dp_sequencer) o con el MIP de FirstOptCode
+   restringido a ese día.
+
+Así los volúmenes mensuales n_cirugias_mes de get_hospital_instances_from_report
+se pueden planificar a escala real.
+
+Uso:
+    python multiday.py --hospital 8 --days 22 --jobs 4
+"""
+
+import argparse
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _per_day(value, days):
+    """Admite un valor fijo o una lista por día."""
+    if isinstance(value, (list, tuple)):
+        if len(value) != days:
+            raise ValueError("Se esperaba un valor por día del horizonte.")
+        return list(value)
+    return [value] * days
+
+
+def monthly_instance(hospital_index, days=22, seed=0):
+    """
+    Instancia mensual de un hospital del informe (prueba2, 1..10): n =
+    n_cirugias_mes, duraciones en el rango del hospital, prioridades 1..3 y
+    un día comprometido (due) para cada paciente de la lista de espera.
+    """
+    from prueba2 import get_hospital_instances_from_report
+
+    info = get_hospital_instances_from_report()[hospital_index - 1]
+    rng = random.Random(seed * 1000 + hospital_index)
+    n = info["n_cirugias_mes"]
+    low, high = info["duracion_min"]
+    return {
+        "name": info["hospital"],
+        "n": n,
+        "m": info["n_quirofanos"],
+        "p": [rng.randint(low, high) for _ in range(n)],
+        "w": [rng.choice((1, 2, 3)) for _ in range(n)],
+        "due": [rng.randrange(days) for _ in range(n)],
+        "H": info["deadline"],
+        "days": days,
+    }
+
+
+def _day_cost(i, t, w, due, late_weight):
+    """Costo de operar i el día t: antes es mejor, más aún si ya está atrasada."""
+    return w[i] * (t + 1) + late_weight * w[i] * max(0, t - due[i])
+
+
+def _pack_rooms(items, p, m, H):
+    """
+    First-fit-decreasing de las cirugías de un día en m quirófanos de
+    capacidad H. Retorna (quirófano de cada una, las que no cupieron).
+    """
+    load = [0] * m
+    rooms = {}
+    left = []
+    for i in sorted(items, key=lambda i: -p[i]):
+        fits = [o for o in range(m) if load[o] + p[i] <= H]
+        if not fits:
+            left.append(i)
+            continue
+        # best fit: el quirófano que queda más lleno
+        o = max(fits, key=lambda o: load[o])
+        rooms[i] = o
+        load[o] += p[i]
+    return rooms, left
+
+
+def assign_greedy(p, w, due, m, H, days):
+    """
+    Greedy: cirugías ordenadas por día comprometido y prioridad; cada una al
+    primer día con un quirófano donde quepa (best fit).
+    Retorna (asignación i -> (día, quirófano), carry_over).
+    """
+    load = [[0] * m[t] for t in range(days)]
+    assignment = {}
+    carry = []
+    for i in sorted(range(len(p)), key=lambda i: (due[i], -w[i], -p[i])):
+        placed = False
+        for t in range(days):
+            fits = [o for o in range(m[t]) if load[t][o] + p[i] <= H[t]]
+            if fits:
+                o = max(fits, key=lambda o: load[t][o])
+                load[t][o] += p[i]
+                assignment[i] = (t, o)
+                placed = True
+                break
+        if not placed:
+            carry.append(i)
+    return assignment, carry
+
+
+def assign_mip(p, w, due, m, H, days, late_weight=5.0, fill=0.95,
+               time_limit=60, solver_path=None):
+    """
+    MIP a nivel de día: y[i][t] = 1 si la cirugía i se opera el día t,
+    r[i] = 1 si queda para el período siguiente. La capacidad del día es
+    agregada (fill * m_t * H_t); luego se reparte en quirófanos con FFD y lo
+    que no cabe pasa al día siguiente.
+    """
+    from pulp import LpProblem, LpMinimize, LpVariable, LpBinary, lpSum, value
+    from FirstOptCode import get_solver
+
+    n = len(p)
+    N = range(n)
+    T = range(days)
+    prob = LpProblem("Asignacion_Dias", LpMinimize)
+    y = LpVariable.dicts("y", (N, T), 0, 1, cat=LpBinary)
+    r = LpVariable.dicts("r", N, 0, 1, cat=LpBinary)
+
+    carry_cost = [_day_cost(i, days, w, due, late_weight) * 2 for i in N]
+    prob += (lpSum(_day_cost(i, t, w, due, late_weight) * y[i][t] for i in N for t in T)
+             + lpSum(carry_cost[i] * r[i] for i in N)), "Costo"
+    for i in N:
+        prob += lpSum(y[i][t] for t in T) + r[i] == 1, f"Asig_{i}"
+    for t in T:
+        prob += lpSum(p[i] * y[i][t] for i in N) <= fill * m[t] * H[t], f"CapDia_{t}"
+
+    prob.solve(get_solver(solver_path, timeLimit=time_limit, msg=False))
+
+    by_day = [[] for _ in T]
+    carry = []
+    for i in N:
+        t = next((t for t in T if (value(y[i][t]) or 0) > 0.5), None)
+        if t is None:
+            carry.append(i)
+        else:
+            by_day[t].append(i)
+
+    assignment = {}
+    for t in T:
+        rooms, left = _pack_rooms(by_day[t], p, m[t], H[t])
+        for i, o in rooms.items():
+            assignment[i] = (t, o)
+        if t + 1 < days:
+            by_day[t + 1].extend(left)
+        else:
+            carry.extend(left)
+    return assignment, carry
+
+
+def sequence_day(t, items, rooms, p, w, m, H, init, method="heuristic",
+                 alpha=0.5, gamma=0.5, time_limit=30, solver_path=None):
+    """
+    Secuencia un día con la asignación a quirófanos fija. El deadline
+    dentro del día es el fin de jornada (init + H): el retraso es sobretiempo.
+    Retorna dict con items, room y start (por cirugía global).
+    """
+    d_day = init + H
+    start = None
+    if method == "mip" and items:
+        from pulp import value
+        from FirstOptCode import build_model, get_solver
+
+        k = len(items)
+        pp = [p[i] for i in items]
+        prob, x, z, S_i, C_i, u, O_total = build_model(
+            k, m, pp, [w[i] for i in items], [d_day] * k,
+            [str(i) for i in items], init, H, alpha=alpha, gamma=gamma)
+        # asignación fija: solo se decide el orden en cada quirófano
+        for a, i in enumerate(items):
+            for o in range(m):
+                x[a][o].lowBound = x[a][o].upBound = 1 if rooms[i] == o else 0
+        prob.solve(get_solver(solver_path, timeLimit=time_limit, msg=False))
+        # sin incumbente en time_limit se usa el DP de abajo
+        if prob.sol_status in (1, 2):
+            start = {i: value(S_i[a]) for a, i in enumerate(items)}
+    if start is None:
+        # orden exacto por quirófano (DP con memoria)
+        from dp_sequencer import sequence_room
+
+        d = {i: d_day for i in items}
+        start = {}
+        for o in range(m):
+            _, seq = sequence_room([i for i in items if rooms[i] == o],
+                                   init, p, w, d, alpha, gamma)
+            tt = init
+            for i in seq:
+                start[i] = tt
+                tt += p[i]
+
+    C = {i: start[i] + p[i] for i in items}
+    cost = sum(alpha * w[i] * C[i] + gamma * max(0.0, C[i] - d_day) for i in items)
+    return {"day": t, "items": list(items), "room": dict(rooms), "start": start,
+            "cost": cost}
+
+
+def plan_horizon(p, w, due, m, H, days, init=8*60, assign="greedy",
+                 sequencing="heuristic", jobs=1, time_limit=30, solver_path=None,
+                 alpha=0.5, gamma=0.5):
+    """
+    Planifica n cirugías en `days` días.
+
+    m, H: número de quirófanos y horizonte diario, fijos o por día
+          (H=0 para un día sin pabellón, p.ej. fin de semana).
+    assign: "greedy" o "mip" (etapa 1).
+    sequencing: "heuristic" (DP por quirófano) o "mip" (etapa 2, un proceso
+                por día si jobs > 1).
+
+    Retorna dict con assignment (i -> (día, quirófano)), days (lista de
+    resultados por día) y carry_over (cirugías que pasan al período siguiente).
+    """
+    m = _per_day(m, days)
+    H = _per_day(H, days)
+
+    if assign == "mip":
+        assignment, carry = assign_mip(p, w, due, m, H, days,
+                                       time_limit=time_limit, solver_path=solver_path)
+    else:
+        assignment, carry = assign_greedy(p, w, due, m, H, days)
+
+    tasks = []
+    for t in range(days):
+        items = [i for i, (day, _) in assignment.items() if day == t]
+        rooms = {i: assignment[i][1] for i in items}
+        tasks.append((t, items, rooms, p, w, m[t], H[t], init, sequencing,
+                      alpha, gamma, time_limit, solver_path))
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            day_results = list(pool.map(sequence_day, *zip(*tasks)))
+    else:
+        day_results = [sequence_day(*task) for task in tasks]
+
+    return {"assignment": assignment, "days": day_results, "carry_over": carry}
+
+
+def print_plan(plan, p, m, H):
+    m = _per_day(m, len(plan["days"]))
+    H = _per_day(H, len(plan["days"]))
+    print(f"{'Día':>4} {'Cirugías':>9} {'Uso(%)':>7} {'Costo':>12}")
+    for res in plan["days"]:
+        t = res["day"]
+        used = sum(p[i] for i in res["items"])
+        cap = m[t] * H[t]
+        util = 100 * used / cap if cap else 0.0
+        print(f"{t:>4} {len(res['items']):>9} {util:>7.1f} {res['cost']:>12.1f}")
+    print(f"Quedan en lista de espera: {len(plan['carry_over'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Planificación de varios días")
+    parser.add_argument("--hospital", type=int, default=1, help="hospital del informe (1..10)")
+    parser.add_argument("--days", type=int, default=22)
+    parser.add_argument("--assign", choices=["greedy", "mip"], default="greedy")
+    parser.add_argument("--sequencing", choices=["heuristic", "mip"], default="heuristic")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--time-limit", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+
+    inst = monthly_instance(args.hospital, days=args.days, seed=args.seed)
+    print(f"--- {inst['name']}: n={inst['n']}, m={inst['m']}, H={inst['H']} ---")
+    plan = plan_horizon(inst["p"], inst["w"], inst["due"], inst["m"], inst["H"],
+                        args.days, assign=args.assign, sequencing=args.sequencing,
+                        jobs=args.jobs, time_limit=args.time_limit,
+                        solver_path=args.solver_path)
+    print_plan(plan, inst["p"], inst["m"], inst["H"])
+
+
+if __name__ == "__main__":
+    main()
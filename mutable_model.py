@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Modelo persistente para análisis what-if: se construye una vez con
+build_model y después se modifica en sitio, sin reconstruir.
+
+Se guardan los manejadores de las filas con nombre del modelo
+(AsigUnica_i, TiempoFin_i, RetrasoPos_i, TrabajoQ_o, Ociosidad y el
+objetivo), así que cada cambio toca solo lo que depende del dato:
+    - set_duration(i, p):  TiempoFin_i y el coeficiente de x_i_o en cada
+      TrabajoQ_o (O(m));
+    - set_deadline(i, d):  RetrasoPos_i (O(1));
+    - set_priority(i, w):  coeficiente de Completion_i en el objetivo (O(1));
+    - set_weights(alpha, beta, gamma): coeficientes del objetivo (O(n));
+    - add_surgery / remove_surgery: las variables y filas de la cirugía y
+      sus pares (O(n*m));
+    - add_room: las x y z del quirófano nuevo (O(n^2)).
+
+El modelo se construye con windows=False (Big-M y cotas fijos): las
+ventanas dependen de sum(p) y dejarían de ser válidas al cambiar una
+duración. Una cirugía quitada no se borra: se fijan sus x y z en 0 y sale
+del objetivo; compact() reconstruye si se acumulan muchas.
+
+Cada solve parte desde la solución anterior (warmStart), ajustada a los
+datos actuales: mismos quirófanos y orden, tiempos recalculados y las
+cirugías nuevas al final del quirófano menos cargado (la primera vez,
+desde la heurística).
+
+Uso:
+    python mutable_model.py 4 --time-limit 30
+"""
+
+import argparse
+import time
+
+
+class MutableModel:
+    """
+    Modelo de FirstOptCode.build_model modificable en sitio.
+
+    Las cirugías se identifican por un id estable (0..n-1 las originales,
+    luego n, n+1, ... las agregadas); los ids de las quitadas no se reusan.
+    """
+
+    def __init__(self, inst, alpha=0.5, beta=1.0, gamma=0.5, bigM=10000,
+                 solver_path=None):
+        import instances
+        from FirstOptCode import build_model
+
+        self.name = inst["name"]
+        self.m, self.init, self.H = inst["m"], inst["init"], inst["H"]
+        self.alpha, self.beta, self.gamma, self.bigM = alpha, beta, gamma, bigM
+        self.solver_path = solver_path
+        n = inst["n"]
+        self.p = dict(enumerate(inst["p"]))
+        self.w = dict(enumerate(inst["w"]))
+        self.d = dict(enumerate(inst["d"]))
+        self.names = dict(enumerate(inst["procedure_names"]))
+        self.active = list(range(n))
+        self.next_id = n
+
+        (self.prob, self.x, self.z, self.S, self.C, self.u,
+         self.O_total) = build_model(*instances.instance_args(inst), alpha=alpha,
+                                     beta=beta, gamma=gamma, bigM=bigM,
+                                     verbose=False, windows=False)
+        cons = self.prob.constraints
+        self.row_assign = {i: cons[f"AsigUnica_{i}"] for i in range(n)}
+        self.row_end = {i: cons[f"TiempoFin_{i}"] for i in range(n)}
+        self.row_delay = {i: cons[f"RetrasoPos_{i}"] for i in range(n)}
+        self.row_work = {o: cons[f"TrabajoQ_{o}"] for o in range(self.m)}
+        self.row_idle = cons["Ociosidad"]
+        variables = self.prob.variablesDict()
+        self.work = {o: variables[f"Work_O_{o}"] for o in range(self.m)}
+        self.schedule = None
+        self.changes = 0
+
+    # ------------------------------------------------------------------
+    # Cambios de datos
+    # ------------------------------------------------------------------
+
+    def _check(self, i):
+        if i not in self.p or i not in self.active:
+            raise KeyError(f"La cirugía {i} no está en el modelo.")
+
+    def set_duration(self, i, p):
+        """Cambia p[i]: TiempoFin_i y la fila de trabajo de cada quirófano."""
+        self._check(i)
+        self.p[i] = p
+        # C_i == S_i + p  ->  C_i - S_i - p == 0
+        self.row_end[i].changeRHS(p)
+        for o in range(self.m):
+            self.row_work[o].expr[self.x[i][o]] = -p
+            self.row_work[o].modified = True
+        self.C[i].lowBound = self.init + p
+        self.S[i].upBound = self.init + self.bigM - p
+        self.changes += 1
+
+    def set_deadline(self, i, d):
+        """Cambia d[i]: solo RetrasoPos_i y la cota de Delay_i."""
+        self._check(i)
+        self.d[i] = d
+        # u_i >= C_i - d  ->  u_i - C_i + d >= 0
+        self.row_delay[i].changeRHS(-d)
+        self.u[i].upBound = max(0, self.init + self.bigM - d)
+        self.changes += 1
+
+    def set_priority(self, i, w):
+        """Cambia w[i]: coeficiente de Completion_i en el objetivo."""
+        self._check(i)
+        self.w[i] = w
+        self.prob.objective[self.C[i]] = self.alpha * w
+        self.changes += 1
+
+    def set_weights(self, alpha=None, beta=None, gamma=None):
+        """Cambia los pesos del objetivo (toca un coeficiente por cirugía)."""
+        obj = self.prob.objective
+        if alpha is not None:
+            self.alpha = alpha
+            for i in self.active:
+                obj[self.C[i]] = alpha * self.w[i]
+        if gamma is not None:
+            self.gamma = gamma
+            for i in self.active:
+                obj[self.u[i]] = gamma
+        if beta is not None:
+            self.beta = beta
+            obj[self.O_total] = beta
+        self.changes += 1
+
+    def _add_pair(self, i, j, o):
+        """Filas (3) y (4) del par (i, j) en el quirófano o."""
+        from pulp import LpInteger, LpVariable
+
+        prob, x = self.prob, self.x
+        zij = LpVariable(f"z_{i}_{j}_{o}", 0, 1, LpInteger)
+        zji = LpVariable(f"z_{j}_{i}_{o}", 0, 1, LpInteger)
+        self.z.setdefault(i, {}).setdefault(j, {})[o] = zij
+        self.z.setdefault(j, {}).setdefault(i, {})[o] = zji
+        prob += zij + zji <= 1
+        for var in (zij, zji):
+            prob += var <= x[i][o]
+            prob += var <= x[j][o]
+        prob += zij + zji >= x[i][o] + x[j][o] - 1
+        prob += self.S[j] >= self.C[i] - self.bigM * (1 - zij)
+        prob += self.S[i] >= self.C[j] - self.bigM * (1 - zji)
+
+    def add_surgery(self, p, w, d, name=None):
+        """Agrega una cirugía (sus variables, filas y pares). Retorna su id."""
+        from pulp import LpContinuous, LpInteger, LpVariable, lpSum
+
+        i = self.next_id
+        self.next_id += 1
+        self.p[i], self.w[i], self.d[i] = p, w, d
+        self.names[i] = name if name is not None else f"S{i}"
+        prob = self.prob
+        self.x[i] = {o: LpVariable(f"x_{i}_{o}", 0, 1, LpInteger) for o in range(self.m)}
+        self.S[i] = LpVariable(f"Start_{i}", self.init, self.init + self.bigM - p, LpContinuous)
+        self.C[i] = LpVariable(f"Completion_{i}", self.init + p, self.init + self.bigM, LpContinuous)
+        self.u[i] = LpVariable(f"Delay_{i}", 0, max(0, self.init + self.bigM - d), LpContinuous)
+
+        prob += lpSum(self.x[i][o] for o in range(self.m)) == 1, f"AsigUnica_{i}"
+        prob += self.C[i] == self.S[i] + p, f"TiempoFin_{i}"
+        prob += self.u[i] >= self.C[i] - d, f"RetrasoPos_{i}"
+        prob += self.u[i] >= 0
+        prob += self.S[i] >= self.init
+        cons = prob.constraints
+        self.row_assign[i] = cons[f"AsigUnica_{i}"]
+        self.row_end[i] = cons[f"TiempoFin_{i}"]
+        self.row_delay[i] = cons[f"RetrasoPos_{i}"]
+
+        for o in range(self.m):
+            self.row_work[o].expr[self.x[i][o]] = -p
+            self.row_work[o].modified = True
+        self.z[i] = {}
+        for j in self.active:
+            for o in range(self.m):
+                self._add_pair(j, i, o)
+        prob.objective[self.C[i]] = self.alpha * w
+        prob.objective[self.u[i]] = self.gamma
+        self.active.append(i)
+        self.changes += 1
+        return i
+
+    def remove_surgery(self, i):
+        """
+        Quita la cirugía i: sale de la asignación y del objetivo y sus x/z
+        quedan fijas en 0 (las filas de sus pares quedan inactivas).
+        """
+        self._check(i)
+        del self.prob.constraints[f"AsigUnica_{i}"]
+        del self.row_assign[i]
+        for o in range(self.m):
+            self.x[i][o].upBound = 0
+        for j in self.z.get(i, {}):
+            for o in self.z[i][j]:
+                self.z[i][j][o].upBound = 0
+                self.z[j][i][o].upBound = 0
+        obj = self.prob.objective
+        obj.pop(self.C[i], None)
+        obj.pop(self.u[i], None)
+        self.active.remove(i)
+        self.changes += 1
+
+    def add_room(self):
+        """Agrega un quirófano (libre desde init). Retorna su índice."""
+        from pulp import LpContinuous, LpInteger, LpVariable, lpSum
+
+        o = self.m
+        self.m += 1
+        prob = self.prob
+        for i in self.x:
+            self.x[i][o] = LpVariable(f"x_{i}_{o}", 0, 1, LpInteger)
+            if i not in self.active:
+                self.x[i][o].upBound = 0
+        for i in self.active:
+            self.row_assign[i].expr[self.x[i][o]] = 1
+            self.row_assign[i].modified = True
+            prob.addVariable(self.x[i][o])
+        for a, i in enumerate(self.active):
+            for j in self.active[a + 1:]:
+                self._add_pair(i, j, o)
+
+        self.work[o] = LpVariable(f"Work_O_{o}", 0, None, LpContinuous)
+        prob += self.work[o] == lpSum(self.x[i][o] * self.p[i] for i in self.active), \
+            f"TrabajoQ_{o}"
+        self.row_work[o] = prob.constraints[f"TrabajoQ_{o}"]
+        # O_total == sum(H - w_oo)  ->  O_total + sum(w_oo) - m*H == 0
+        self.row_idle.expr[self.work[o]] = 1
+        self.row_idle.changeRHS(-self.row_idle.constant + self.H)
+        self.row_idle.modified = True
+        self.changes += 1
+        return o
+
+    # ------------------------------------------------------------------
+    # Resolución
+    # ------------------------------------------------------------------
+
+    def _warm_schedule(self):
+        """Solución anterior ajustada a los datos actuales (o la heurística)."""
+        if self.schedule is None:
+            from heuristics import heuristic_schedule
+
+            ids = list(self.active)
+            inst = self.instance()
+            sched = heuristic_schedule(inst["n"], self.m, inst["p"], inst["w"], inst["d"],
+                                       self.init, self.alpha, self.gamma)
+            return {"room": {i: sched["room"][k] for k, i in enumerate(ids)},
+                    "start": {i: sched["start"][k] for k, i in enumerate(ids)}}
+        last = self.schedule
+        seqs = [[] for _ in range(self.m)]
+        for i in sorted((i for i in self.active if i in last["room"]),
+                        key=lambda i: last["start"][i]):
+            seqs[last["room"][i]].append(i)
+        for i in self.active:
+            if i not in last["room"]:
+                o = min(range(self.m), key=lambda o: sum(self.p[j] for j in seqs[o]))
+                seqs[o].append(i)
+        room, start = {}, {}
+        for o, seq in enumerate(seqs):
+            t = self.init
+            for i in seq:
+                room[i], start[i] = o, t
+                t += self.p[i]
+        return {"room": room, "start": start}
+
+    def _set_initial(self, sched):
+        for i in self.x:
+            on = i in sched["room"]
+            for o in self.x[i]:
+                self.x[i][o].setInitialValue(1 if on and sched["room"][i] == o else 0)
+            if on:
+                s = sched["start"][i]
+                self.S[i].setInitialValue(s)
+                self.C[i].setInitialValue(s + self.p[i])
+                self.u[i].setInitialValue(max(0, s + self.p[i] - self.d[i]))
+        for i in self.z:
+            for j in self.z[i]:
+                for o, var in self.z[i][j].items():
+                    before = (i in sched["room"] and j in sched["room"]
+                              and sched["room"][i] == o == sched["room"][j]
+                              and sched["start"][i] < sched["start"][j])
+                    var.setInitialValue(1 if before else 0)
+        # Sin estos valores PuLP escribe 0 y el arranque queda infactible.
+        work = {o: 0 for o in range(self.m)}
+        for i, o in sched["room"].items():
+            work[o] += self.p[i]
+        for o, var in self.work.items():
+            var.setInitialValue(work[o])
+        self.O_total.setInitialValue(sum(self.H - t for t in work.values()))
+
+    def solve(self, time_limit=60, warm=True, msg=False):
+        """
+        Resuelve con CBC desde la solución anterior. Retorna dict con
+        status, objective, schedule (room/start por id) y elapsed.
+        """
+        from pulp import LpStatus, value
+        from FirstOptCode import get_solver
+        from cbc_log import solve_with_log
+
+        t0 = time.perf_counter()
+        sched = self._warm_schedule() if warm else None
+        if sched is not None:
+            self._set_initial(sched)
+        log = solve_with_log(self.prob, get_solver(self.solver_path, timeLimit=time_limit,
+                                                   msg=msg, warmStart=sched is not None))
+        summary = log.summary()
+        objective = None
+        if self.prob.sol_status in (1, 2):
+            objective = value(self.prob.objective)
+            room = {i: max(range(self.m), key=lambda o: self.x[i][o].varValue or 0)
+                    for i in self.active}
+            self.schedule = {"room": room,
+                             "start": {i: self.S[i].varValue for i in self.active}}
+        return {"status": summary["result"] or LpStatus[self.prob.status],
+                "objective": objective, "bound": summary["bound"],
+                "schedule": self.schedule, "elapsed": time.perf_counter() - t0}
+
+    def instance(self):
+        """Datos actuales como instancia (dict de instances.py, ids reindexados)."""
+        import instances
+
+        ids = list(self.active)
+        return instances.make_instance(self.name, len(ids), self.m,
+                                       [self.p[i] for i in ids], [self.w[i] for i in ids],
+                                       [self.d[i] for i in ids],
+                                       [self.names[i] for i in ids], self.init, self.H)
+
+    def compact(self):
+        """
+        Reconstruye el modelo sin las cirugías quitadas (ids reindexados
+        0..n-1). La última solución se conserva como warm start.
+        """
+        ids = list(self.active)
+        last = self.schedule
+        new = MutableModel(self.instance(), self.alpha, self.beta, self.gamma,
+                           self.bigM, self.solver_path)
+        if last is not None:
+            new.schedule = {"room": {k: last["room"][i] for k, i in enumerate(ids)
+                                     if i in last["room"]},
+                            "start": {k: last["start"][i] for k, i in enumerate(ids)
+                                      if i in last["start"]}}
+        self.__dict__.update(new.__dict__)
+        return ids
+
+
+def main(argv=None):
+    import instances
+
+    parser = argparse.ArgumentParser(description="Modelo modificable en sitio (what-if)")
+    parser.add_argument("instance", type=int, nargs="?", default=4)
+    parser.add_argument("--time-limit", type=int, default=30)
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+
+    inst = instances.first_instance(args.instance)
+    t0 = time.perf_counter()
+    model = MutableModel(inst, solver_path=args.solver_path)
+    print(f"Construcción: {1000 * (time.perf_counter() - t0):.1f} ms")
+    res = model.solve(args.time_limit)
+    print(f"Base: {res['status']} objetivo={res['objective']} ({res['elapsed']:.1f}s)")
+
+    changes = [
+        ("duración de la cirugía 0 +20%", lambda: model.set_duration(0, round(model.p[0] * 1.2))),
+        ("deadline de la cirugía 1 -60 min", lambda: model.set_deadline(1, model.d[1] - 60)),
+        ("prioridad de la cirugía 2 = 3", lambda: model.set_priority(2, 3)),
+        ("nueva cirugía CL", lambda: model.add_surgery(225, 2, inst["init"] + 6 * 60, "CL")),
+        ("un quirófano más", model.add_room),
+        ("quitar la cirugía 3", lambda: model.remove_surgery(3)),
+    ]
+    for label, change in changes:
+        t0 = time.perf_counter()
+        change()
+        ms = 1000 * (time.perf_counter() - t0)
+        res = model.solve(args.time_limit)
+        print(f"{label:<36} cambio {ms:7.2f} ms  {res['status'][:24]:<24} "
+              f"objetivo={res['objective']} ({res['elapsed']:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Asignación a nivel de red: reparte la carga entre los 10 hospitales de
+get_hospital_instances_from_report permitiendo derivar cirugías de un
+hospital a otro con una penalidad por traslado.
+
+Descomposición:
+    1) Maestro pequeño: las cirugías se agrupan por (hospital de origen,
+       prioridad, tramo de duración) y el MIP decide cuántas de cada grupo
+       se operan en cada hospital (variables enteras y[g][h]), con
+       capacidad agregada por hospital, costo de traslado, costo por dejar
+       casos en espera y un término que nivela la utilización máxima. Con
+       ~10 hospitales el maestro tiene unos cientos de variables y resuelve
+       en segundos sin importar cuántas cirugías haya.
+    2) Se desagregan los grupos en cirugías concretas y cada hospital
+       planifica lo suyo por separado y en paralelo (multiday.plan_horizon).
+
+Uso:
+    python network.py --days 10 --transfer-cost 200 --jobs 4
+"""
+
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import multiday
+
+
+def network_instance(days=22, seed=0):
+    """
+    Casos de los 10 hospitales en un solo conjunto. Cada hospital aporta su
+    volumen mensual (multiday.monthly_instance). Retorna un dict con las
+    listas p, w, due, origin y la lista hospitals (name, m, H).
+    """
+    p, w, due, origin = [], [], [], []
+    hospitals = []
+    for h in range(1, 11):
+        inst = multiday.monthly_instance(h, days=days, seed=seed)
+        hospitals.append({"name": inst["name"], "m": inst["m"], "H": inst["H"]})
+        p += inst["p"]
+        w += inst["w"]
+        due += inst["due"]
+        origin += [h - 1] * inst["n"]
+    return {"p": p, "w": w, "due": due, "origin": origin,
+            "hospitals": hospitals, "days": days}
+
+
+def build_groups(p, w, origin, bucket=30):
+    """
+    Agrupa las cirugías por (origen, prioridad, tramo de duración).
+    La duración de un grupo para la capacidad es el tope del tramo
+    (conservador). Retorna lista de dicts con key, members, p, w, origin.
+    """
+    groups = {}
+    for i in range(len(p)):
+        key = (origin[i], w[i], math.ceil(p[i] / bucket))
+        groups.setdefault(key, []).append(i)
+    out = []
+    for (o, wi, b), members in sorted(groups.items()):
+        out.append({"key": (o, wi, b), "members": members, "origin": o,
+                    "w": wi, "p": b * bucket})
+    return out
+
+
+def solve_master(groups, capacity, transfer_cost=200.0, wait_cost=1000.0,
+                 balance_cost=1000.0, fill=0.95, distance=None,
+                 time_limit=30, solver_path=None):
+    """
+    MIP maestro. capacity[h] son los minutos de pabellón del hospital h en
+    el horizonte; distance[a][b] (opcional) escala el costo de traslado.
+
+    Retorna (flujos, en_espera, utilizacion_max) con flujos[(g, h)] = casos
+    del grupo g operados en h. RuntimeError si CBC termina sin solución
+    entera (el maestro siempre es factible, así que solo pasa si se acaba
+    time_limit antes del primer incumbente).
+    """
+    from pulp import LpProblem, LpMinimize, LpVariable, LpInteger, lpSum, value
+    from FirstOptCode import get_solver
+
+    G = range(len(groups))
+    Hs = range(len(capacity))
+    prob = LpProblem("Red_Hospitales", LpMinimize)
+    y = LpVariable.dicts("y", (G, Hs), 0, None, cat=LpInteger)
+    s = LpVariable.dicts("espera", G, 0, None, cat=LpInteger)
+    U = LpVariable("UtilMax", 0, None)
+
+    def move_cost(g, h):
+        a = groups[g]["origin"]
+        if a == h:
+            return 0.0
+        scale = distance[a][h] if distance is not None else 1.0
+        return transfer_cost * scale
+
+    prob += (lpSum(move_cost(g, h) * y[g][h] for g in G for h in Hs)
+             + lpSum(wait_cost * groups[g]["w"] * s[g] for g in G)
+             + balance_cost * U), "Costo"
+
+    for g in G:
+        prob += (lpSum(y[g][h] for h in Hs) + s[g] == len(groups[g]["members"]),
+                 f"Demanda_{g}")
+    for h in Hs:
+        load = lpSum(groups[g]["p"] * y[g][h] for g in G)
+        prob += load <= fill * capacity[h], f"Capacidad_{h}"
+        prob += load <= U * capacity[h], f"Utilizacion_{h}"
+
+    prob.solve(get_solver(solver_path, timeLimit=time_limit, msg=False))
+    if prob.sol_status not in (1, 2):
+        raise RuntimeError(f"El maestro no tiene solución entera en {time_limit}s; "
+                           "aumente time_limit.")
+
+    flows = {}
+    for g in G:
+        for h in Hs:
+            k = int(round(value(y[g][h])))
+            if k:
+                flows[(g, h)] = k
+    waiting = {g: int(round(value(s[g]))) for g in G}
+    return flows, waiting, value(U)
+
+
+def disaggregate(groups, flows, waiting, due):
+    """
+    Reparte las cirugías concretas de cada grupo según los flujos. Se quedan
+    en su hospital primero las de día comprometido más cercano; las de
+    compromiso más lejano son las que se trasladan o quedan en espera.
+    Retorna (hospital de cada cirugía, lista en espera).
+    """
+    where = {}
+    waitlist = []
+    for g, grp in enumerate(groups):
+        members = sorted(grp["members"], key=lambda i: due[i])
+        home = grp["origin"]
+        order = [home] + sorted(h for (gg, h) in flows if gg == g and h != home)
+        pos = 0
+        for h in order:
+            for i in members[pos:pos + flows.get((g, h), 0)]:
+                where[i] = h
+            pos += flows.get((g, h), 0)
+        waitlist += members[pos:pos + waiting.get(g, 0)]
+    return where, waitlist
+
+
+def _plan_hospital(h, items, p, w, due, m, H, days, sequencing, time_limit, solver_path):
+    """Planificación de un hospital (se ejecuta en un proceso aparte)."""
+    pp = [p[i] for i in items]
+    ww = [w[i] for i in items]
+    dd = [due[i] for i in items]
+    plan = multiday.plan_horizon(pp, ww, dd, m, H, days, sequencing=sequencing,
+                                 time_limit=time_limit, solver_path=solver_path)
+    # de índices locales a globales
+    plan["assignment"] = {items[a]: td for a, td in plan["assignment"].items()}
+    plan["carry_over"] = [items[a] for a in plan["carry_over"]]
+    for day in plan["days"]:
+        day["items"] = [items[a] for a in day["items"]]
+        day["room"] = {items[a]: o for a, o in day["room"].items()}
+        day["start"] = {items[a]: s for a, s in day["start"].items()}
+    return h, plan
+
+
+def plan_network(inst, transfer_cost=200.0, wait_cost=1000.0, balance_cost=1000.0,
+                 distance=None, bucket=30, sequencing="heuristic", jobs=1,
+                 time_limit=30, solver_path=None):
+    """
+    Maestro + planificación en paralelo de cada hospital.
+    Retorna dict con hospital (de cada cirugía), transfers (i, origen, destino),
+    waitlist, max_utilization y plans (por hospital).
+    """
+    p, w, due, origin = inst["p"], inst["w"], inst["due"], inst["origin"]
+    hospitals, days = inst["hospitals"], inst["days"]
+    capacity = [days * hosp["m"] * hosp["H"] for hosp in hospitals]
+
+    groups = build_groups(p, w, origin, bucket=bucket)
+    flows, waiting, util = solve_master(groups, capacity, transfer_cost, wait_cost,
+                                        balance_cost, distance=distance,
+                                        time_limit=time_limit, solver_path=solver_path)
+    where, waitlist = disaggregate(groups, flows, waiting, due)
+
+    tasks = []
+    for h, hosp in enumerate(hospitals):
+        items = sorted(i for i, hh in where.items() if hh == h)
+        tasks.append((h, items, p, w, due, hosp["m"], hosp["H"], days,
+                      sequencing, time_limit, solver_path))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            plans = dict(pool.map(_plan_hospital, *zip(*tasks)))
+    else:
+        plans = dict(_plan_hospital(*task) for task in tasks)
+
+    transfers = [(i, origin[i], h) for i, h in sorted(where.items()) if h != origin[i]]
+    for plan in plans.values():
+        waitlist += plan["carry_over"]
+    return {"hospital": where, "transfers": transfers, "waitlist": sorted(waitlist),
+            "max_utilization": util, "plans": plans, "groups": len(groups)}
+
+
+def print_network(inst, result):
+    p = inst["p"]
+    print(f"Grupos en el maestro: {result['groups']}  "
+          f"Utilización máxima: {100 * result['max_utilization']:.1f}%")
+    print(f"{'Hospital':<48} {'Propias':>8} {'Recibe':>7} {'Envía':>6} {'Uso(%)':>7}")
+    for h, hosp in enumerate(inst["hospitals"]):
+        own = sum(1 for i, hh in result["hospital"].items()
+                  if hh == h and inst["origin"][i] == h)
+        recv = sum(1 for _, a, b in result["transfers"] if b == h)
+        sent = sum(1 for _, a, b in result["transfers"] if a == h)
+        cap = inst["days"] * hosp["m"] * hosp["H"]
+        used = sum(p[i] for i, hh in result["hospital"].items() if hh == h)
+        print(f"{hosp['name']:<48} {own:>8} {recv:>7} {sent:>6} {100 * used / cap:>7.1f}")
+    print(f"Traslados: {len(result['transfers'])}  En espera: {len(result['waitlist'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Asignación de cirugías en la red de hospitales")
+    parser.add_argument("--days", type=int, default=22)
+    parser.add_argument("--transfer-cost", type=float, default=200.0)
+    parser.add_argument("--wait-cost", type=float, default=1000.0)
+    parser.add_argument("--sequencing", choices=["heuristic", "mip"], default="heuristic")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--time-limit", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+
+    inst = network_instance(days=args.days, seed=args.seed)
+    result = plan_network(inst, transfer_cost=args.transfer_cost, wait_cost=args.wait_cost,
+                          sequencing=args.sequencing, jobs=args.jobs,
+                          time_limit=args.time_limit, solver_path=args.solver_path)
+    print_network(inst, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Modo portafolio: varias configuraciones compiten en paralelo sobre la misma
+instancia y se queda el mejor resultado.
+
+Cada configuración corre en su propio proceso (y grupo de procesos, para
+poder matar también a su CBC):
+    - "mip": build_model con sus opciones (bigM, preprocess) y una semilla
+      de CBC (randomCbcSeed); todas parten del mismo incumbente heurístico
+      (warmStart);
+    - "heuristic": greedy + búsqueda local + DP (heuristics.py).
+
+El proceso principal sigue los logs de todos: el mejor incumbente y la
+mejor cota se combinan entre configuraciones. Cuando una configuración
+exacta prueba optimalidad, o el mejor resultado entregado alcanza la mejor
+cota de las demás, se cancelan las que siguen corriendo.
+
+Las configuraciones con "exact": False (p.ej. un bigM más chico que el
+válido) restringen el modelo: aportan incumbentes pero no cota.
+
+Uso:
+    python portfolio.py 4 --time-limit 60
+"""
+
+import argparse
+import os
+import queue
+import signal
+import time
+
+# Configuraciones por defecto
+DEFAULT_PORTFOLIO = [
+    {"name": "base", "kind": "mip"},
+    {"name": "preproceso", "kind": "mip", "preprocess": True},
+    {"name": "semilla-1", "kind": "mip", "seed": 1},
+    {"name": "preproceso-semilla-2", "kind": "mip", "preprocess": True, "seed": 2},
+    {"name": "bigM-jornada", "kind": "mip", "bigM": 24 * 60, "exact": False},
+    {"name": "heuristica", "kind": "heuristic", "time_budget": 2.0},
+]
+
+
+def _solution_from_schedule(schedule, n, m, p, d, H):
+    """Solución en el formato de solve_instance a partir de un schedule."""
+    start = schedule["start"]
+    return {
+        "x_sol": {(i, o): 1.0 if schedule["room"][i] == o else 0.0
+                  for i in range(n) for o in range(m)},
+        "S_sol": {i: start[i] for i in range(n)},
+        "C_sol": {i: start[i] + p[i] for i in range(n)},
+        "u_sol": {i: max(0.0, start[i] + p[i] - d[i]) for i in range(n)},
+        "O_total": m * H - sum(p),
+    }
+
+
+def _run_config(config, inst, warm, time_limit, solver_path, out):
+    """
+    Ejecuta una configuración (en un proceso aparte) y deja en la cola
+    ("progress", nombre, punto) durante la resolución y ("done", nombre,
+    resultado) al terminar.
+    """
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    name = config["name"]
+    n, m, p, w, d = inst["n"], inst["m"], inst["p"], inst["w"], inst["d"]
+    t0 = time.perf_counter()
+
+    if config["kind"] == "heuristic":
+        from heuristics import heuristic_schedule
+        from schedule import evaluate
+
+        sched = heuristic_schedule(n, m, p, w, d, inst["init"],
+                                   time_budget=config.get("time_budget", 0.5))
+        obj = evaluate(sched, p, w, d, inst["H"], m)["objective"]
+        out.put(("done", name, {
+            "status": "Heuristic", "objective": obj, "bound": None, "optimal": False,
+            "elapsed": time.perf_counter() - t0,
+            "solution": _solution_from_schedule(sched, n, m, p, d, inst["H"]),
+        }))
+        return
+
+    from pulp import LpStatus, value
+    from FirstOptCode import build_model, get_solver, set_initial_solution
+    from cbc_log import solve_with_log
+    import instances
+
+    prob, x, z, S_i, C_i, u, O_total = build_model(
+        *instances.instance_args(inst), bigM=config.get("bigM", 10000),
+        preprocess=config.get("preprocess", False))
+    if warm is not None:
+        set_initial_solution(x, z, S_i, C_i, u, warm, p, d)
+    options = []
+    if "seed" in config:
+        options.append(f"randomCbcSeed {config['seed']}")
+    solver = get_solver(solver_path, timeLimit=time_limit, msg=False, threads=1,
+                        warmStart=warm is not None, options=options)
+    log = solve_with_log(prob, solver,
+                         progress=lambda ev: out.put(("progress", name, ev)))
+    summary = log.summary()
+
+    obj = value(prob.objective) if summary["objective"] is not None else None
+    solution = None
+    if obj is not None:
+        solution = {
+            "x_sol": {(i, o): value(x[i][o]) for i in range(n) for o in range(m)},
+            "S_sol": {i: value(S_i[i]) for i in range(n)},
+            "C_sol": {i: value(C_i[i]) for i in range(n)},
+            "u_sol": {i: value(u[i]) for i in range(n)},
+            "O_total": value(O_total),
+        }
+    out.put(("done", name, {
+        # pulp informa Optimal aunque CBC se haya detenido por tiempo
+        "status": summary["result"] or LpStatus[prob.status],
+        "objective": obj, "bound": summary["bound"],
+        "optimal": summary["result"] == "Optimal solution found",
+        "elapsed": time.perf_counter() - t0, "solution": solution,
+    }))
+
+
+def _cancel(proc):
+    """Termina el proceso y su CBC (mismo grupo de procesos)."""
+    if not proc.is_alive():
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+    proc.join(5)
+    if proc.is_alive():
+        proc.terminate()
+        proc.join()
+
+
+def solve_portfolio(inst, configs=None, time_limit=120, solver_path=None,
+                    rel_gap=1e-6, verbose=False):
+    """
+    Corre las configuraciones en paralelo sobre inst (dict de instances.py).
+
+    Retorna dict con:
+        winner: nombre de la configuración con el mejor resultado
+        status, objective, bound, proven (optimalidad probada, propia o
+        combinada), elapsed y solution (formato de solve_instance)
+        runs: nombre -> status, objective, bound, elapsed, cancelled
+    """
+    import multiprocessing
+    from heuristics import heuristic_schedule
+    from cbc_log import compute_gap
+
+    if configs is None:
+        configs = DEFAULT_PORTFOLIO
+    t0 = time.perf_counter()
+
+    # incumbente común para todos los MIP
+    warm = heuristic_schedule(inst["n"], inst["m"], inst["p"], inst["w"], inst["d"],
+                              inst["init"], time_budget=0.1)
+
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    procs = {}
+    for config in configs:
+        proc = ctx.Process(target=_run_config,
+                           args=(config, inst, warm, time_limit, solver_path, out),
+                           daemon=True)
+        proc.start()
+        procs[config["name"]] = proc
+    exact = {c["name"]: c.get("exact", True) and c["kind"] == "mip" for c in configs}
+
+    runs = {c["name"]: {"status": None, "objective": None, "bound": None,
+                        "elapsed": None, "cancelled": False} for c in configs}
+    results = {}
+    best_bound = None
+    proven = False
+    hard_deadline = time.perf_counter() + time_limit + 60
+
+    while len(results) < len(configs) and time.perf_counter() < hard_deadline:
+        try:
+            kind, name, data = out.get(timeout=0.5)
+        except queue.Empty:
+            if not any(p.is_alive() for n, p in procs.items() if n not in results):
+                break
+            continue
+
+        if kind == "progress":
+            if exact[name] and data["bound"] is not None:
+                best_bound = data["bound"] if best_bound is None else max(best_bound, data["bound"])
+            if verbose:
+                print(f"[{time.perf_counter() - t0:7.1f}s] {name}: "
+                      f"incumbente={data['incumbent']} cota={data['bound']}")
+            continue
+
+        results[name] = data
+        runs[name].update({k: data[k] for k in ("status", "objective", "bound", "elapsed")})
+        if exact[name] and data["bound"] is not None:
+            best_bound = data["bound"] if best_bound is None else max(best_bound, data["bound"])
+        if verbose:
+            print(f"[{time.perf_counter() - t0:7.1f}s] {name} terminó: "
+                  f"{data['status']} objetivo={data['objective']}")
+
+        best = min((r["objective"] for r in results.values()
+                    if r["objective"] is not None), default=None)
+        gap = compute_gap(best, best_bound)
+        if (exact[name] and data["optimal"]) or (gap is not None and gap <= rel_gap):
+            proven = True
+            break
+
+    for name, proc in procs.items():
+        if name not in results:
+            runs[name]["cancelled"] = True
+        _cancel(proc)
+
+    finished = [(r["objective"], r["elapsed"], name) for name, r in results.items()
+                if r["objective"] is not None]
+    if not finished:
+        return {"winner": None, "status": "Not Solved", "objective": None,
+                "bound": best_bound, "proven": False,
+                "elapsed": time.perf_counter() - t0, "solution": None, "runs": runs}
+
+    objective, _, winner = min(finished)
+    return {
+        "winner": winner,
+        "status": "Optimal" if proven else results[winner]["status"],
+        "objective": objective,
+        "bound": best_bound,
+        "proven": proven,
+        "elapsed": time.perf_counter() - t0,
+        "solution": results[winner]["solution"],
+        "runs": runs,
+    }
+
+
+def print_record(record):
+    print(f"Ganador: {record['winner']}  Estado: {record['status']}  "
+          f"Objetivo: {record['objective']}  Cota: {record['bound']}  "
+          f"Tiempo: {record['elapsed']:.1f}s")
+    print(f"{'Configuración':<24} {'Estado':<24} {'Objetivo':>12} {'Tiempo(s)':>10}")
+    for name, run in record["runs"].items():
+        status = "cancelada" if run["cancelled"] else run["status"]
+        obj = f"{run['objective']:.2f}" if run["objective"] is not None else "-"
+        elapsed = f"{run['elapsed']:.1f}" if run["elapsed"] is not None else "-"
+        print(f"{name:<24} {status[:24]:<24} {obj:>12} {elapsed:>10}")
+
+
+def main(argv=None):
+    import instances
+
+    parser = argparse.ArgumentParser(description="Portafolio de configuraciones en paralelo")
+    parser.add_argument("instance", type=int, help="instancia de FirstOptCode (1..10)")
+    parser.add_argument("--time-limit", type=int, default=120)
+    parser.add_argument("--solver-path", default=None)
+    args = parser.parse_args(argv)
+
+    record = solve_portfolio(instances.first_instance(args.instance),
+                             time_limit=args.time_limit, solver_path=args.solver_path,
+                             verbose=True)
+    print_record(record)
+
+
+if __name__ == "__main__":
+    main()
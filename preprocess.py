@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Preprocesamiento antes de construir el modelo: relaciones de dominancia y
+ventanas de tiempo que permiten no crear parte de las variables z[i][j][o].
+
+Dominancia (mismo quirófano): si p_i <= p_j, w_i >= w_j y d_i <= d_j,
+existe una solución óptima en que i va antes que j. Intercambiar j ... i
+por i ... j no empeora alpha*w*C (la regla de Smith se cumple y las del
+medio se adelantan) ni el retraso (regla de Emmons), así que z[j][i][o]
+no hace falta. Las cirugías idénticas se ordenan por índice.
+
+Ventanas (con horizonte duro): j no puede ir antes que i en el mismo
+quirófano si es_j + p_j + p_i > lc_i. Si ningún orden cabe, i y j no
+pueden compartir quirófano.
+
+Uso:
+    python preprocess.py                 # reporte para las instancias 1..10
+    python preprocess.py 1 4 --horizon hard
+"""
+
+import argparse
+
+
+def dominance_pairs(n, p, w, d):
+    """Pares (i, j) tales que i va antes que j si comparten quirófano."""
+    pairs = set()
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                continue
+            if p[i] <= p[j] and w[i] >= w[j] and d[i] <= d[j]:
+                identical = p[i] == p[j] and w[i] == w[j] and d[i] == d[j]
+                if not identical or i < j:
+                    pairs.add((i, j))
+    return pairs
+
+
+def window_pairs(n, p, es, lc):
+    """
+    Pares (i, j) en que j no puede ir antes que i dentro de las ventanas.
+    """
+    pairs = set()
+    for i in range(n):
+        for j in range(n):
+            if i != j and es[j] + p[j] + p[i] > lc[i]:
+                pairs.add((i, j))
+    return pairs
+
+
+def preprocess_instance(n, m, p, w, d, init, H, room_ready=None, horizon=None):
+    """
+    Retorna dict con:
+        es, lc, capacity: ventanas de tiempo (FirstOptCode.time_windows)
+        precedes: pares (i, j) con i antes que j si comparten quirófano
+        apart: pares i < j que no pueden compartir quirófano
+        stats: z totales y eliminadas por dominancia y por ventanas
+    """
+    from FirstOptCode import time_windows
+
+    es, lc, capacity = time_windows(n, m, p, init, H, room_ready, horizon)
+    dom = dominance_pairs(n, p, w, d)
+    win = window_pairs(n, p, es, lc)
+
+    # orden forzado por las ventanas; si ningún orden cabe, van separadas
+    forced = {(i, j) for (i, j) in win if (j, i) not in win}
+    apart = {(i, j) for (i, j) in win if i < j and (j, i) in win}
+    # la solución óptima de la dominancia es factible, así que si contradice
+    # un orden forzado esas dos cirugías no comparten quirófano
+    apart |= {(min(i, j), max(i, j)) for (i, j) in dom if (j, i) in forced}
+    precedes = {(i, j) for (i, j) in forced | dom
+                if (min(i, j), max(i, j)) not in apart}
+
+    total = n * (n - 1) * m
+    by_window = (len(precedes & forced) + 2 * len(apart)) * m
+    by_dominance = len(precedes - forced) * m
+    return {
+        "es": es, "lc": lc, "capacity": capacity,
+        "precedes": precedes, "apart": apart,
+        "stats": {"z_total": total, "z_dominancia": by_dominance,
+                  "z_ventanas": by_window, "z_eliminadas": by_dominance + by_window},
+    }
+
+
+def allowed_order(pre, i, j):
+    """True si i puede ir antes que j en un mismo quirófano."""
+    return (j, i) not in pre["precedes"] and (min(i, j), max(i, j)) not in pre["apart"]
+
+
+def report(instance_types=range(1, 11), horizon=None):
+    """Imprime cuántas z se eliminan en cada instancia de FirstOptCode."""
+    from FirstOptCode import generate_instance_data
+
+    rows = []
+    print(f"{'Inst':>4} {'n':>4} {'m':>4} {'z total':>9} {'dominancia':>11} "
+          f"{'ventanas':>9} {'eliminadas(%)':>14}")
+    for k in instance_types:
+        n, m, p, w, d, names, init, H = generate_instance_data(k)
+        try:
+            st = preprocess_instance(n, m, p, w, d, init, H, horizon=horizon)["stats"]
+        except ValueError as e:
+            print(f"{k:>4} {n:>4} {m:>4}  {e}")
+            continue
+        pct = 100 * st["z_eliminadas"] / st["z_total"] if st["z_total"] else 0.0
+        print(f"{k:>4} {n:>4} {m:>4} {st['z_total']:>9} {st['z_dominancia']:>11} "
+              f"{st['z_ventanas']:>9} {pct:>14.1f}")
+        rows.append((k, st))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Variables z eliminadas por preprocesamiento")
+    parser.add_argument("instances", nargs="*", type=int, default=list(range(1, 11)))
+    parser.add_argument("--horizon", choices=["hard", "overtime"], default=None)
+    args = parser.parse_args(argv)
+    report(args.instances, horizon=args.horizon)
+
+
+if __name__ == "__main__":
+    main()
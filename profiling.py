@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Medición de tiempos por fase del pipeline (generación de la instancia,
+creación de variables, cada familia de restricciones, función objetivo,
+escritura del modelo, CBC y extracción de la solución).
+
+Es opcional: build_model y solve_instance reciben timer=None y en ese caso
+no se mide nada. Con un PhaseTimer se obtiene una tabla resumen y un
+archivo de traza (formato Chrome trace, se abre en chrome://tracing o
+https://ui.perfetto.dev).
+
+Uso:
+    python profiling.py 1 4 --cprofile --memory --out perfiles
+"""
+
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class PhaseTimer:
+    """
+    Registra intervalos (spans) con nombre. Los spans pueden anidarse; en el
+    resumen se reporta el tiempo total y el tiempo propio (sin hijos).
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.spans = []
+        self._stack = []
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, **meta):
+        rec = {
+            "name": name,
+            "label": self.label,
+            "start": time.perf_counter() - self._t0,
+            "duration": None,
+            "children": 0.0,
+            "meta": meta,
+        }
+        parent = self._stack[-1] if self._stack else None
+        self.spans.append(rec)
+        self._stack.append(rec)
+        try:
+            yield rec
+        finally:
+            self._stack.pop()
+            rec["duration"] = time.perf_counter() - self._t0 - rec["start"]
+            if parent is not None:
+                parent["children"] += rec["duration"]
+
+    def wrap(self, func, name):
+        """
+        Envuelve una función para que cada llamada quede registrada como span.
+        """
+        def timed(*args, **kwargs):
+            with self.span(name):
+                return func(*args, **kwargs)
+        return timed
+
+    def set_label(self, label):
+        """Etiqueta (p.ej. la instancia) que se asocia a los spans siguientes."""
+        self.label = label
+
+    def totals(self):
+        """
+        Agrega por (etiqueta, fase): número de llamadas, tiempo total y propio.
+        Respeta el orden en que aparecen las fases.
+        """
+        agg = {}
+        for rec in self.spans:
+            if rec["duration"] is None:
+                continue
+            key = (rec["label"], rec["name"])
+            row = agg.setdefault(key, {"calls": 0, "total": 0.0, "self": 0.0})
+            row["calls"] += 1
+            row["total"] += rec["duration"]
+            row["self"] += rec["duration"] - rec["children"]
+        return agg
+
+    def summary_table(self):
+        """
+        Tabla de texto con el tiempo por fase y su porcentaje (sobre el tiempo
+        propio total de cada etiqueta).
+        """
+        agg = self.totals()
+        per_label = {}
+        for (label, _), row in agg.items():
+            per_label[label] = per_label.get(label, 0.0) + row["self"]
+
+        lines = [f"{'Instancia':<12} {'Fase':<34} {'Llam.':>6} {'Total(s)':>10} "
+                 f"{'Propio(s)':>10} {'%':>6}"]
+        lines.append("-" * len(lines[0]))
+        for (label, name), row in agg.items():
+            total = per_label[label] or 1.0
+            lines.append(
+                f"{str(label or ''):<12} {name:<34} {row['calls']:>6} "
+                f"{row['total']:>10.4f} {row['self']:>10.4f} "
+                f"{100 * row['self'] / total:>5.1f}%"
+            )
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        """
+        Guarda los spans en formato Chrome trace (eventos "X", en microsegundos).
+        Cada etiqueta aparece como un hilo distinto.
+        """
+        labels = []
+        events = []
+        for rec in self.spans:
+            if rec["duration"] is None:
+                continue
+            if rec["label"] not in labels:
+                labels.append(rec["label"])
+            events.append({
+                "name": rec["name"],
+                "ph": "X",
+                "ts": rec["start"] * 1e6,
+                "dur": rec["duration"] * 1e6,
+                "pid": 0,
+                "tid": labels.index(rec["label"]),
+                "args": {k: v for k, v in rec["meta"].items()},
+            })
+        for tid, label in enumerate(labels):
+            events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": tid,
+                           "args": {"name": str(label)}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events}, f)
+
+
+class _NullTimer:
+    """Timer que no mide nada (valor por defecto)."""
+
+    def span(self, name, **meta):
+        return nullcontext()
+
+    def wrap(self, func, name):
+        return func
+
+
+NULL_TIMER = _NullTimer()
+
+
+def profile_instances(instance_types, solver_path=None, timeLimit=120,
+                      cprofile=False, memory=False, out_dir="perfiles"):
+    """
+    Resuelve las instancias de FirstOptCode indicadas midiendo cada fase.
+    Opcionalmente captura cProfile (un .prof por instancia) y tracemalloc
+    (memoria máxima y líneas que más asignan).
+
+    Retorna el PhaseTimer con todos los spans.
+    """
+    import cProfile
+    import pstats
+    import tracemalloc
+    from FirstOptCode import solve_instance
+
+    os.makedirs(out_dir, exist_ok=True)
+    timer = PhaseTimer()
+
+    for inst_type in instance_types:
+        timer.set_label(f"inst-{inst_type}")
+        prof = cProfile.Profile() if cprofile else None
+        if memory:
+            tracemalloc.start()
+        if prof:
+            prof.enable()
+
+        with timer.span("total"):
+            solve_instance(inst_type, solver_path=solver_path,
+                           timeLimit=timeLimit, timer=timer)
+
+        if prof:
+            prof.disable()
+            prof_path = os.path.join(out_dir, f"inst_{inst_type}.prof")
+            prof.dump_stats(prof_path)
+            print(f"\n--- cProfile instancia {inst_type} ({prof_path}) ---")
+            pstats.Stats(prof).sort_stats("cumulative").print_stats(15)
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"\n--- tracemalloc instancia {inst_type}: "
+                  f"pico {peak / 1024 / 1024:.1f} MB ---")
+            for stat in snapshot.statistics("lineno")[:10]:
+                print(f"  {stat}")
+
+    trace_path = os.path.join(out_dir, "trace.json")
+    timer.write_trace(trace_path)
+    print("\n" + timer.summary_table())
+    print(f"\nTraza guardada en {trace_path}")
+    return timer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempos por fase de FirstOptCode")
+    parser.add_argument("instances", nargs="*", type=int, default=list(range(1, 11)))
+    parser.add_argument("--time-limit", type=int, default=120)
+    parser.add_argument("--solver-path", default=None)
+    parser.add_argument("--cprofile", action="store_true")
+    parser.add_argument("--memory", action="store_true", help="usar tracemalloc")
+    parser.add_argument("--out", default="perfiles")
+    args = parser.parse_args(argv)
+
+    profile_instances(args.instances, solver_path=args.solver_path,
+                      timeLimit=args.time_limit, cprofile=args.cprofile,
+                      memory=args.memory, out_dir=args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,11 @@ Código completo que usa SOLO las 10 instancias del informe
 en Hospitales Públicos de Chile'.
 
 Requisitos:
-    pip install pulp pandas
+    pip install pulp
 Recomendado usar Python >= 3.10 con PuLP para el manejo correcto de variables enteras.
 """
 
-from pulp import (
-    LpProblem, LpMinimize, LpVariable, LpContinuous, LpInteger,
-    lpSum, LpStatus, value, COIN_CMD
-)
 import random
-import pandas as pd
 
 def get_hospital_instances_from_report():
     """
@@ -125,6 +120,23 @@ def generate_procedure_selection():
     ]
     return procedures
 
+def get_procedure_percentages():
+    """
+    Porcentajes de cada procedimiento usados para la selección ponderada.
+    """
+    return {
+        "CL": 24,
+        "AC": 19,
+        "H":  9,
+        "AL": 7,
+        "CC": 5,
+        "Co": 2,
+        "T":  2,
+        "AV": 2,
+        "TVE":1,
+        "CM":1
+    }
+
 def generate_instance_data(instance_type, hospital_data, procedures, procedure_percentages):
     """
     Genera los datos de una instancia basada en el tipo de hospital.
@@ -180,6 +192,7 @@ def build_model(n, m, p, w, d,
     """
     Construye el modelo MIP con una formulación de secuenciación (disyuntiva lineal).
     """
+    from pulp import LpProblem, LpMinimize, LpVariable, LpContinuous, LpBinary, lpSum
 
     # Definimos el problema
     prob = LpProblem("Programacion_Cirugias_Lineal", LpMinimize)
@@ -250,23 +263,14 @@ def solve_instance(instance_type, solver_path=None):
     Construye y resuelve una instancia dada por instance_type (1..10).
     Retorna la información relevante: status, valor objetivo, soluciones, etc.
     """
+    from pulp import LpStatus, value, COIN_CMD
+
     # Obtener datos de hospitales
     hospital_data = get_hospital_instances_from_report()
 
     # Definir procedimiento y porcentajes
     procedures = generate_procedure_selection()
-    procedure_percentages = {
-        "CL": 24,
-        "AC": 19,
-        "H":  9,
-        "AL": 7,
-        "CC": 5,
-        "Co": 2,
-        "T":  2,
-        "AV": 2,
-        "TVE":1,
-        "CM":1
-    }
+    procedure_percentages = get_procedure_percentages()
 
     # Generar datos de la instancia
     n, m, p, w, d, procedure_names = generate_instance_data(
@@ -365,6 +369,7 @@ def build_model(n, m, p, w, d,
     """
     Construye el modelo MIP con una formulación de secuenciación (disyuntiva lineal).
     """
+    from pulp import LpProblem, LpMinimize, LpVariable, LpContinuous, LpBinary, lpSum
 
     # Definimos el problema
     prob = LpProblem("Programacion_Cirugias_Lineal", LpMinimize)
@@ -436,23 +441,14 @@ def solve_instance(instance_type, solver_path=None):
     Construye y resuelve una instancia dada por instance_type (1..10).
     Retorna la información relevante: status, valor objetivo, soluciones, etc.
     """
+    from pulp import LpStatus, value, COIN_CMD
+
     # Obtener datos de hospitales
     hospital_data = get_hospital_instances_from_report()
 
     # Definir procedimiento y porcentajes
     procedures = generate_procedure_selection()
-    procedure_percentages = {
-        "CL": 24,
-        "AC": 19,
-        "H":  9,
-        "AL": 7,
-        "CC": 5,
-        "Co": 2,
-        "T":  2,
-        "AV": 2,
-        "TVE":1,
-        "CM":1
-    }
+    procedure_percentages = get_procedure_percentages()
 
     # Generar datos de la instancia
     n, m, p, w, d, procedure_names = generate_instance_data(
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Reprogramación durante el día a partir de una programación existente.
+
+Eventos soportados (tuplas):
+    ("overrun", i, minutos)  la cirugía i dura `minutos` más de lo previsto
+    ("cancel", i)            la cirugía i se suspende
+
+Las cirugías que ya comenzaron (inicio < now) quedan congeladas en su
+quirófano y hora; si se suspende una en curso, su quirófano se libera en
+now. El resto se reprograma desde la hora en que cada quirófano queda libre:
+primero con la heurística (greedy + búsqueda local + orden exacto por
+quirófano con dp_sequencer, en milisegundos) y,
+opcionalmente, con el MIP de FirstOptCode partiendo de esa solución.
+
+Ejemplo:
+    result = solve_instance(1)
+    nuevo = reschedule_result(result, now=10*60, events=[("overrun", 3, 60)])
+"""
+
+import time
+
+from dp_sequencer import sequence_rooms
+from heuristics import greedy_sequences, improve_sequences, total_cost
+from schedule import (evaluate, room_sequences, schedule_from_result,
+                      schedule_from_sequences)
+
+
+def _apply_events(schedule, p, now, events):
+    """
+    Duraciones actualizadas y conjunto de cirugías suspendidas.
+    """
+    p_new = list(p)
+    cancelled = set()
+    for ev in events:
+        kind, i = ev[0], ev[1]
+        if kind == "overrun":
+            p_new[i] += ev[2]
+        elif kind == "cancel":
+            start = schedule["start"][i]
+            if start is not None and start + p_new[i] <= now:
+                # ya terminó: suspenderla no cambia nada
+                continue
+            cancelled.add(i)
+            if start is not None and start < now:
+                # suspendida en curso: termina ahora
+                p_new[i] = min(p_new[i], max(0.0, now - start))
+        else:
+            raise ValueError(f"Evento no reconocido: {ev!r}")
+    return p_new, cancelled
+
+
+def split_frozen(schedule, p, m, now, cancelled):
+    """
+    Separa las cirugías congeladas (ya iniciadas) de las pendientes y calcula
+    desde qué hora queda libre cada quirófano.
+    Retorna (frozen, pending, ready).
+    """
+    frozen = []
+    pending = []
+    ready = [now] * m
+    for i, o in enumerate(schedule["room"]):
+        if o is None:
+            continue
+        start = schedule["start"][i]
+        if start < now:
+            frozen.append(i)
+            ready[o] = max(ready[o], start + p[i])
+        elif i not in cancelled:
+            pending.append(i)
+    return frozen, pending, ready
+
+
+def _mip_repair(pending, seqs, ready, p, w, d, H, now, m, alpha, beta, gamma,
+                time_limit, solver_path):
+    """
+    Reoptimiza las pendientes con build_model (disponibilidad por quirófano)
+    partiendo de la solución heurística. Retorna las secuencias o None.
+    """
+    from pulp import value
+    from FirstOptCode import build_model, get_solver, set_initial_solution
+
+    k = len(pending)
+    local = {j: a for a, j in enumerate(pending)}
+    pp = [p[j] for j in pending]
+    ww = [w[j] for j in pending]
+    dd = [d[j] for j in pending]
+    names = [str(j) for j in pending]
+
+    prob, x, z, S_i, C_i, u, O_total = build_model(
+        k, m, pp, ww, dd, names, now, H,
+        alpha=alpha, beta=beta, gamma=gamma, room_ready=ready
+    )
+
+    # Warm start con la heurística
+    warm = schedule_from_sequences(
+        [[local[j] for j in seq] for seq in seqs], ready, k, pp)
+    set_initial_solution(x, z, S_i, C_i, u, warm, pp, dd)
+
+    solver = get_solver(solver_path, timeLimit=time_limit, msg=False, warmStart=True)
+    prob.solve(solver)
+    if value(prob.objective) is None:
+        return None
+
+    new_seqs = [[] for _ in range(m)]
+    for a, j in enumerate(pending):
+        o = max(range(m), key=lambda o: value(x[a][o]) or 0)
+        new_seqs[o].append((value(S_i[a]), j))
+    return [[j for _, j in sorted(seq)] for seq in new_seqs]
+
+
+def reschedule(schedule, p, w, d, H, m, now, events=(),
+               alpha=0.5, beta=1.0, gamma=0.5,
+               latency_target=0.5, use_mip=False, mip_time_limit=10,
+               solver_path=None):
+    """
+    Repara un schedule (ver schedule.py) ante los eventos, a la hora now.
+
+    latency_target: segundos para la búsqueda local de la heurística.
+    use_mip: si es True, intenta mejorar con el MIP (warm start) durante
+    mip_time_limit segundos; se queda con lo mejor de ambos.
+
+    Retorna un dict con el nuevo schedule (room, start), las duraciones
+    actualizadas p, las listas frozen / cancelled, la evaluación del
+    objetivo, el método que dio la solución y el tiempo empleado.
+    """
+    t0 = time.perf_counter()
+    p_new, cancelled = _apply_events(schedule, p, now, events)
+    frozen, pending, ready = split_frozen(schedule, p_new, m, now, cancelled)
+
+    # Candidato 1: mantener asignación y orden, corriendo las horas
+    keep = [[j for j in seq if j in pending] for seq in room_sequences(schedule, m)]
+    # Candidato 2: greedy desde cero sobre las pendientes
+    greedy = greedy_sequences(pending, ready, p_new, w, d, alpha, gamma)
+    seqs = min((keep, greedy),
+               key=lambda s: total_cost(s, ready, p_new, w, d, alpha, gamma))
+    remaining = max(0.0, latency_target - (time.perf_counter() - t0))
+    seqs = improve_sequences([list(s) for s in seqs], ready, p_new, w, d,
+                             alpha, gamma, time_budget=remaining)
+    seqs = sequence_rooms(seqs, ready, p_new, w, d, alpha, gamma)
+    method = "heuristic"
+
+    if use_mip and pending:
+        mip_seqs = _mip_repair(pending, seqs, ready, p_new, w, d, H, now, m,
+                               alpha, beta, gamma, mip_time_limit, solver_path)
+        if mip_seqs is not None and (
+                total_cost(mip_seqs, ready, p_new, w, d, alpha, gamma)
+                < total_cost(seqs, ready, p_new, w, d, alpha, gamma) - 1e-6):
+            seqs = mip_seqs
+            method = "mip"
+
+    n = len(p)
+    new = schedule_from_sequences(seqs, ready, n, p_new)
+    for i in frozen:
+        new["room"][i] = schedule["room"][i]
+        new["start"][i] = schedule["start"][i]
+
+    return {
+        "room": new["room"],
+        "start": new["start"],
+        "p": p_new,
+        "frozen": frozen,
+        "cancelled": sorted(cancelled),
+        "evaluation": evaluate(new, p_new, w, d, H, m, alpha, beta, gamma),
+        "method": method,
+        "elapsed": time.perf_counter() - t0,
+    }
+
+
+def reschedule_result(result, now, events=(), **kwargs):
+    """
+    Igual que reschedule pero recibe directamente la tupla de
+    FirstOptCode.solve_instance.
+    """
+    (status, obj, x_sol, S_sol, C_sol, u_sol, O_total,
+     n, m, p, w, d, procedure_names, init, H) = result[:15]
+    schedule = schedule_from_result(result)
+    return reschedule(schedule, p, w, d, H, m, now, events, **kwargs)
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de escenarios "qué pasa si" sobre una instancia base.
+
+Un escenario es una lista de perturbaciones que se aplican en orden sobre
+la instancia base (dict de instances.py). Cada perturbación es un dict:
+    {"kind": "duration", "procedure": "Co", "factor": 1.2}   # +20% duración
+    {"kind": "deadline", "procedure": None, "delta": -60}    # todas, -60 min
+    {"kind": "priority", "procedure": "H", "value": 3}
+    {"kind": "rooms", "delta": 1}                            # un quirófano más
+procedure=None aplica a todas las cirugías; si no, a las del procedimiento
+(el nombre sin el sufijo numérico: "Co2" cuenta como "Co").
+
+Escenarios que terminan con los mismos datos (m, p, w, d) se resuelven una
+sola vez: p. ej. "+20% a Co" en una instancia sin colectomías es la base.
+Cada escenario único parte de las secuencias de la solución base (las de
+quirófanos que se cierran se reparten entre los demás) y se mejora con
+búsqueda local + orden exacto por quirófano (método "warm"), o se
+resuelve con bnb.solve_bnb (método "bnb"). Los escenarios corren en
+paralelo en procesos.
+
+Retorna una tabla con el objetivo y los KPIs de validation.check de cada
+escenario y sus diferencias con la base.
+
+Uso:
+    python scenarios.py 4 "rooms:+1" "dur:Co:+20%" "dur:*:+10%" "deadline:CL:-60"
+    python scenarios.py 3 --set hosp --sweep --workers 4
+"""
+
+import argparse
+import re
+import time
+
+KPIS = ("total_tardiness", "late_surgeries", "total_overtime", "makespan",
+        "mean_utilization")
+
+
+def procedure_kind(name):
+    """Nombre del procedimiento sin el sufijo numérico ("CL3" -> "CL")."""
+    return re.sub(r"\d+$", "", name)
+
+
+def parse_perturbation(text):
+    """
+    Perturbación desde texto:
+        dur:<proc|*>:<+20%|-10%|+30>     (porcentaje o minutos)
+        deadline:<proc|*>:<+60|-60>
+        prio:<proc|*>:<valor>
+        rooms:<+1|-1>
+    """
+    parts = text.split(":")
+    kind = parts[0]
+    if kind == "rooms" and len(parts) == 2:
+        return {"kind": "rooms", "delta": int(parts[1])}
+    if len(parts) != 3:
+        raise ValueError(f"perturbación inválida: {text!r}")
+    proc = None if parts[1] in ("*", "") else parts[1]
+    if kind == "dur":
+        if parts[2].endswith("%"):
+            return {"kind": "duration", "procedure": proc,
+                    "factor": 1 + float(parts[2][:-1]) / 100}
+        return {"kind": "duration", "procedure": proc, "delta": int(parts[2])}
+    if kind == "deadline":
+        return {"kind": "deadline", "procedure": proc, "delta": int(parts[2])}
+    if kind == "prio":
+        return {"kind": "priority", "procedure": proc, "value": int(parts[2])}
+    raise ValueError(f"perturbación inválida: {text!r}")
+
+
+def parse_scenario(text):
+    """Varias perturbaciones separadas por '+' con espacios: "rooms:+1 + dur:Co:+20%"."""
+    return [parse_perturbation(part.strip()) for part in text.split(" + ")]
+
+
+def apply_scenario(inst, perturbations):
+    """Instancia nueva con las perturbaciones aplicadas (inst no se modifica)."""
+    import instances
+
+    m = inst["m"]
+    p, w, d = list(inst["p"]), list(inst["w"]), list(inst["d"])
+    kinds = [procedure_kind(name) for name in inst["procedure_names"]]
+    for pert in perturbations:
+        if pert["kind"] == "rooms":
+            m += pert["delta"]
+            if m < 1:
+                raise ValueError("el escenario deja la instancia sin quirófanos")
+            continue
+        target = [i for i in range(inst["n"])
+                  if pert.get("procedure") is None or kinds[i] == pert["procedure"]]
+        for i in target:
+            if pert["kind"] == "duration":
+                p[i] = max(1, round(p[i] * pert.get("factor", 1.0) + pert.get("delta", 0)))
+            elif pert["kind"] == "deadline":
+                d[i] += pert["delta"]
+            elif pert["kind"] == "priority":
+                w[i] = pert["value"]
+            else:
+                raise ValueError(f"tipo de perturbación desconocido: {pert['kind']!r}")
+    return instances.make_instance(inst["name"], inst["n"], m, p, w, d,
+                                   inst["procedure_names"], inst["init"], inst["H"])
+
+
+def scenario_key(inst):
+    """Clave de deduplicación: los datos que cambian el problema."""
+    return (inst["m"], tuple(inst["p"]), tuple(inst["w"]), tuple(inst["d"]))
+
+
+def _kpis(schedule, inst, alpha, beta, gamma):
+    from schedule import evaluate
+    from validation import check, schedule_arrays
+
+    p, w, d, m = inst["p"], inst["w"], inst["d"], inst["m"]
+    report = check(schedule_arrays(schedule, p, w, d, m, inst["init"], inst["H"]))
+    kpi = report["kpi"]
+    row = {"objective": evaluate(schedule, p, w, d, inst["H"], m,
+                                 alpha, beta, gamma)["objective"],
+           "ok": report["ok"]}
+    for k in KPIS[:-1]:
+        row[k] = kpi[k]
+    row["mean_utilization"] = sum(kpi["utilization"]) / m
+    return row
+
+
+def _warm_seqs(base_seqs, inst):
+    """Secuencias base adaptadas a los quirófanos del escenario."""
+    m, p = inst["m"], inst["p"]
+    seqs = [list(seq) for seq in base_seqs[:m]] + [[] for _ in range(m - len(base_seqs))]
+    for seq in base_seqs[m:]:
+        for j in seq:
+            o = min(range(m), key=lambda o: sum(p[i] for i in seqs[o]))
+            seqs[o].append(j)
+    return seqs
+
+
+def _solve_one(inst, base_seqs, method, time_budget, alpha, beta, gamma):
+    """Resuelve un escenario; se ejecuta en los procesos del pool."""
+    from dp_sequencer import sequence_rooms
+    from heuristics import improve_sequences
+    from schedule import schedule_from_sequences
+
+    t0 = time.perf_counter()
+    if method == "bnb":
+        from bnb import solve_bnb
+
+        res = solve_bnb(inst, time_limit=time_budget, alpha=alpha, beta=beta, gamma=gamma)
+        schedule, proven = res["schedule"], res["proven"]
+    else:
+        ready = [inst["init"]] * inst["m"]
+        p, w, d = inst["p"], inst["w"], inst["d"]
+        seqs = _warm_seqs(base_seqs, inst)
+        seqs = improve_sequences(seqs, ready, p, w, d, alpha, gamma, time_budget)
+        seqs = sequence_rooms(seqs, ready, p, w, d, alpha, gamma)
+        schedule, proven = schedule_from_sequences(seqs, ready, inst["n"], p), False
+    row = _kpis(schedule, inst, alpha, beta, gamma)
+    row["proven"] = proven
+    row["elapsed"] = time.perf_counter() - t0
+    return row
+
+
+def run_scenarios(inst, scenarios, labels=None, method="warm", time_budget=0.5,
+                  base_budget=None, workers=1, alpha=0.5, beta=1.0, gamma=0.5):
+    """
+    Evalúa los escenarios (listas de perturbaciones) contra la base.
+
+    Retorna dict con base (fila de la base), rows (una fila por escenario,
+    en el orden de entrada, con label, las columnas de _kpis, las
+    diferencias "delta_<kpi>" y same_as si repite otro escenario), unique
+    (escenarios resueltos) y elapsed.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from schedule import room_sequences
+
+    t0 = time.perf_counter()
+    if labels is None:
+        labels = [f"escenario {k + 1}" for k in range(len(scenarios))]
+    if base_budget is None:
+        base_budget = max(time_budget, 5.0) if method == "warm" else time_budget
+
+    # Base: heurística completa (o bnb) y sus secuencias como arranque
+    if method == "bnb":
+        from bnb import solve_bnb
+
+        base_schedule = solve_bnb(inst, time_limit=base_budget, alpha=alpha,
+                                  beta=beta, gamma=gamma)["schedule"]
+    else:
+        from heuristics import heuristic_schedule
+
+        base_schedule = heuristic_schedule(inst["n"], inst["m"], inst["p"], inst["w"],
+                                           inst["d"], inst["init"], alpha, gamma,
+                                           base_budget)
+    base_seqs = room_sequences(base_schedule, inst["m"])
+    base = _kpis(base_schedule, inst, alpha, beta, gamma)
+    base_key = scenario_key(inst)
+
+    # Deduplicación por datos resultantes
+    keys, unique, first = [], [], {}
+    for k, perts in enumerate(scenarios):
+        scen = apply_scenario(inst, perts)
+        key = scenario_key(scen)
+        keys.append(key)
+        if key != base_key and key not in first:
+            first[key] = k
+            unique.append(scen)
+
+    args = (base_seqs, method, time_budget, alpha, beta, gamma)
+    if workers > 1 and len(unique) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk = max(1, len(unique) // (4 * workers))
+            solved = list(pool.map(_solve_one, unique, *[[a] * len(unique) for a in args],
+                                   chunksize=chunk))
+    else:
+        solved = [_solve_one(scen, *args) for scen in unique]
+    results = {scenario_key(scen): row for scen, row in zip(unique, solved)}
+
+    rows = []
+    for k, key in enumerate(keys):
+        row = dict(base) if key == base_key else dict(results[key])
+        row["label"] = labels[k]
+        row["same_as"] = ("base" if key == base_key
+                          else None if first[key] == k else labels[first[key]])
+        for col in ("objective",) + KPIS:
+            row[f"delta_{col}"] = row[col] - base[col]
+        rows.append(row)
+    return {"base": base, "rows": rows, "unique": len(unique),
+            "elapsed": time.perf_counter() - t0}
+
+
+def sweep(inst, factors=(0.9, 1.1, 1.2), deadline_deltas=(-60, 60), room_deltas=(-1, 1)):
+    """
+    Barrido típico: factor de duración y corrimiento de deadline por cada
+    procedimiento, cambios en la cantidad de quirófanos y sus combinaciones.
+    Retorna (scenarios, labels).
+    """
+    procs = sorted({procedure_kind(name) for name in inst["procedure_names"]})
+    singles = []
+    for proc in procs + [None]:
+        name = proc or "todas"
+        for f in factors:
+            singles.append(([{"kind": "duration", "procedure": proc, "factor": f}],
+                            f"dur {name} {100 * (f - 1):+.0f}%"))
+        for dd in deadline_deltas:
+            singles.append(([{"kind": "deadline", "procedure": proc, "delta": dd}],
+                            f"deadline {name} {dd:+d}"))
+    rooms = [([{"kind": "rooms", "delta": dm}], f"quirófanos {dm:+d}")
+             for dm in room_deltas if inst["m"] + dm >= 1]
+    combos = [(r + s, f"{rl} y {sl}") for r, rl in rooms for s, sl in singles]
+    pairs = singles + rooms + combos
+    return [s for s, _ in pairs], [label for _, label in pairs]
+
+
+def format_table(res, sort=False):
+    """Tabla de texto con objetivo, KPIs y diferencias contra la base."""
+    base = res["base"]
+    lines = [f"{'escenario':<38} {'objetivo':>10} {'Δobj':>9} {'Δ%':>7} "
+             f"{'Δretraso':>9} {'Δatras.':>7} {'Δsobret.':>9} {'Δutil':>7}",
+             f"{'base':<38} {base['objective']:>10.1f} {'':>9} {'':>7} "
+             f"{'':>9} {'':>7} {'':>9} {'':>7}"]
+    rows = res["rows"]
+    if sort:
+        rows = sorted(rows, key=lambda r: r["delta_objective"])
+    for r in rows:
+        pct = 100 * r["delta_objective"] / base["objective"] if base["objective"] else 0.0
+        note = f"  (= {r['same_as']})" if r["same_as"] else ""
+        lines.append(f"{r['label'][:38]:<38} {r['objective']:>10.1f} "
+                     f"{r['delta_objective']:>+9.1f} {pct:>+6.1f}% "
+                     f"{r['delta_total_tardiness']:>+9.0f} {r['delta_late_surgeries']:>+7d} "
+                     f"{r['delta_total_overtime']:>+9.0f} "
+                     f"{100 * r['delta_mean_utilization']:>+6.1f}%{note}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    import instances
+
+    parser = argparse.ArgumentParser(description="Escenarios qué-pasa-si sobre una instancia")
+    parser.add_argument("instance", type=int, nargs="?", default=1)
+    parser.add_argument("scenarios", nargs="*",
+                        help='p. ej. "rooms:+1", "dur:Co:+20%%", "rooms:+1 + dur:*:+10%%"')
+    parser.add_argument("--set", choices=["first", "hosp"], default="first")
+    parser.add_argument("--sweep", action="store_true", help="barrido estándar (sweep)")
+    parser.add_argument("--method", choices=["warm", "bnb"], default="warm")
+    parser.add_argument("--budget", type=float, default=0.5,
+                        help="segundos por escenario")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sort", action="store_true", help="ordenar por Δobjetivo")
+    args = parser.parse_args(argv)
+
+    if args.set == "first":
+        inst = instances.first_instance(args.instance)
+    else:
+        inst = instances.hospital_instance(args.instance)
+    scenarios = [parse_scenario(text) for text in args.scenarios]
+    labels = list(args.scenarios)
+    if args.sweep:
+        more, more_labels = sweep(inst)
+        scenarios += more
+        labels += more_labels
+    if not scenarios:
+        parser.error("indique escenarios o --sweep")
+
+    res = run_scenarios(inst, scenarios, labels, method=args.method,
+                        time_budget=args.budget, workers=args.workers)
+    print(format_table(res, sort=args.sort))
+    print(f"{inst['name']}: {len(scenarios)} escenarios, {res['unique']} distintos, "
+          f"{res['elapsed']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
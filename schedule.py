@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Representación simple de una programación (schedule) y su evaluación con la
+misma función objetivo de FirstOptCode.build_model:
+
+    alpha * sum(w_i * C_i) + beta * sum_o (H - trabajo_o) + gamma * sum(retraso_i)
+
+Un schedule es un dict con dos listas de largo n:
+    room[i]:  quirófano asignado a la cirugía i (None si no está programada)
+    start[i]: hora de inicio en minutos desde medianoche (None si no está)
+"""
+
+
+def schedule_from_solution(x_sol, S_sol, n, m):
+    """
+    Arma el schedule a partir de x_sol / S_sol de solve_instance. Para cada
+    cirugía se toma el quirófano con mayor x (CBC puede dejar valores
+    fraccionarios por tolerancia, por eso no se compara con 1 exacto).
+    """
+    room = []
+    start = []
+    for i in range(n):
+        vals = [(x_sol.get((i, o)) or 0.0) for o in range(m)]
+        best = max(range(m), key=lambda o: vals[o])
+        if vals[best] > 0.5 and S_sol.get(i) is not None:
+            room.append(best)
+            start.append(S_sol[i])
+        else:
+            room.append(None)
+            start.append(None)
+    return {"room": room, "start": start}
+
+
+def schedule_from_result(result):
+    """
+    Schedule a partir de la tupla que retorna FirstOptCode.solve_instance.
+    """
+    x_sol, S_sol = result[2], result[3]
+    n, m = result[7], result[8]
+    return schedule_from_solution(x_sol, S_sol, n, m)
+
+
+def room_sequences(schedule, m):
+    """
+    Lista por quirófano con las cirugías ordenadas por hora de inicio.
+    """
+    seqs = [[] for _ in range(m)]
+    for i, o in enumerate(schedule["room"]):
+        if o is not None:
+            seqs[o].append(i)
+    for seq in seqs:
+        seq.sort(key=lambda i: schedule["start"][i])
+    return seqs
+
+
+def sequence_cost(seq, ready, p, w, d, alpha=0.5, gamma=0.5):
+    """
+    Costo (alpha*w*C + gamma*retraso) de ejecutar seq en orden, sin tiempos
+    muertos, desde el instante ready. La ociosidad no depende del orden.
+    """
+    t = ready
+    cost = 0.0
+    for j in seq:
+        t += p[j]
+        cost += alpha * w[j] * t + gamma * max(0.0, t - d[j])
+    return cost
+
+
+def evaluate(schedule, p, w, d, H, m, alpha=0.5, beta=1.0, gamma=0.5):
+    """
+    Evalúa el schedule con la función objetivo del modelo.
+    Solo se consideran las cirugías programadas (room no None).
+    """
+    weighted = 0.0
+    tardiness = 0.0
+    work = [0.0] * m
+    for i, o in enumerate(schedule["room"]):
+        if o is None:
+            continue
+        C = schedule["start"][i] + p[i]
+        weighted += w[i] * C
+        tardiness += max(0.0, C - d[i])
+        work[o] += p[i]
+    idle = sum(H - work[o] for o in range(m))
+    return {
+        "objective": alpha * weighted + beta * idle + gamma * tardiness,
+        "weighted_completion": weighted,
+        "idle": idle,
+        "tardiness": tardiness,
+    }
+
+
+def schedule_from_sequences(seqs, ready, n, p):
+    """
+    Schedule con las secuencias por quirófano ejecutadas una tras otra, sin
+    tiempos muertos, desde ready[o]. Las cirugías que no aparecen quedan en None.
+    """
+    room = [None] * n
+    start = [None] * n
+    for o, seq in enumerate(seqs):
+        t = ready[o]
+        for j in seq:
+            room[j] = o
+            start[j] = t
+            t += p[j]
+    return {"room": room, "start": start}
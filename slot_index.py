@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de huecos libres sobre la programación de los quirófanos, para
+responder "¿cuándo es el primer hueco de 225 min para una CL esta semana?"
+sin volver a resolver.
+
+Por cada (día, quirófano) se guardan las reservas como arreglos ordenados
+de inicio/fin (bisect) y los huecos libres dentro de la jornada
+[init, init + H]. Sobre todos los huecos hay dos resúmenes:
+    - un árbol de segmentos (máximo) indexado por minuto del horizonte
+      (día * 1440 + hora de inicio del hueco) con el largo del mayor hueco
+      que empieza ahí: el primer hueco donde cabe una duración es el
+      primer minuto con valor >= duración, O(log T);
+    - un árbol de segmentos (mínimo) indexado por largo: el hueco más
+      ajustado es el menor largo >= duración con huecos, O(log L).
+Al agregar o quitar una reserva solo se recalculan los huecos de su
+(día, quirófano) y se actualizan las hojas afectadas, O(g log T) con g
+los huecos de ese quirófano.
+
+Las horas están en minutos desde medianoche (como en schedule.py); las
+horas fraccionarias de CBC se redondean al minuto.
+
+Uso:
+    python slot_index.py 4 --duration 225
+    python slot_index.py 3 --set hosp --duration 90 --bench 10000
+"""
+
+import argparse
+from bisect import bisect_left, bisect_right
+
+DAY = 24 * 60
+INF = float("inf")
+
+
+class _SegTree:
+    """Árbol de segmentos iterativo sobre [0, size) con op = max o min."""
+
+    def __init__(self, size, op, fill):
+        self.n = 1
+        while self.n < size:
+            self.n *= 2
+        self.op, self.fill = op, fill
+        self.t = [fill] * (2 * self.n)
+
+    def set(self, i, v):
+        i += self.n
+        self.t[i] = v
+        i //= 2
+        while i:
+            self.t[i] = self.op(self.t[2 * i], self.t[2 * i + 1])
+            i //= 2
+
+    def query(self, lo, hi):
+        """op sobre [lo, hi)."""
+        res = self.fill
+        lo += self.n
+        hi += self.n
+        while lo < hi:
+            if lo & 1:
+                res = self.op(res, self.t[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                res = self.op(res, self.t[hi])
+            lo //= 2
+            hi //= 2
+        return res
+
+    def first_at_least(self, v, lo=0):
+        """Primer índice >= lo con valor >= v (árbol de máximos), o None."""
+        def down(node, left, right):
+            if right <= lo or self.t[node] < v:
+                return None
+            if node >= self.n:
+                return node - self.n
+            mid = (left + right) // 2
+            found = down(2 * node, left, mid)
+            return found if found is not None else down(2 * node + 1, mid, right)
+
+        return down(1, 0, self.n)
+
+
+class SlotIndex:
+    """
+    Reservas y huecos libres de m quirófanos durante `days` días.
+    m, H admiten un valor fijo o una lista por día (H=0: día sin pabellón).
+    """
+
+    def __init__(self, m, init, H, days=1):
+        as_list = lambda v: list(v) if isinstance(v, (list, tuple)) else [v] * days
+        self.days = days
+        self.m = as_list(m)
+        self.window = [(init, init + h) for h in as_list(H)]
+        if any(close > DAY for _, close in self.window):
+            raise ValueError("la jornada no puede pasar de medianoche")
+        self._rd = {}        # (día, quirófano) -> {"start": [], "end": [], "id": []}
+        self._gaps = {}      # (día, quirófano) -> [(inicio, fin)]
+        self._leaf = {}      # minuto del horizonte -> {quirófano: largo}
+        self._by_len = {}    # largo -> {(minuto, quirófano)}
+        self._bookings = {}  # id -> (día, quirófano, inicio, fin, nombre)
+        self._next_id = 0
+        self._start_tree = _SegTree(days * DAY, max, -INF)
+        self._len_tree = _SegTree(DAY + 1, min, INF)
+        for t in range(days):
+            for o in range(self.m[t]):
+                self._refresh(t, o)
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_schedule(cls, schedule, p, m, init, H, names=None, day=0, index=None):
+        """Índice (nuevo o el dado) con las cirugías del schedule en `day`."""
+        if index is None:
+            index = cls(m, init, H, days=day + 1)
+        for i, o in enumerate(schedule["room"]):
+            if o is not None:
+                index.add_booking(day, o, schedule["start"][i], p[i],
+                                  names[i] if names else i)
+        return index
+
+    @classmethod
+    def from_result(cls, result):
+        """Índice a partir de la tupla de FirstOptCode.solve_instance."""
+        from schedule import schedule_from_result
+
+        n, m, p, w, d, names, init, H = result[7:15]
+        return cls.from_schedule(schedule_from_result(result), p, m, init, H, names)
+
+    @classmethod
+    def from_plan(cls, plan, p, m, H, init=8*60):
+        """Índice de la semana (o mes) de multiday.plan_horizon."""
+        index = cls(m, init, H, days=len(plan["days"]))
+        for res in plan["days"]:
+            for i in res["items"]:
+                index.add_booking(res["day"], res["room"][i], res["start"][i], p[i], i)
+        return index
+
+    # ------------------------------------------------------------------
+    # Reservas
+    # ------------------------------------------------------------------
+
+    def add_booking(self, day, room, start, duration, name=None):
+        """
+        Reserva [start, start + duration) en (day, room). Retorna su id;
+        ValueError si se solapa con otra reserva.
+        """
+        start = round(start)
+        end = start + round(duration)
+        rd = self._rd.setdefault((day, room), {"start": [], "end": [], "id": []})
+        k = bisect_right(rd["start"], start)
+        if (k > 0 and rd["end"][k - 1] > start) or (k < len(rd["start"])
+                                                      and rd["start"][k] < end):
+            raise ValueError(f"la reserva se solapa en el día {day}, quirófano {room}")
+        bid = self._next_id
+        self._next_id += 1
+        rd["start"].insert(k, start)
+        rd["end"].insert(k, end)
+        rd["id"].insert(k, bid)
+        self._bookings[bid] = (day, room, start, end, name)
+        self._refresh(day, room)
+        return bid
+
+    def remove_booking(self, bid):
+        """Anula la reserva bid y libera su hueco."""
+        day, room, start, end, _ = self._bookings.pop(bid)
+        rd = self._rd[(day, room)]
+        k = bisect_left(rd["start"], start)
+        for key in ("start", "end", "id"):
+            del rd[key][k]
+        self._refresh(day, room)
+
+    def bookings(self, day, room):
+        """Reservas de (day, room) como lista de (inicio, fin, nombre)."""
+        rd = self._rd.get((day, room), {"id": []})
+        return [self._bookings[b][2:] for b in rd["id"]]
+
+    def _refresh(self, day, room):
+        """Recalcula los huecos de (day, room) y actualiza los resúmenes."""
+        for gap in self._gaps.pop((day, room), ()):
+            self._drop_gap(day, room, gap)
+        open_, close = self.window[day]
+        rd = self._rd.get((day, room), {"start": [], "end": []})
+        gaps, cursor = [], open_
+        for s, e in zip(rd["start"], rd["end"]):
+            if min(s, close) > cursor:
+                gaps.append((cursor, min(s, close)))
+            cursor = max(cursor, e)
+        if close > cursor:
+            gaps.append((cursor, close))
+        self._gaps[(day, room)] = gaps
+        for gap in gaps:
+            self._put_gap(day, room, gap)
+
+    def _put_gap(self, day, room, gap):
+        key, length = day * DAY + gap[0], gap[1] - gap[0]
+        leaf = self._leaf.setdefault(key, {})
+        leaf[room] = length
+        self._start_tree.set(key, max(leaf.values()))
+        bucket = self._by_len.setdefault(length, set())
+        bucket.add((key, room))
+        self._len_tree.set(length, length)
+
+    def _drop_gap(self, day, room, gap):
+        key, length = day * DAY + gap[0], gap[1] - gap[0]
+        leaf = self._leaf[key]
+        del leaf[room]
+        self._start_tree.set(key, max(leaf.values()) if leaf else -INF)
+        if not leaf:
+            del self._leaf[key]
+        bucket = self._by_len[length]
+        bucket.discard((key, room))
+        if not bucket:
+            del self._by_len[length]
+            self._len_tree.set(length, INF)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _slot(self, key, room, start=None):
+        day = key // DAY
+        gap_start = key - day * DAY
+        end = gap_start + self._leaf[key][room]
+        start = gap_start if start is None else start
+        return {"day": day, "room": room, "start": start, "gap_end": end,
+                "slack": end - start}
+
+    def _containing(self, duration, after):
+        """Huecos que empiezan antes de `after` y donde aún cabe la duración."""
+        day, t = after
+        found = []
+        for o in range(self.m[day] if day < self.days else 0):
+            gaps = self._gaps.get((day, o), [])
+            k = bisect_right(gaps, (t, INF)) - 1
+            if k >= 0 and gaps[k][0] < t and gaps[k][1] - t >= duration:
+                found.append(self._slot(day * DAY + gaps[k][0], o, t))
+        return found
+
+    def earliest_fit(self, duration, after=None):
+        """
+        Hueco que permite empezar lo antes posible (desde after = (día,
+        minuto) si se indica). Retorna dict (day, room, start, gap_end,
+        slack) o None si no cabe en ningún lado.
+        """
+        lo = 0 if after is None else after[0] * DAY + after[1]
+        found = self._containing(duration, after) if after is not None else []
+        key = self._start_tree.first_at_least(duration, lo)
+        if key is not None:
+            room = min(o for o, length in self._leaf[key].items() if length >= duration)
+            found.append(self._slot(key, room))
+        return min(found, default=None,
+                   key=lambda s: (s["day"] * DAY + s["start"], s["room"]))
+
+    def best_fit(self, duration):
+        """Hueco más ajustado (menor largo >= duración; el más temprano si empatan)."""
+        length = self._len_tree.query(duration, DAY + 1)
+        if length == INF:
+            return None
+        key, room = min(self._by_len[length])
+        return self._slot(key, room)
+
+    def all_fits(self, duration, after=None, limit=None):
+        """Todos los huecos donde cabe la duración, en orden cronológico."""
+        lo = 0 if after is None else after[0] * DAY + after[1]
+        out = self._containing(duration, after) if after is not None else []
+        while limit is None or len(out) < limit:
+            key = self._start_tree.first_at_least(duration, lo)
+            if key is None:
+                break
+            for room in sorted(self._leaf[key]):
+                if self._leaf[key][room] >= duration:
+                    out.append(self._slot(key, room))
+            lo = key + 1
+        return out[:limit]
+
+    def book_earliest(self, duration, name=None, after=None):
+        """Reserva en el primer hueco donde cabe. Retorna (id, slot) o None."""
+        slot = self.earliest_fit(duration, after)
+        if slot is None:
+            return None
+        return self.add_booking(slot["day"], slot["room"], slot["start"],
+                                duration, name), slot
+
+
+def _hhmm(t):
+    return f"{int(t) // 60:02d}:{int(t) % 60:02d}"
+
+
+def main(argv=None):
+    import random
+    import time
+    import instances
+    from heuristics import heuristic_schedule
+
+    parser = argparse.ArgumentParser(description="Índice de huecos libres por quirófano")
+    parser.add_argument("instance", type=int, nargs="?", default=1)
+    parser.add_argument("--set", choices=["first", "hosp"], default="first")
+    parser.add_argument("--duration", type=int, default=225)
+    parser.add_argument("--days", type=int, default=5,
+                        help="días de la semana (se repite la programación)")
+    parser.add_argument("--bench", type=int, default=0,
+                        help="consultas y reservas aleatorias para medir")
+    args = parser.parse_args(argv)
+
+    if args.set == "first":
+        inst = instances.first_instance(args.instance)
+    else:
+        inst = instances.hospital_instance(args.instance)
+    n, m, p = inst["n"], inst["m"], inst["p"]
+    sched = heuristic_schedule(n, m, p, inst["w"], inst["d"], inst["init"])
+    index = SlotIndex(m, inst["init"], inst["H"], days=args.days)
+    for t in range(args.days):
+        SlotIndex.from_schedule(sched, p, m, inst["init"], inst["H"],
+                                inst["procedure_names"], day=t, index=index)
+
+    dur = args.duration
+    for label, slot in (("Primer hueco", index.earliest_fit(dur)),
+                        ("Más ajustado", index.best_fit(dur))):
+        if slot is None:
+            print(f"{label}: no hay hueco de {dur} min")
+        else:
+            print(f"{label}: día {slot['day']} quirófano {slot['room']} "
+                  f"{_hhmm(slot['start'])}-{_hhmm(slot['start'] + dur)} "
+                  f"(holgura {slot['slack'] - dur} min)")
+    fits = index.all_fits(dur)
+    print(f"Huecos donde caben {dur} min: {len(fits)}")
+
+    if args.bench:
+        rng = random.Random(0)
+        booked = []
+        t0 = time.perf_counter()
+        for _ in range(args.bench):
+            d = rng.choice((60, 90, 135, 180, 225))
+            if booked and rng.random() < 0.4:
+                index.remove_booking(booked.pop(rng.randrange(len(booked))))
+            else:
+                res = index.book_earliest(d, after=(rng.randrange(args.days), 0))
+                if res is not None:
+                    booked.append(res[0])
+            index.best_fit(d)
+        elapsed = time.perf_counter() - t0
+        print(f"{args.bench} operaciones (reserva/anulación + 2 consultas) en "
+              f"{elapsed:.2f}s ({1e6 * elapsed / args.bench:.0f} µs c/u)")
+
+
+if __name__ == "__main__":
+    main()
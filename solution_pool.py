@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de soluciones: varias programaciones distintas cerca del óptimo.
+
+solve_instance entrega una sola programación; aquí se juntan alternativas
+a pocos por ciento de la mejor para que quien programa elija.
+
+Almacenamiento (SolutionPool): arreglos numpy de capacidad fija, una fila
+por solución (quirófano int16 y hora de inicio int32 por cirugía, más el
+objetivo). Como todos los quirófanos parten en init, renumerar los
+quirófanos da la misma programación, y lo mismo pasa al intercambiar dos
+cirugías idénticas (mismo p, w, d): cada solución se guarda en forma
+canónica (quirófanos ordenados por su contenido, cirugías idénticas
+repartidas por índice) y esa forma es la clave de deduplicación. Si el
+pool se llena, una solución nueva reemplaza a la peor cuando es mejor
+que ella.
+
+Generación (solve_pool): se parte de las soluciones dadas (p. ej. la de
+solve_instance vía schedule.schedule_from_result), de bnb si la instancia
+cabe en su tabla o de la heurística, y se expande el pool por el mejor
+primero: de cada solución se generan los vecinos de mover una cirugía a
+otro quirófano o intercambiar dos de quirófanos distintos; solo cambian
+dos quirófanos, que se reordenan con el DP exacto (dp_sequencer, con
+memoria), así que cada vecino cuesta dos llamadas al DP y no una
+resolución completa. Se guardan los vecinos dentro de rel_gap de la
+mejor; si alguno mejora a la mejor, pasa a ser la referencia. Las
+cirugías idénticas (mismo p, w, d) se mueven solo una por quirófano,
+para no llenar el pool con copias que solo cambian el índice.
+
+Uso:
+    python solution_pool.py 4 --k 10 --gap 0.02 --budget 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+
+class SolutionPool:
+    """Pool de capacidad fija respaldado por arreglos, sin duplicados por simetría."""
+
+    def __init__(self, n, capacity=1000, types=None):
+        self.n = n
+        self.capacity = capacity
+        self.types = np.arange(n) if types is None else np.asarray(types)
+        self._groups = [np.flatnonzero(self.types == t) for t in np.unique(self.types)]
+        self.room = np.full((capacity, n), -1, dtype=np.int16)
+        self.start = np.zeros((capacity, n), dtype=np.int32)
+        self.objective = np.full(capacity, np.inf)
+        self.size = 0
+        self._slot = {}  # clave canónica -> fila
+
+    def __len__(self):
+        return self.size
+
+    def canonical(self, room, start):
+        """
+        Forma canónica de (room, start): los quirófanos se ordenan por su
+        contenido (inicio y tipo de cada cirugía) y, dentro de cada tipo de
+        cirugías idénticas, la k-ésima por índice toma el k-ésimo lugar.
+        """
+        room = np.asarray(room, dtype=np.int16)
+        start = np.asarray(start, dtype=np.int32)
+        contents = {}
+        for j in np.flatnonzero(room >= 0):
+            contents.setdefault(int(room[j]), []).append((int(start[j]), int(self.types[j])))
+        order = sorted(contents, key=lambda o: sorted(contents[o]))
+        relabel = {o: k for k, o in enumerate(order)}
+        new_room = np.array([relabel.get(int(o), -1) for o in room], dtype=np.int16)
+        out_room = np.empty_like(new_room)
+        out_start = np.empty_like(start)
+        for jobs in self._groups:
+            slots = sorted(zip(new_room[jobs].tolist(), start[jobs].tolist()))
+            out_room[jobs] = [o for o, _ in slots]
+            out_start[jobs] = [s for _, s in slots]
+        return out_room, out_start
+
+    def add(self, schedule, objective):
+        """
+        Agrega el schedule (room/start de schedule.py). Retorna False si ya
+        estaba (o una copia simétrica) o si el pool está lleno de mejores.
+        """
+        room, start = self.canonical([-1 if o is None else o for o in schedule["room"]],
+                                     [0 if s is None else s for s in schedule["start"]])
+        key = room.tobytes() + start.tobytes()
+        if key in self._slot:
+            return False
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
+        else:
+            slot = int(np.argmax(self.objective))
+            if objective >= self.objective[slot]:
+                return False
+            old = self.room[slot].tobytes() + self.start[slot].tobytes()
+            del self._slot[old]
+        self.room[slot], self.start[slot], self.objective[slot] = room, start, objective
+        self._slot[key] = slot
+        return True
+
+    def schedule(self, slot):
+        """Schedule (listas room/start) de la fila slot."""
+        room = self.room[slot].tolist()
+        start = self.start[slot].tolist()
+        return {"room": [None if o < 0 else o for o in room],
+                "start": [None if o < 0 else s for o, s in zip(room, start)]}
+
+    def top(self, k, rel_gap=None):
+        """
+        Las k mejores como lista de dicts (objective, schedule); con
+        rel_gap, solo las que están dentro de ese gap de la mejor.
+        """
+        order = np.argsort(self.objective[:self.size], kind="stable")[:k]
+        if rel_gap is not None and order.size:
+            limit = self.objective[order[0]] * (1 + rel_gap) + 1e-9
+            order = order[self.objective[order] <= limit]
+        return [{"objective": float(self.objective[s]), "schedule": self.schedule(s)}
+                for s in order]
+
+
+def _neighbors(seqs, p, w, d):
+    """Pares (a, b, nuevos trabajos de a, nuevos trabajos de b)."""
+    m = len(seqs)
+
+    def reps(seq):
+        seen, out = set(), []
+        for j in seq:
+            if (p[j], w[j], d[j]) not in seen:
+                seen.add((p[j], w[j], d[j]))
+                out.append(j)
+        return out
+
+    heads = [reps(seq) for seq in seqs]
+    for a in range(m):
+        rest = {j: [i for i in seqs[a] if i != j] for j in heads[a]}
+        empty_done = False
+        for b in range(m):
+            if b == a:
+                continue
+            if not seqs[b]:
+                # todos los quirófanos vacíos son equivalentes
+                if empty_done:
+                    continue
+                empty_done = True
+            for j in heads[a]:
+                yield a, b, rest[j], seqs[b] + [j]
+            if b > a:
+                for j in heads[a]:
+                    for l in heads[b]:
+                        if (p[j], w[j], d[j]) != (p[l], w[l], d[l]):
+                            yield (a, b, rest[j] + [l],
+                                   [i for i in seqs[b] if i != l] + [j])
+
+
+def solve_pool(inst, k=10, rel_gap=0.03, time_budget=10, seeds=(), start="auto",
+               capacity=1000, max_expand=None, alpha=0.5, beta=1.0, gamma=0.5,
+               verbose=False):
+    """
+    Genera el pool de inst (dict de instances.py).
+
+    seeds: schedules iniciales adicionales. start: "bnb", "heuristic" o
+    "auto" (bnb si la instancia cabe en su tabla exacta, con la mitad del
+    tiempo; si no alcanza a probar optimalidad se agrega también la
+    heurística). Retorna dict con
+    solutions (top-k dentro de rel_gap), pool (SolutionPool), best,
+    expanded y elapsed.
+    """
+    import heapq
+    from dp_sequencer import sequence_room
+    from heuristics import heuristic_schedule, total_cost
+    from schedule import room_sequences, schedule_from_sequences
+
+    t0 = time.perf_counter()
+    t_end = t0 + time_budget
+    n, m, p, w, d = inst["n"], inst["m"], inst["p"], inst["w"], inst["d"]
+    init, H = inst["init"], inst["H"]
+    ready = [init] * m
+    idle = beta * (m * H - sum(p))
+
+    starts = list(seeds)
+    heuristic = not starts
+    if start in ("auto", "bnb"):
+        from bnb import solve_bnb
+
+        # bnb usa a lo más la mitad de lo que queda
+        share = (t_end - time.perf_counter()) / 2
+        try:
+            res = solve_bnb(inst, time_limit=share, alpha=alpha, beta=beta, gamma=gamma)
+            starts.append(res["schedule"])
+            heuristic = start == "auto" and not res["proven"]
+        except ValueError:
+            if start == "bnb":
+                raise
+    if heuristic:
+        starts.append(heuristic_schedule(n, m, p, w, d, init, alpha, gamma))
+
+    kinds = {}
+    types = [kinds.setdefault((p[j], w[j], d[j]), len(kinds)) for j in range(n)]
+    pool = SolutionPool(n, capacity, types)
+    heap = []  # (costo, contador, secuencias) por expandir
+    counter = 0
+    best = np.inf
+    for sched in starts:
+        seqs = [sequence_room(seq, init, p, w, d, alpha, gamma)[1]
+                for seq in room_sequences(sched, m)]
+        cost = total_cost(seqs, ready, p, w, d, alpha, gamma)
+        if pool.add(schedule_from_sequences(seqs, ready, n, p), cost + idle):
+            heapq.heappush(heap, (cost, counter, seqs))
+            counter += 1
+        best = min(best, cost)
+
+    expanded = 0
+    while heap and time.perf_counter() < t_end:
+        if max_expand is not None and expanded >= max_expand:
+            break
+        cost, _, seqs = heapq.heappop(heap)
+        limit = best + rel_gap * (best + idle)
+        if cost > limit:
+            break
+        expanded += 1
+        room_cost = [sequence_room(seq, init, p, w, d, alpha, gamma)[0] for seq in seqs]
+        for a, b, jobs_a, jobs_b in _neighbors(seqs, p, w, d):
+            if time.perf_counter() > t_end:
+                break
+            ca, sa = sequence_room(jobs_a, init, p, w, d, alpha, gamma)
+            cb, sb = sequence_room(jobs_b, init, p, w, d, alpha, gamma)
+            new = cost - room_cost[a] - room_cost[b] + ca + cb
+            if new > best + rel_gap * (best + idle):
+                continue
+            cand = list(seqs)
+            cand[a], cand[b] = sa, sb
+            if pool.add(schedule_from_sequences(cand, ready, n, p), new + idle):
+                heapq.heappush(heap, (new, counter, cand))
+                counter += 1
+                if new < best - 1e-9:
+                    best = new
+                    if verbose:
+                        print(f"[{time.perf_counter() - t0:6.1f}s] mejor: {best + idle:.2f}")
+        if verbose and expanded % 50 == 0:
+            print(f"[{time.perf_counter() - t0:6.1f}s] expandidas={expanded} "
+                  f"pool={len(pool)} por expandir={len(heap)}")
+
+    return {"solutions": pool.top(k, rel_gap), "pool": pool, "best": best + idle,
+            "expanded": expanded, "elapsed": time.perf_counter() - t0}
+
+
+def main(argv=None):
+    import instances
+    from schedule import evaluate
+
+    parser = argparse.ArgumentParser(description="Pool de soluciones cercanas al óptimo")
+    parser.add_argument("instance", type=int, nargs="?", default=1)
+    parser.add_argument("--set", choices=["first", "hosp", "gen"], default="first")
+    parser.add_argument("--n", type=int, default=60, help="tamaño para --set gen")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--gap", type=float, default=0.03, help="gap relativo (0.03 = 3%%)")
+    parser.add_argument("--budget", type=float, default=10)
+    parser.add_argument("--start", choices=["auto", "bnb", "heuristic"], default="auto")
+    args = parser.parse_args(argv)
+
+    if args.set == "first":
+        inst = instances.first_instance(args.instance)
+    elif args.set == "hosp":
+        inst = instances.hospital_instance(args.instance)
+    else:
+        inst = instances.generate_instance(args.n)
+    res = solve_pool(inst, k=args.k, rel_gap=args.gap, time_budget=args.budget,
+                     start=args.start, verbose=True)
+    print(f"{inst['name']}: pool={len(res['pool'])} expandidas={res['expanded']} "
+          f"en {res['elapsed']:.1f}s")
+    best = res["best"]
+    for r, sol in enumerate(res["solutions"], 1):
+        check = evaluate(sol["schedule"], inst["p"], inst["w"], inst["d"], inst["H"],
+                         inst["m"])["objective"]
+        rooms = len({o for o in sol["schedule"]["room"] if o is not None})
+        print(f"  {r:>3}. objetivo {sol['objective']:.2f} (+{100 * (sol['objective'] / best - 1):.2f}%)"
+              f"  evaluado {check:.2f}  quirófanos usados {rooms}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Validación de la solución que entrega CBC y KPIs de la programación.
+
+Todo se calcula con arreglos numpy en una sola pasada (sin bucles por
+cirugía), para poder correrlo después de cada resolución en modo lote.
+
+Chequeos:
+    - x entero (dentro de la tolerancia) y cada cirugía en un solo quirófano
+    - sin solapamiento en cada quirófano
+    - inicio >= init
+    - C = S + p
+    - retraso u = max(0, C - d)
+KPIs:
+    - utilización por quirófano (trabajo / H)
+    - sobretiempo por quirófano más allá de init + H
+    - retraso máximo y total
+"""
+
+import numpy as np
+
+
+def result_arrays(result):
+    """
+    Arreglos a partir de la tupla de FirstOptCode.solve_instance:
+    dict con X (n x m), S, C, u, p, w, d, init, H.
+    """
+    (status, obj, x_sol, S_sol, C_sol, u_sol, O_total,
+     n, m, p, w, d, procedure_names, init, H) = result[:15]
+    X = np.array([[x_sol.get((i, o)) or 0.0 for o in range(m)] for i in range(n)],
+                 dtype=float)
+    as_array = lambda sol: np.array([np.nan if sol[i] is None else sol[i]
+                                     for i in range(n)], dtype=float)
+    return {"X": X, "S": as_array(S_sol), "C": as_array(C_sol), "u": as_array(u_sol),
+            "p": np.asarray(p, dtype=float), "w": np.asarray(w, dtype=float),
+            "d": np.asarray(d, dtype=float), "init": init, "H": H}
+
+
+def model_arrays(x, S_i, C_i, u, n, m, p, w, d, init, H):
+    """
+    Arreglos leídos directamente de las variables de PuLP (x, S_i, C_i, u
+    de build_model) después de resolver.
+    """
+    from pulp import value
+
+    def col(var):
+        return np.array([np.nan if value(var[i]) is None else value(var[i])
+                         for i in range(n)], dtype=float)
+
+    X = np.array([[value(x[i][o]) or 0.0 for o in range(m)] for i in range(n)],
+                 dtype=float)
+    return {"X": X, "S": col(S_i), "C": col(C_i), "u": col(u),
+            "p": np.asarray(p, dtype=float), "w": np.asarray(w, dtype=float),
+            "d": np.asarray(d, dtype=float), "init": init, "H": H}
+
+
+def schedule_arrays(schedule, p, w, d, m, init, H):
+    """
+    Arreglos a partir de un schedule (room/start) de schedule.py. C y u se
+    derivan de start y p, así que solo se chequean asignación,
+    solapamiento e inicio.
+    """
+    n = len(p)
+    room = np.array([-1 if o is None else o for o in schedule["room"]])
+    X = np.zeros((n, m))
+    assigned = room >= 0
+    X[np.flatnonzero(assigned), room[assigned]] = 1.0
+    S = np.array([np.nan if s is None else s for s in schedule["start"]], dtype=float)
+    p = np.asarray(p, dtype=float)
+    d = np.asarray(d, dtype=float)
+    C = S + p
+    return {"X": X, "S": S, "C": C, "u": np.maximum(0.0, C - d),
+            "p": p, "w": np.asarray(w, dtype=float), "d": d, "init": init, "H": H}
+
+
+def check(arrays, tol=1e-4, int_tol=1e-4):
+    """
+    Valida los arreglos (result_arrays / schedule_arrays).
+
+    Retorna dict con:
+        ok: True si no hay violaciones
+        violations: nombre -> índices de cirugías (o pares) que fallan
+        room: quirófano de cada cirugía (-1 si no está asignada)
+        kpi: utilización, sobretiempo, retrasos
+    """
+    X, S, C, u = arrays["X"], arrays["S"], arrays["C"], arrays["u"]
+    p, d, init, H = arrays["p"], arrays["d"], arrays["init"], arrays["H"]
+    n, m = X.shape
+    violations = {}
+
+    def record(name, mask):
+        idx = np.flatnonzero(mask)
+        if idx.size:
+            violations[name] = idx.tolist()
+
+    Xr = np.rint(X)
+    record("x_no_entero", np.any(np.abs(X - Xr) > int_tol, axis=1))
+    record("asignacion_unica", Xr.sum(axis=1) != 1)
+    room = np.where(Xr.sum(axis=1) >= 1, X.argmax(axis=1), -1)
+
+    record("sin_tiempos", np.isnan(S) | np.isnan(C))
+    record("inicio_antes_de_init", S < init - tol)
+    record("C_distinto_S_mas_p", np.abs(C - S - p) > tol)
+    tard = np.maximum(0.0, C - d)
+    record("retraso_inconsistente", np.abs(u - tard) > tol)
+
+    # Solapamiento: ordenar por (quirófano, inicio) y comparar vecinos
+    valid = (room >= 0) & ~np.isnan(S)
+    idx = np.flatnonzero(valid)
+    order = idx[np.lexsort((S[idx], room[idx]))]
+    same_room = room[order][1:] == room[order][:-1]
+    overlap = same_room & (S[order][1:] < C[order][:-1] - tol)
+    if overlap.any():
+        k = np.flatnonzero(overlap)
+        violations["solapamiento"] = list(zip(order[k].tolist(), order[k + 1].tolist()))
+
+    # KPIs por quirófano
+    r = room[valid]
+    work = np.bincount(r, weights=p[valid], minlength=m)
+    end = np.full(m, float(init))
+    np.maximum.at(end, r, C[valid])
+    overtime = np.maximum(0.0, end - (init + H))
+
+    kpi = {
+        "utilization": (work / H).tolist(),
+        "overtime": overtime.tolist(),
+        "total_overtime": float(overtime.sum()),
+        "max_tardiness": float(np.nanmax(tard)) if n else 0.0,
+        "total_tardiness": float(np.nansum(tard)),
+        "late_surgeries": int(np.sum(tard > tol)),
+        "makespan": float(np.nanmax(C)) if n else float(init),
+    }
+    return {"ok": not violations, "violations": violations,
+            "room": room.tolist(), "kpi": kpi}
+
+
+def check_result(result, **kwargs):
+    """Valida directamente la tupla de FirstOptCode.solve_instance."""
+    return check(result_arrays(result), **kwargs)
+
+
+def format_report(report):
+    """Resumen de una línea por chequeo fallido y los KPIs principales."""
+    lines = ["Validación: OK" if report["ok"] else "Validación: CON ERRORES"]
+    for name, idx in report["violations"].items():
+        lines.append(f"  {name}: {len(idx)} ({idx[:5]}{'...' if len(idx) > 5 else ''})")
+    kpi = report["kpi"]
+    util = ", ".join(f"{100 * u:.0f}%" for u in kpi["utilization"])
+    lines.append(f"  Utilización por quirófano: {util}")
+    lines.append(f"  Sobretiempo total: {kpi['total_overtime']:.0f} min  "
+                 f"Retraso máximo: {kpi['max_tardiness']:.0f} min  "
+                 f"Cirugías atrasadas: {kpi['late_surgeries']}")
+    return "\n".join(lines)
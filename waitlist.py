@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Lista de espera: elegir las cirugías de cada día entre miles de pacientes
+("según lista de espera y gravedad", como dice cada hospital del informe
+de prueba2).
+
+Prioridad con envejecimiento: el puntaje de un paciente el día t es
+    gravedad * severity_weight + aging * (t - día de ingreso)
+El envejecimiento es aditivo y con la misma tasa para todos, así que el
+orden entre dos pacientes no cambia con el tiempo: la clave del heap es
+fija (gravedad * severity_weight - aging * ingreso) y el puntaje del día
+es la clave + aging * t. Agregar, quitar o cambiar la gravedad es
+O(log n) (heapq con borrado perezoso: la entrada vieja se marca y se
+descarta al salir). Los pacientes con fecha límite (garantía) están además
+en un segundo heap por fecha, y los vencidos entran primero.
+
+Selección del día (select_day): se toman los mejores candidatos del heap
+hasta cubrir varias veces la capacidad m * H y se elige el subconjunto con
+mayor puntaje total que cabe en esos minutos (mochila 0/1 por programación
+dinámica en numpy, en pasos de `step` minutos). Luego se reparte en
+quirófanos (first-fit-decreasing de multiday para los vencidos, best fit
+para el resto); lo que no cabe sigue en la lista. plan_day secuencia el
+día con multiday.sequence_day (DP exacto por quirófano).
+
+multiday.plan_horizon reparte un conjunto fijo de cirugías en un
+horizonte; aquí la lista es dinámica (ingresos diarios) y se decide día a
+día.
+
+Uso:
+    python waitlist.py --hospital 8 --patients 5000 --days 22
+"""
+
+import argparse
+import heapq
+import itertools
+import time
+
+import numpy as np
+
+REMOVED = None
+
+
+class Waitlist:
+    """Lista de espera con prioridad por gravedad y antigüedad."""
+
+    def __init__(self, severity_weight=10.0, aging=1.0):
+        self.severity_weight = severity_weight
+        self.aging = aging
+        self.patients = {}   # id -> dict del paciente
+        self._entry = {}     # id -> entrada viva del heap de prioridad
+        self._heap = []      # [-clave, contador, id]
+        self._due_heap = []  # [fecha límite, contador, id]
+        self._due_entry = {}
+        self._counter = itertools.count()
+        self._stale = 0
+
+    def __len__(self):
+        return len(self.patients)
+
+    def __contains__(self, pid):
+        return pid in self.patients
+
+    def key(self, patient):
+        """Clave fija del heap (puntaje el día 0)."""
+        return (self.severity_weight * patient["w"]
+                - self.aging * patient["added"])
+
+    def score(self, pid, day):
+        """Puntaje del paciente el día `day`."""
+        return self.key(self.patients[pid]) + self.aging * day
+
+    def add(self, pid, p, w, added, due=None, name=None):
+        """
+        Agrega al paciente pid: duración p (min), gravedad w, día de
+        ingreso y fecha límite opcional.
+        """
+        if pid in self.patients:
+            raise ValueError(f"el paciente {pid!r} ya está en la lista")
+        patient = {"id": pid, "p": p, "w": w, "added": added, "due": due, "name": name}
+        self.patients[pid] = patient
+        self._push(patient)
+
+    def _push(self, patient):
+        pid = patient["id"]
+        entry = [-self.key(patient), next(self._counter), pid]
+        self._entry[pid] = entry
+        heapq.heappush(self._heap, entry)
+        if patient["due"] is not None:
+            due_entry = [patient["due"], next(self._counter), pid]
+            self._due_entry[pid] = due_entry
+            heapq.heappush(self._due_heap, due_entry)
+
+    def _invalidate(self, pid):
+        self._entry.pop(pid)[2] = REMOVED
+        if pid in self._due_entry:
+            self._due_entry.pop(pid)[2] = REMOVED
+        self._stale += 1
+        if self._stale > len(self.patients) + 1000:
+            self._compact()
+
+    def _compact(self):
+        """Reconstruye los heaps sin las entradas borradas."""
+        self._heap = [e for e in self._heap if e[2] is not REMOVED]
+        self._due_heap = [e for e in self._due_heap if e[2] is not REMOVED]
+        heapq.heapify(self._heap)
+        heapq.heapify(self._due_heap)
+        self._stale = 0
+
+    def remove(self, pid):
+        """Saca al paciente (operado, derivado o que desiste). Retorna su dict."""
+        self._invalidate(pid)
+        return self.patients.pop(pid)
+
+    def update(self, pid, **changes):
+        """Cambia w, p o due del paciente (p. ej. si se agrava). O(log n)."""
+        unknown = set(changes) - {"p", "w", "due"}
+        if unknown:
+            raise ValueError(f"solo se pueden cambiar p, w y due (no {sorted(unknown)})")
+        self._invalidate(pid)
+        patient = self.patients[pid]
+        patient.update(changes)
+        self._push(patient)
+
+    def top(self, k):
+        """Los k de mayor prioridad, sin sacarlos, en orden."""
+        out = []
+        for entry in heapq.nsmallest(k + self._stale, self._heap):
+            if entry[2] is not REMOVED:
+                out.append(entry[2])
+                if len(out) == k:
+                    break
+        return out
+
+    def overdue(self, day):
+        """Pacientes con fecha límite <= day, de la más antigua a la más nueva."""
+        out, popped = [], []
+        while self._due_heap and self._due_heap[0][0] <= day:
+            entry = heapq.heappop(self._due_heap)
+            if entry[2] is not REMOVED:
+                popped.append(entry)
+                out.append(entry[2])
+        for entry in popped:
+            heapq.heappush(self._due_heap, entry)
+        return out
+
+    def _candidates(self, minutes):
+        """Mejores pacientes (en orden) hasta juntar `minutes` minutos."""
+        out, total = [], 0
+        popped = []
+        while self._heap and total < minutes:
+            entry = heapq.heappop(self._heap)
+            popped.append(entry)
+            if entry[2] is REMOVED:
+                continue
+            out.append(entry[2])
+            total += self.patients[entry[2]]["p"]
+        for entry in popped:
+            if entry[2] is not REMOVED:
+                heapq.heappush(self._heap, entry)
+        self._stale -= sum(1 for e in popped if e[2] is REMOVED)
+        return out
+
+    # ------------------------------------------------------------------
+    # Selección del día
+    # ------------------------------------------------------------------
+
+    def select_day(self, day, m, H, pool_factor=3.0, step=5, remove=True):
+        """
+        Pacientes para el día: vencidos primero y luego la mochila sobre los
+        mejores candidatos. Retorna dict con items (por puntaje), rooms
+        (id -> quirófano), patients (id -> dict del paciente), used
+        (minutos), capacity y overdue_left (vencidos que no cupieron).
+        """
+        from multiday import _pack_rooms
+
+        capacity = m * H
+        forced = self.overdue(day)
+        cand = self._candidates(pool_factor * capacity)
+        forced_set = set(forced)
+        free = [pid for pid in cand if pid not in forced_set]
+
+        p = {pid: self.patients[pid]["p"] for pid in forced + free}
+        rooms, _ = _pack_rooms(forced, p, m, H)
+        load = [0] * m
+        for pid, o in rooms.items():
+            load[o] += p[pid]
+        chosen = _knapsack([p[pid] for pid in free],
+                           [self.score(pid, day) for pid in free],
+                           capacity - sum(load), step)
+        # la mochila mira solo los minutos totales: se reparte en quirófanos
+        # (best fit, de mayor a menor) y con lo que sobra se prueban los
+        # candidatos no elegidos, por puntaje
+        chosen = set(chosen)
+        picked = sorted((free[k] for k in chosen), key=lambda pid: -p[pid])
+        rest = [pid for k, pid in enumerate(free) if k not in chosen]
+        for pid in picked + rest:
+            fits = [o for o in range(m) if load[o] + p[pid] <= H]
+            if fits:
+                o = max(fits, key=lambda o: load[o])
+                rooms[pid] = o
+                load[o] += p[pid]
+        items = sorted(rooms, key=lambda pid: -self.score(pid, day))
+        patients = {pid: dict(self.patients[pid]) for pid in items}
+        if remove:
+            for pid in items:
+                self.remove(pid)
+        return {"items": items, "rooms": rooms, "patients": patients,
+                "used": sum(p[pid] for pid in items), "capacity": capacity,
+                "overdue_left": [pid for pid in forced if pid not in rooms]}
+
+
+def _knapsack(sizes, values, capacity, step=5):
+    """
+    Mochila 0/1 (máximo valor con tamaño total <= capacity). Los tamaños se
+    redondean hacia arriba a múltiplos de step minutos. Retorna los índices
+    elegidos.
+    """
+    if not sizes or capacity <= 0:
+        return []
+    cap = int(capacity // step)
+    units = [-(-int(s) // step) for s in sizes]
+    best = np.zeros(cap + 1)
+    take = np.zeros((len(sizes), cap + 1), dtype=bool)
+    for k, (u, v) in enumerate(zip(units, values)):
+        if u > cap or v <= 0:
+            continue
+        cand = best[:cap + 1 - u] + v
+        better = cand > best[u:]
+        take[k, u:] = better
+        best[u:] = np.where(better, cand, best[u:])
+    chosen = []
+    c = int(np.argmax(best))
+    for k in range(len(sizes) - 1, -1, -1):
+        if take[k, c]:
+            chosen.append(k)
+            c -= units[k]
+    return chosen[::-1]
+
+
+def plan_day(waitlist, day, m, H, init=8*60, alpha=0.5, gamma=0.5, **kwargs):
+    """
+    Selecciona los pacientes del día y los secuencia por quirófano
+    (multiday.sequence_day). Retorna el resultado de sequence_day más la
+    selección.
+    """
+    from multiday import sequence_day
+
+    sel = waitlist.select_day(day, m, H, **kwargs)
+    p = {pid: pat["p"] for pid, pat in sel["patients"].items()}
+    w = {pid: pat["w"] for pid, pat in sel["patients"].items()}
+    res = sequence_day(day, sel["items"], sel["rooms"], p, w, m, H, init,
+                       alpha=alpha, gamma=gamma)
+    res["selection"] = sel
+    return res
+
+
+def random_waitlist(n, hospital_index=8, seed=0, severity_weight=10.0, aging=1.0,
+                    backlog_days=120):
+    """
+    Lista de n pacientes con la mezcla de procedimientos de prueba2,
+    gravedad 1..3 e ingreso en los últimos backlog_days días.
+    """
+    import random
+    import prueba2
+
+    rng = random.Random(seed * 1000 + hospital_index)
+    procedures = prueba2.generate_procedure_selection()
+    percentages = prueba2.get_procedure_percentages()
+    weights = [percentages[proc["nombre"]] for proc in procedures]
+    wl = Waitlist(severity_weight, aging)
+    for pid, proc in enumerate(rng.choices(procedures, weights=weights, k=n)):
+        added = -rng.randrange(backlog_days)
+        due = added + 180 if proc["prioridad"] == 3 else None
+        wl.add(pid, rng.randint(*proc["duracion"]), proc["prioridad"], added, due,
+               proc["nombre"])
+    return wl
+
+
+def main(argv=None):
+    import random
+    from prueba2 import get_hospital_instances_from_report
+
+    parser = argparse.ArgumentParser(description="Lista de espera con envejecimiento")
+    parser.add_argument("--hospital", type=int, default=8, help="hospital de prueba2 (1..10)")
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=22)
+    parser.add_argument("--aging", type=float, default=1.0)
+    parser.add_argument("--severity-weight", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    info = get_hospital_instances_from_report()[args.hospital - 1]
+    m, H = info["n_quirofanos"], info["deadline"]
+    t0 = time.perf_counter()
+    wl = random_waitlist(args.patients, args.hospital, args.seed,
+                         args.severity_weight, args.aging)
+    print(f"{info['hospital']}: {len(wl)} pacientes en espera, m={m}, H={H} "
+          f"(carga {1e3 * (time.perf_counter() - t0):.0f} ms)")
+
+    rng = random.Random(args.seed)
+    arrivals = info["n_cirugias_mes"] / 22
+    next_id = args.patients
+    print(f"{'Día':>4} {'Operados':>9} {'Uso(%)':>7} {'Espera media':>13} "
+          f"{'Espera máx':>11} {'En lista':>9} {'ms':>6}")
+    for day in range(args.days):
+        t1 = time.perf_counter()
+        res = plan_day(wl, day, m, H)
+        ms = 1e3 * (time.perf_counter() - t1)
+        sel = res["selection"]
+        items = sel["items"]
+        util = 100 * sel["used"] / sel["capacity"]
+        waits = [day - pat["added"] for pat in sel["patients"].values()]
+        print(f"{day:>4} {len(items):>9} {util:>7.1f} "
+              f"{(sum(waits) / len(waits) if waits else 0):>13.1f} "
+              f"{max(waits, default=0):>11} {len(wl):>9} {ms:>6.1f}")
+        for _ in range(int(rng.expovariate(1 / arrivals))):
+            wl.add(next_id, rng.randint(*info["duracion_min"]), rng.choice((1, 2, 3)), day)
+            next_id += 1
+
+    ids = list(wl.patients)
+    ops = 20000
+    t1 = time.perf_counter()
+    for _ in range(ops):
+        wl.update(rng.choice(ids), w=rng.choice((1, 2, 3)))
+    print(f"{ops} cambios de gravedad: {1e6 * (time.perf_counter() - t1) / ops:.1f} µs c/u")
+
+
+if __name__ == "__main__":
+    main()